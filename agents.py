@@ -0,0 +1,96 @@
+# agents.py - Pluggable Move-Selection Agents for Four Kingdoms Military Chess
+
+# This module wraps the move generators and search engines behind one small interface so that
+# self-play, evaluation and front ends can swap them freely:
+
+#     agent.select_move(board, side, turn_order, sampler=None) -> (x1, y1, x2, y2) or None
+#     agent.seed(seed)   -> reseed the agent's random number generator
+
+# Agents are built from short spec strings such as "random", "heuristic" or
+# "mcts:iterations=200,policy=heuristic" with make_agent(). The board an agent receives is the
+# full-information board unless a BeliefSampler is passed along: then the unrevealed enemy
+# pieces are unknown and the search engines re-sample them from the sampler's beliefs.
+
+import ast
+import random
+
+from alphabeta import AlphaBetaSearcher
+from engine_protocol import EngineAgent
+from mcts import MCTS
+from movegen import legal_moves
+from rollout import HeuristicRolloutPolicy, random_policy
+
+
+class RandomAgent:
+    name = "random"
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def seed(self, seed) -> None:
+        self.rng.seed(seed)
+
+    def select_move(self, board, side: str, turn_order, sampler=None):
+        moves = legal_moves(board, side)
+        return self.rng.choice(moves) if moves else None
+
+
+# Plays the rollout heuristic directly: captures first, then advances towards enemy Flags.
+class HeuristicAgent(RandomAgent):
+    name = "heuristic"
+
+    def __init__(self, seed=None, **policy_kwargs):
+        super().__init__(seed)
+        self.policy = HeuristicRolloutPolicy(**policy_kwargs)
+
+    def select_move(self, board, side: str, turn_order, sampler=None):
+        moves = legal_moves(board, side)
+        return self.policy(board, side, moves, self.rng) if moves else None
+
+
+# Serial determinized MCTS. policy="heuristic" switches the rollouts to HeuristicRolloutPolicy;
+# the other keyword arguments go to MCTS.
+class MCTSAgent:
+    name = "mcts"
+
+    def __init__(self, seed=None, policy: str = "random", **search_kwargs):
+        if policy == "heuristic":
+            search_kwargs.setdefault("rollout_policy", HeuristicRolloutPolicy())
+        elif policy != "random":
+            raise ValueError(f"Unknown rollout policy: {policy}")
+        else:
+            search_kwargs.setdefault("rollout_policy", random_policy)
+        self.search = MCTS(seed=seed, **search_kwargs)
+
+    def seed(self, seed) -> None:
+        self.search.rng.seed(seed)
+
+    def select_move(self, board, side: str, turn_order, sampler=None):
+        return self.search.search(board, side, sampler, turn_order)
+
+
+class AlphaBetaAgent(MCTSAgent):
+    name = "alphabeta"
+
+    def __init__(self, seed=None, **search_kwargs):
+        self.search = AlphaBetaSearcher(seed=seed, **search_kwargs)
+
+
+AGENTS = {cls.name: cls for cls in (RandomAgent, HeuristicAgent, MCTSAgent, AlphaBetaAgent,
+                                    EngineAgent)}
+
+
+# Build an agent from "name" or "name:key=value,key=value". Values are read as Python
+# literals where possible (numbers, True/None), otherwise kept as strings.
+def make_agent(spec: str, seed=None):
+    name, _, params = spec.partition(":")
+    if name not in AGENTS:
+        raise ValueError(f"Unknown agent: {name} (choose from {', '.join(AGENTS)})")
+    kwargs = {}
+    for item in filter(None, params.split(",")):
+        key, _, value = item.partition("=")
+        try:
+            kwargs[key.strip()] = ast.literal_eval(value.strip())
+        except (ValueError, SyntaxError):
+            kwargs[key.strip()] = value.strip()
+    return AGENTS[name](seed=seed, **kwargs)
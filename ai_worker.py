@@ -0,0 +1,152 @@
+# ai_worker.py - Background AI Moves for the GUI of Four Kingdoms Military Chess
+
+# This module runs agent searches (agents.py) off the GUI's main thread, so the window keeps
+# redrawing and handling input while a search with a multi-second budget is running.
+
+# - request() takes the side's Observation of the board (observation.py), so the AI never sees
+#   the face-down pieces of its opponents, and starts the search on a background thread, or in
+#   a warm worker process with use_process=True (no GIL contention with the GUI). The worker
+#   rebuilds the position with engine_protocol.observed_position: a board plus a BeliefSampler
+#   the search engines determinize from.
+# - Results and progress come back as pygame events posted to the main thread's queue:
+#     AI_MOVE      request, side, move (None if the side has no move), seconds
+#     AI_PROGRESS  request, side, info (the search's progress dict, e.g. iterations / depth)
+#   The main thread applies the move itself; answers to cancelled or superseded requests are
+#   recognised with is_current(event) and dropped. On a thread, a cancelled search also stops
+#   at its next progress callback.
+
+import signal
+import threading
+import time
+
+import pygame
+
+from agents import make_agent
+from engine_protocol import observed_position
+from observation import Observation
+
+AI_MOVE = pygame.USEREVENT + 1
+AI_PROGRESS = pygame.USEREVENT + 2
+PROGRESS_INTERVAL = 0.1   # seconds between AI_PROGRESS events of one search
+
+# Worker-process side: the progress queue installed by _init_process
+_progress_queue = None
+
+
+# The worker is forked from the GUI, which inherits SDL's SIGTERM handler (it turns the signal
+# into a pygame QUIT event); restore the default so close() can terminate a running search.
+def _init_process(progress_queue) -> None:
+    global _progress_queue
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    _progress_queue = progress_queue
+
+
+class _Cancelled(Exception):
+    pass
+
+
+# Search a move for `side` from its Observation `codes` in game mode `mode` (selfplay.MODES).
+# `report(info)` receives the search's progress dicts, throttled; the search is abandoned at
+# its next progress callback once `cancelled()` returns True.
+def _search(spec: str, mode: str, codes: bytes, side: str, seed, report, cancelled=None):
+    agent = make_agent(spec, seed=seed)
+    search = getattr(agent, "search", None)
+    if report is not None and search is not None and hasattr(search, "progress"):
+        last = [0.0]
+
+        def progress(info):
+            if cancelled is not None and cancelled():
+                raise _Cancelled
+            now = time.perf_counter()
+            if now - last[0] >= PROGRESS_INTERVAL:
+                last[0] = now
+                report(info)
+        search.progress = progress
+    board, sampler, turn_order = observed_position(mode, side, Observation(side, codes))
+    return agent.select_move(board, side, turn_order, sampler)
+
+
+# Process-pool task: like _search, with progress sent through the worker's queue.
+def _process_task(request: int, spec: str, mode: str, codes: bytes, side: str, seed):
+    report = lambda info: _progress_queue.put((request, side, info))
+    return _search(spec, mode, codes, side, seed, report)
+
+
+class AIWorker:
+    # spec: agent spec (agents.make_agent); post: where events go (pygame.event.post)
+    def __init__(self, spec: str, use_process: bool = False, seed=None, post=None):
+        self.spec = spec
+        self.seed = seed
+        self.post = post or pygame.event.post
+        self.current = None       # id of the request whose answer is still wanted
+        self.ids = 0
+        self.pool = None
+        if use_process:
+            from mcts import _pool_context
+            context = _pool_context()
+            self.progress_queue = context.Queue()
+            self.pool = context.Pool(1, _init_process, (self.progress_queue,))
+            threading.Thread(target=self._forward_progress, daemon=True).start()
+
+    @property
+    def busy(self) -> bool:
+        return self.current is not None
+
+    # Start searching a move for `side` from what it sees of `board` in game mode `mode`
+    # ("2p" / "4p"). Returns the request id.
+    def request(self, board, side: str, mode: str) -> int:
+        self.ids += 1
+        request = self.current = self.ids
+        codes = board.observe(side).codes
+        seed = None if self.seed is None else f"{self.seed}/{request}"
+        start = time.perf_counter()
+
+        def done(move):
+            self.post(pygame.event.Event(AI_MOVE, request=request, side=side, move=move,
+                                         seconds=time.perf_counter() - start))
+
+        if self.pool is not None:
+            self.pool.apply_async(_process_task, (request, self.spec, mode, codes, side, seed),
+                                  callback=done, error_callback=lambda error: done(None))
+        else:
+            def report(info):
+                self.post(pygame.event.Event(AI_PROGRESS, request=request, side=side, info=info))
+
+            def run():
+                move = None
+                try:
+                    move = _search(self.spec, mode, codes, side, seed, report,
+                                   lambda: self.current != request)
+                except _Cancelled:
+                    return
+                finally:
+                    if self.current == request:
+                        done(move)
+            threading.Thread(target=run, daemon=True).start()
+        return request
+
+    # True if `event` answers the request that is still wanted (and marks it answered).
+    def is_current(self, event) -> bool:
+        if event.request != self.current:
+            return False
+        if event.type == AI_MOVE:
+            self.current = None
+        return True
+
+    # Forget the running request; its answer will be ignored.
+    def cancel(self) -> None:
+        self.current = None
+
+    def _forward_progress(self) -> None:
+        while True:
+            try:
+                request, side, info = self.progress_queue.get()
+            except (EOFError, OSError):
+                return
+            self.post(pygame.event.Event(AI_PROGRESS, request=request, side=side, info=info))
+
+    def close(self) -> None:
+        self.current = None
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
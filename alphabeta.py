@@ -0,0 +1,336 @@
+# alphabeta.py - Determinized Alpha-Beta Search for Four Kingdoms Military Chess
+
+# This module implements a depth-limited alpha-beta searcher with predictable latency, as a
+# second engine next to mcts.py. Hidden information is handled by perfect-information Monte
+# Carlo: K full-information boards are sampled from the BeliefSampler, each is searched
+# independently, and the root move values are averaged.
+
+# Per determinization:
+# - Iterative deepening until the time budget is spent; the last completed depth is used.
+# - Alpha-beta over the two alliances (the root alliance maximizes), on make_move /
+#   unmake_move of ChessBoard with an incrementally updated Zobrist key.
+# - Move ordering: transposition-table move, then attacks (most valuable victim first),
+#   then the two killer moves of the ply, then quiet moves by history-heuristic score.
+# - Leaves are scored with rollout.static_evaluate; won / lost positions score 1 / 0.
+
+# Every root move is searched with a full window, so each gets an exact value and the average
+# over determinizations compares like with like.
+
+import math
+import random
+import time
+
+from board_encoding import CELL_ID, CELLS, piece_code
+from mcts import RootPosition, TWO_PLAYER_ORDER
+from movegen import legal_moves, side_alive, winning_alliance, next_side
+from rollout import static_evaluate, PIECE_VALUES
+from transposition import (
+    TranspositionTable, hash_board, move_hash_delta, piece_key, EXACT, LOWER, UPPER, SIDE_KEYS,
+)
+
+
+class _Timeout(Exception):
+    pass
+
+
+# Convert a table entry between the root alliance's point of view and the point of view of
+# the alliance to move (values are in [0, 1], so the other side's value is 1 - v).
+def _flip(value: float, flag: int, maximizing: bool):
+    if maximizing:
+        return value, flag
+    return 1.0 - value, {EXACT: EXACT, LOWER: UPPER, UPPER: LOWER}[flag]
+
+
+class AlphaBetaSearcher:
+    # time_limit: seconds per search, shared by all determinizations
+    # determinizations: number of boards sampled from the BeliefSampler (K)
+    # max_depth: deepest iteration of iterative deepening
+    # tt: transposition table (a 16 MB one is created if omitted)
+    # evaluator: callable(board, alliance) -> value in [0, 1]
+    # progress: optional callable(info dict) called after every completed depth
+    def __init__(self, time_limit: float = 1.0, determinizations: int = 4, max_depth: int = 64,
+                 tt: TranspositionTable | None = None, evaluator=static_evaluate, seed=None,
+                 progress=None):
+        self.time_limit = time_limit
+        self.determinizations = determinizations
+        self.max_depth = max_depth
+        self.tt = tt if tt is not None else TranspositionTable()
+        self.evaluator = evaluator
+        self.rng = random.Random(seed)
+        self.progress = progress
+        self.last_stats: dict = {}
+
+    # Return the best move for `side`, or None if it has no legal move.
+    # Statistics of the search are left in self.last_stats.
+    def search(self, board, side: str, sampler=None, turn_order=TWO_PLAYER_ORDER):
+        root = RootPosition.from_board(board, side, turn_order, sampler)
+        k = self.determinizations if root.hidden else 1
+        budget = self.time_limit / k
+
+        totals: dict = {}
+        nodes = 0
+        depths = []
+        ebfs = []
+        start = time.perf_counter()
+        for _ in range(k):
+            values = self.search_board(root.determinize(self.rng), side, turn_order, budget)
+            for move, value in values.items():
+                totals[move] = totals.get(move, 0.0) + value / k
+            nodes += self.nodes
+            depths.append(self.depth_reached)
+            ebfs.append(self.ebf)
+        elapsed = time.perf_counter() - start
+
+        self.last_stats = {
+            "nodes": nodes,
+            "seconds": elapsed,
+            "nodes_per_sec": nodes / elapsed if elapsed else 0.0,
+            "determinizations": k,
+            "depth": min(depths) if depths else 0,
+            "ebf": sum(ebfs) / len(ebfs) if ebfs else 0.0,
+            "tt": self.tt.stats(),
+        }
+        if not totals:
+            return None
+        return max(totals, key=totals.get)
+
+    # Iterative deepening on one full-information board.
+    # Returns {root move: value} from the deepest completed iteration.
+    def search_board(self, board, side: str, turn_order, time_limit: float) -> dict:
+        self.turn_order = tuple(turn_order)
+        self.alliance_map = board.alliance_map
+        self.alliance = board.alliance_map.get(side)
+        self.deadline = time.perf_counter() + time_limit
+        self.killers: dict[int, list] = {}
+        self.history: dict = {}
+        self.nodes = 0
+        self.depth_reached = 0
+        self.ebf = 0.0
+
+        key = hash_board(board, side)
+        values: dict = {}
+        previous_nodes = 0
+        for depth in range(1, self.max_depth + 1):
+            before = self.nodes
+            try:
+                result = self._root(board, side, depth, key, values)
+            except _Timeout:
+                break
+            values = result
+            self.depth_reached = depth
+            iteration_nodes = self.nodes - before
+            if previous_nodes:
+                self.ebf = iteration_nodes / previous_nodes
+            previous_nodes = iteration_nodes
+            if self.progress is not None:
+                self.progress({"depth": depth, "nodes": self.nodes})
+            if not values or time.perf_counter() >= self.deadline:
+                break
+        return values
+
+    # Search all root moves at `depth`. Moves are tried best-first according to the
+    # values of the previous iteration.
+    def _root(self, board, side, depth, key, previous: dict) -> dict:
+        moves = legal_moves(board, side)
+        if previous:
+            moves.sort(key=lambda m: previous.get(m, -1.0), reverse=True)
+        else:
+            moves = self.order_moves(board, moves, 0, None)
+        alive = [s for s in self.turn_order if side_alive(board, s)]
+        nxt = next_side(self.turn_order, side, alive)
+        values = {}
+        for move in moves:
+            values[move] = self._child(board, move, side, nxt, depth, 0, -math.inf, math.inf, key)
+        best = max(values, key=values.get) if values else None
+        self.tt.store(key, values[best] if values else 0.0, depth, EXACT, best)
+        return values
+
+    # Make `move`, search the child position and unmake it.
+    def _child(self, board, move, side, nxt, depth, ply, alpha, beta, key) -> float:
+        grid = board.grid
+        x1, y1, x2, y2 = move
+        a, b = CELL_ID[(x1, y1)], CELL_ID[(x2, y2)]
+        a_before = piece_code(grid[y1][x1])
+        b_before = piece_code(grid[y2][x2])
+        record = board.make_move(x1, y1, x2, y2)
+        child_key = key ^ move_hash_delta(a, b, a_before, b_before, piece_code(grid[y1][x1]),
+                                          piece_code(grid[y2][x2]), side, nxt)
+        try:
+            return self._alphabeta(board, nxt, depth - 1, ply + 1, alpha, beta, child_key)
+        finally:
+            board.unmake_move(record)
+
+    def _alphabeta(self, board, side, depth, ply, alpha, beta, key) -> float:
+        alive = [s for s in self.turn_order if side_alive(board, s)]
+        if len(alive) < len(self.turn_order):
+            # Sides that lost their Flag or every movable piece leave the board, as
+            # movegen.resolve_eliminations does in a real game
+            removed, key = self._remove_pieces(board, set(self.turn_order) - set(alive), key)
+            if removed:
+                try:
+                    return self._alphabeta(board, side, depth, ply, alpha, beta, key)
+                finally:
+                    self._restore_pieces(board, removed)
+
+        self.nodes += 1
+        if not self.nodes & 1023 and time.perf_counter() >= self.deadline:
+            raise _Timeout
+        if not alive:
+            return 0.5
+        winner = winning_alliance(board, alive)
+        if winner is not None:
+            return 1.0 if winner == self.alliance else 0.0
+        if side not in alive:
+            side = next_side(self.turn_order, side, alive)
+        if depth <= 0:
+            return self.evaluator(board, self.alliance)
+
+        maximizing = self.alliance_map.get(side) == self.alliance
+        tt_move = None
+        entry = self.tt.probe(key)
+        if entry is not None:
+            value, entry_depth, flag, tt_move = entry
+            value, flag = _flip(value, flag, maximizing)
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                elif flag == UPPER:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        moves = legal_moves(board, side)
+        if not moves:
+            # A side that cannot move on its turn is out of the game; its ally plays on
+            return self._skip_stuck(board, side, alive, depth, ply, alpha, beta, key)
+
+        nxt = next_side(self.turn_order, side, alive)
+        alpha0, beta0 = alpha, beta
+        best_move = None
+        if maximizing:
+            best = -math.inf
+            for move in self.order_moves(board, moves, ply, tt_move):
+                value = self._child(board, move, side, nxt, depth, ply, alpha, beta, key)
+                if value > best:
+                    best, best_move = value, move
+                alpha = max(alpha, value)
+                if alpha >= beta:
+                    self._record_cutoff(board, move, ply, depth)
+                    break
+        else:
+            best = math.inf
+            for move in self.order_moves(board, moves, ply, tt_move):
+                value = self._child(board, move, side, nxt, depth, ply, alpha, beta, key)
+                if value < best:
+                    best, best_move = value, move
+                beta = min(beta, value)
+                if alpha >= beta:
+                    self._record_cutoff(board, move, ply, depth)
+                    break
+
+        if best <= alpha0:
+            flag = UPPER
+        elif best >= beta0:
+            flag = LOWER
+        else:
+            flag = EXACT
+        stored, stored_flag = _flip(best, flag, maximizing)
+        self.tt.store(key, stored, depth, stored_flag, best_move)
+        return best
+
+    # Remove the pieces of `side`, which has no legal move, and search on with the next side
+    # (as movegen.skip_stuck_side does in a real game). Passing does not use up depth.
+    def _skip_stuck(self, board, side, alive, depth, ply, alpha, beta, key) -> float:
+        removed, key = self._remove_pieces(board, (side,), key)
+        nxt = next_side(self.turn_order, side, [s for s in alive if s != side])
+        key ^= SIDE_KEYS[side] ^ SIDE_KEYS[nxt]
+        try:
+            return self._alphabeta(board, nxt, depth, ply, alpha, beta, key)
+        finally:
+            self._restore_pieces(board, removed)
+
+    # Take the pieces of `sides` off the board. Returns the removed (x, y, piece) and `key`
+    # updated for their removal; _restore_pieces puts them back.
+    def _remove_pieces(self, board, sides, key):
+        grid = board.grid
+        removed = []
+        for cid, (x, y) in enumerate(CELLS):
+            p = grid[y][x]
+            if p is not None and p.owner in sides:
+                removed.append((x, y, p))
+                key ^= piece_key(cid, piece_code(p))
+                grid[y][x] = None
+        if removed:
+            board.touch()
+        return removed, key
+
+    def _restore_pieces(self, board, removed) -> None:
+        grid = board.grid
+        for x, y, p in removed:
+            grid[y][x] = p
+        if removed:
+            board.touch()
+
+    # Remember a quiet move that caused a cutoff (killer moves and history heuristic).
+    def _record_cutoff(self, board, move, ply, depth) -> None:
+        if board.grid[move[3]][move[2]] is not None:
+            return
+        killers = self.killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        self.history[move] = self.history.get(move, 0) + depth * depth
+
+    # Order moves: table move, attacks by victim value, killers, then history score.
+    def order_moves(self, board, moves, ply, tt_move):
+        grid = board.grid
+        killers = self.killers.get(ply, ())
+        history = self.history
+
+        def score(move):
+            if move == tt_move:
+                return 1e9
+            target = grid[move[3]][move[2]]
+            if target is not None:
+                attacker = grid[move[1]][move[0]]
+                return 1e6 + 100 * PIECE_VALUES[target.name] - PIECE_VALUES[attacker.name]
+            if move in killers:
+                return 1e5 - killers.index(move)
+            return history.get(move, 0)
+
+        return sorted(moves, key=score, reverse=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    from game import Game
+    from belief_sampler import BeliefSampler
+    from constants import MAX_COUNTS
+
+    parser = argparse.ArgumentParser(description="Alpha-beta search on a random Red-Green deployment")
+    parser.add_argument("--time", type=float, default=2.0)
+    parser.add_argument("--determinizations", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    game = Game()
+    game.generate_random_setup_red_green()
+    game.board.set_alliance_map({"Red": 1, "Green": 2})
+    for row in game.board.grid:
+        for p in row:
+            if p is not None and p.owner != "Red":
+                p.revealed = False
+    sampler = BeliefSampler(game.board, None, list(MAX_COUNTS), MAX_COUNTS, "Red")
+    searcher = AlphaBetaSearcher(time_limit=args.time, determinizations=args.determinizations,
+                                 seed=args.seed)
+    move = searcher.search(game.board, "Red", sampler)
+    stats = searcher.last_stats
+    print(f"best move {move}  depth {stats['depth']}  nodes {stats['nodes']}  "
+          f"{stats['nodes_per_sec']:.0f} nodes/s  ebf {stats['ebf']:.2f}  "
+          f"tt hit rate {stats['tt']['hit_rate']:.1%}")
@@ -0,0 +1,69 @@
+# belief_overlay.py - Belief Heatmap Overlay for Four Kingdoms Military Chess
+
+# This module draws what a BeliefSampler believes about the hidden enemy pieces on top of the
+# board: every hidden enemy piece is tinted by the probability that it is of one selected type
+# (Flag, Bomb, General, ...), from cold (blue, unlikely) to hot (red, likely), with the
+# probability written under the piece.
+
+# The overlay is one transparent surface the size of the window. It is rebuilt only when the
+# sampler's beliefs change (BeliefSampler.version, bumped by initialization, update and reset)
+# or another type is selected; otherwise the cached surface is blitted as is.
+
+import pygame
+
+from board_renderer import GRID_SIZE, PADDING_CELLS, BOARD_ROWS, BOARD_COLS, WHITE, load_font
+
+# Types the GUI's "概率" button cycles through (None switches the overlay off)
+HEATMAP_TYPES = [None, "Flag", "Bomb", "General", "CorpsCommander", "Mine", "Engineer"]
+HEATMAP_ALPHA = 150
+
+COLD = (40, 90, 255)
+HOT = (255, 40, 0)
+
+LEGEND_NAMES = {
+    "Flag": "军旗", "Bomb": "炸弹", "General": "司令", "CorpsCommander": "军长",
+    "Mine": "地雷", "Engineer": "工兵",
+}
+
+
+# Color of probability `p` on the blue -> red scale.
+def heat_color(p: float) -> tuple[int, int, int]:
+    p = min(1.0, max(0.0, p))
+    return tuple(round(c + (h - c) * p) for c, h in zip(COLD, HOT))
+
+
+class BeliefOverlay:
+    def __init__(self, grid_size: int = GRID_SIZE, padding: int = PADDING_CELLS):
+        self.grid_size = grid_size
+        self.padding = padding
+        self.size = (grid_size * (BOARD_COLS + 2 * padding), grid_size * (BOARD_ROWS + 2 * padding))
+        self.font = load_font(max(8, grid_size * 3 // 10))
+        self.legend_font = load_font(max(10, grid_size * 2 // 5))
+        self._key = None
+        self._surface = None
+
+    # The overlay surface for P(type == `ptype`) under `sampler`, drawn at the cells of the
+    # sampler side's currently hidden enemy pieces. Cached per (sampler, version, ptype).
+    def layer(self, sampler, ptype: str) -> pygame.Surface:
+        key = (id(sampler), sampler.version, ptype)
+        if key != self._key:
+            self._surface = self._render(sampler, ptype)
+            self._key = key
+        return self._surface
+
+    def _render(self, sampler, ptype: str) -> pygame.Surface:
+        g = self.grid_size
+        surface = pygame.Surface(self.size, pygame.SRCALPHA)
+        beliefs = sampler.beliefs
+        for x, y in sampler.board.get_all_hidden_positions(sampler.my_side):
+            dist = beliefs.get((x, y))
+            if dist is None:
+                continue
+            p = dist.get(ptype, 0.0)
+            rect = pygame.Rect((x + self.padding) * g, (y + self.padding) * g, g, g)
+            surface.fill((*heat_color(p), HEATMAP_ALPHA), rect)
+            label = self.font.render(f"{p:.2f}", True, WHITE)
+            surface.blit(label, label.get_rect(midbottom=(rect.centerx, rect.bottom)))
+        legend = self.legend_font.render(f"P({LEGEND_NAMES.get(ptype, ptype)})", True, WHITE)
+        surface.blit(legend, legend.get_rect(topleft=(g // 2, self.padding * g + g // 2)))
+        return surface
@@ -5,8 +5,10 @@
 
 import random
 from collections import defaultdict
-from constants import MAX_COUNTS,camp_positions,hq_positions
+from constants import MAX_COUNTS,camp_positions,hq_positions,PIECE_RANKS
+from constants import ALLOWED_MINE_CELLS,FORBIDDEN_BOMB_CELLS,ALLOWED_FLAG_CELLS
 from chessboard import ChessBoard
+from board_encoding import CELL_ID, PIECE_TYPES
 from copy import deepcopy
 from typing import Tuple, Dict, List
 
@@ -16,15 +18,23 @@ class BeliefSampler:
                  positions: List[Tuple[int,int]],
                  piece_types: List[str],      # 显式传入 piece_types
                  max_counts: Dict[str,int],
-                 my_side: str):
+                 my_side: str,
+                 prior: Dict[Tuple[int,int], Dict[str,float]] = None):
         """
         board: 当前的棋盘对象，用于获取格子布局和可视信息
         piece_types: 对手所有可能棋子类型列表，如["Flag","Mine","Bomb",...]
         max_counts: dict, 每种棋子的最大数量限制，用于约束信念空间。
                     若为 None,则使用 constants.py 中的 MAX_COUNTS。
+        prior: 可选的经验布阵先验（观察次数），两种形式：
+               - {(x,y): {piece_type: 次数}}，例如 setup_book.SetupBook.prior()
+               - 格子 × 类型的张量：按 board_encoding 格子编号索引的行，每行按
+                 PIECE_TYPES 顺序，例如 deployment_prior.load_prior()
+               None 时所有合法类型等权。
         """
         self.board = board
+        self.my_side = my_side
         self.piece_types = piece_types
+        self.prior = prior
         # 若外部未传入约束，则使用默认 MAX_COUNTS
         self.max_counts = max_counts if max_counts is not None else MAX_COUNTS
         # beliefs: mapping from position (x,y) to dict of piece_type->probability
@@ -33,6 +43,8 @@ class BeliefSampler:
         self.beliefs = defaultdict(lambda: {ptype: 0 for ptype in piece_types})
         self._hq_flag_seen_red = set()    # 记录红方 HQ 首次翻开的坐标
         self._hq_flag_seen_green = set()  # 记录绿方 HQ 首次翻开的坐标
+        # 信念每改变一次（初始化 / update / reset）加一，界面据此缓存概率热力图
+        self.version = 0
         self.initialize_beliefs()
 
     def initialize_beliefs(self):
@@ -42,45 +54,32 @@ class BeliefSampler:
         # 这个方法会返回所有 “不是我方” 且 “还没有翻面” 的棋子的位置列表；
         # 每个位置是一个 (x, y) 的元组（坐标）；
         hidden_positions = self.board.get_all_hidden_positions(self.my_side)
-        
-        rows = self.board.rows  #获取棋盘的总行数 17
 
         #所有敌方隐藏位置上所有棋子类型的概率初始化为 0.0。
         for pos in hidden_positions:
             for p in self.piece_types:
                 self.beliefs[pos][p] = 0.0
 
-        # 针对每个隐藏格子，按所属 owner 计算 rel_y，再判区域
+        # 针对每个隐藏格子，按布阵规则（与 Game.generate_random_setup 相同）判定合法类型
+        # 注意 ALLOWED_*_CELLS 等集合使用 (row, col) 坐标
         for x, y in hidden_positions:
-            owner = self.board.get_piece(x, y).owner
-            # 计算相对后排坐标 rel_y
-            # 假设 Red 在底部，Green 在顶部
-            if owner == "Red":
-                rel_y = y
-            else:  # owner == "Green"
-                rel_y = rows - 1 - y
-
             legal = []
-
-            # 1) HQ 只放 Flag
-            if self.board.is_hq(x, y):
-                legal = ["Flag"]
-
-            # 2) 最后两排（rel_y <= 1）可以放 Mine
-            elif rel_y <= 1:
-                legal = ["Mine"]
-
-            # 3) 第一排（rel_y == 0）不能放 Bomb
-            elif rel_y == 5:
-                legal = [ptype for ptype in self.piece_types if ptype != "Bomb"]
-
-            # 4) 其它格子：所有类型都允许
-            else:
-                legal = list(self.piece_types)
-
-            # 给这些合法类型赋未归一化权重 1
+            for ptype in self.piece_types:
+                # 1) 军旗只能放在大本营
+                if ptype == "Flag" and (y, x) not in ALLOWED_FLAG_CELLS:
+                    continue
+                # 2) 地雷只能放在最后两排
+                if ptype == "Mine" and (y, x) not in ALLOWED_MINE_CELLS:
+                    continue
+                # 3) 炸弹不能放在第一排
+                if ptype == "Bomb" and (y, x) in FORBIDDEN_BOMB_CELLS:
+                    continue
+                legal.append(ptype)
+
+            # 给这些合法类型赋未归一化权重 1；有经验先验时再加上观察次数（伪计数）
+            counts = self._prior_counts((x, y))
             for ptype in legal:
-                self.beliefs[(x, y)][ptype] = 1.0
+                self.beliefs[(x, y)][ptype] = 1.0 + counts.get(ptype, 0)
 
         # 最后 IPF 归一化并加全局数量约束
         # 比如说，一共有10个格子可以合法地雷 那么进行权重分布
@@ -92,6 +91,15 @@ class BeliefSampler:
         # 使用 IPF（Iterative Proportional Fitting）算法对 belief 分布做归一化处理，
         # 同时施加全局棋子数量约束（每种棋子最多只能放指定数量）。
         # iterations：迭代轮数，用于逼近满足所有约束的合理分布。 一共迭代5轮
+        # 先删掉已经不是隐藏敌子的格子（被吃掉、被翻开、或棋子已经离开），
+        # 否则这些过期的行会分走概率质量
+        # 格子上是已翻开的敌子时，它的类型已知，从 remaining_counts 中扣掉一个
+        hidden = set(self.board.get_all_hidden_positions(self.my_side))
+        for pos in [pos for pos in self.beliefs if pos not in hidden]:
+            del self.beliefs[pos]
+            piece = self.board.get_piece(*pos)
+            if piece is not None and piece.owner != self.my_side and piece.name in self.remaining_counts:
+                self.remaining_counts[piece.name] = max(self.remaining_counts[piece.name] - 1, 0)
         positions = list(self.beliefs.keys())
         # IPF 过程：在“每格归一化”和“类型数量限制”之间交替迭代
         for _ in range(iterations):
@@ -102,7 +110,7 @@ class BeliefSampler:
                     for ptype in self.beliefs[pos]:
                         self.beliefs[pos][ptype] /= total
            # -------- 第二步：缩放每种棋子的概率，使其总和符合 max_counts 限制 --------
-            for ptype, max_count in self.max_remaining_counts.items():
+            for ptype, max_count in self.remaining_counts.items():
                 # 统计这种棋子在所有位置上的概率总和
                 col_total = sum(self.beliefs[pos][ptype] for pos in positions)
                 if col_total > 0:
@@ -115,9 +123,13 @@ class BeliefSampler:
             if total > 0:
                 for ptype in self.beliefs[pos]:
                     self.beliefs[pos][ptype] /= total
+        self.version += 1
 
     #更新如果某方棋子从source走到target会有什么样的更新
-    def update(self, source: Tuple[int, int], target: Tuple[int, int]):
+    # 在走子之后调用。敌方走子时只传 source/target；我方攻击时，走子后 source 已经空了，
+    # 需要把走子前取到的 attacker / target_piece 传进来（被吃掉的棋子 alive 为 False）
+    def update(self, source: Tuple[int, int], target: Tuple[int, int],
+               attacker=None, target_piece=None):
         if self.my_side == "Red":
             # 我是红方，敌方是绿方，绿方 HQ 在 (7,16),(9,16)
             enemy_hqs = [(7, 16), (9, 16)]
@@ -127,8 +139,10 @@ class BeliefSampler:
             enemy_hqs = [(7, 0), (9, 0)]
             seen_set = self._hq_flag_seen_red
 
-        attacker = self.board.get_piece(*source)
-        target_piece = self.board.get_piece(*target)
+        if attacker is None:
+            attacker = self.board.get_piece(*source)
+        if target_piece is None:
+            target_piece = self.board.get_piece(*target)
         #先处理双方有摊军棋的可能
         for hq in enemy_hqs:
             p = self.board.get_piece(*hq)
@@ -148,6 +162,24 @@ class BeliefSampler:
         
         #如果是target_piece是走的是非链接铁路段的话 自动判定target_piece为工兵
         if attacker == None:
+            # 敌方棋子走到了 target：它的信念跟着棋子走。只有棋子真的站在 target 上
+            # （普通走子或进攻获胜）才搬过去；进攻失败或同归于尽时这一行直接删掉
+            row = self.beliefs.pop(source, None)
+            mover = self.board.get_piece(*target)
+            if row is None or mover is None or mover.owner == self.my_side or mover.revealed:
+                if row is not None:
+                    if mover is not None and mover.owner != self.my_side:
+                        # 进攻获胜但被翻开：类型已知
+                        self.remaining_counts[mover.name] = max(self.remaining_counts[mover.name] - 1, 0)
+                    else:
+                        # 进攻的敌子死了：按它的信念软扣减 remaining_counts
+                        total = sum(row.values())
+                        for ptype, prob in row.items():
+                            if total > 0:
+                                self.remaining_counts[ptype] = max(self.remaining_counts[ptype] - prob / total, 0.0)
+                self._normalize_and_constrain()
+                return
+            self.beliefs[target] = row
             from routes import LineType, is_connected_by
             x1,y1 = source; x2,y2 = target
             if is_connected_by(x1,y1,x2,y2,LineType.RAIL) \
@@ -252,9 +284,13 @@ class BeliefSampler:
                             self.beliefs[target][ptype] = 0.0
 
                 # —— 更新完这一格的局部 belief 之后，记得更新 remaining_counts 和归一化 —— 
-                if hasattr(self, "remaining_counts"):
-                    # 用事前 belief 软扣减 remaining_counts（示例略）
-                    pass
+                # 对方死去时，用更新后的 belief 软扣减 remaining_counts
+                if hasattr(self, "remaining_counts") and not target_piece.alive:
+                    dist = self.beliefs[target]
+                    total = sum(dist.values())
+                    for ptype, prob in dist.items():
+                        if total > 0:
+                            self.remaining_counts[ptype] = max(self.remaining_counts[ptype] - prob / total, 0.0)
 
                 self._normalize_and_constrain()
                 return
@@ -265,33 +301,21 @@ class BeliefSampler:
         according to current belief distribution, respecting remaining_counts.
         返回 dict: position->piece_type
         """
-        from copy import deepcopy
-        # 1) 拷贝一份剩余可分配数量，用于在采样时实时扣减
-        remaining = deepcopy(self.remaining_counts)
-        sampled = {}
-        positions = list(self.beliefs.keys())
-        random.shuffle(positions) # 随机打乱位置顺序，避免固定偏差
-        # 2) 逐个位置采样
-        for pos in positions:
-            dist = self.beliefs[pos].copy()  # 当前位置的类型概率分布
-           # 2.1) 去除那些已无剩余配额的类型
-            for ptype in list(dist.keys()):
-                if remaining.get(ptype, 0) <= 0:
-                    dist.pop(ptype)
-            total = sum(dist.values())
-            if total <= 0:
-                # 若当前分布全为 0，则在剩余还有配额的类型中均匀采样
-                dist = {ptype: 1 for ptype, cnt in remaining.items() if cnt > 0}
-                total = sum(dist.values())
-            # 2.2) 归一化概率后随机选择
-            probs = {ptype: val/total for ptype, val in dist.items()}
-            choice = random.choices(list(probs.keys()), weights=probs.values())[0]
-            sampled[pos] = choice
-            # 2.3) 扣减该类型的剩余配额（可以是浮点数）
-            remaining[choice] -= 1
-        # 3) 返回这次完整采样的对手隐藏状态
-        return sampled
+        return sample_assignment(self.beliefs, self.remaining_counts)
+
 
+    def _prior_counts(self, pos):
+        """
+        先验中格子 pos 的 {piece_type: 观察次数}；没有先验时为空。
+        """
+        if self.prior is None:
+            return {}
+        if isinstance(self.prior, dict):
+            return self.prior.get(pos, {})
+        cid = CELL_ID.get(pos)
+        if cid is None:
+            return {}
+        return dict(zip(PIECE_TYPES, self.prior[cid]))
 
     def reset(self):
         """
@@ -300,9 +324,10 @@ class BeliefSampler:
         - 重置剩余可分配数量 remaining_counts 为 max_counts
         - 清空首次翻旗记录 _hq_flag_seen_red/_hq_flag_seen_green
         """
-        # 1) 清空 HQ 翻旗记录
+        # 1) 清空 HQ 翻旗记录和旧的信念行
         self._hq_flag_seen_red.clear()
         self._hq_flag_seen_green.clear()
+        self.beliefs.clear()
 
         # 2) 重置 remaining_counts 回到初始 max_counts
         from copy import deepcopy
@@ -310,3 +335,44 @@ class BeliefSampler:
 
         # 3) 重新初始化 beliefs（内部会调用 _normalize_and_constrain）
         self.initialize_beliefs()
+
+
+def sample_assignment(beliefs, remaining_counts, rng=random):
+    """
+    Sample one assignment position->piece_type from a belief table.
+    beliefs: dict position -> {piece_type: probability}
+    remaining_counts: dict piece_type -> number still unassigned
+    rng: random.Random instance (or the random module) used for sampling
+
+    This is the body of BeliefSampler.sample_state as a plain function, so that
+    worker processes can sample from a snapshot of the beliefs without a sampler object.
+    """
+    # 1) 拷贝一份剩余可分配数量，用于在采样时实时扣减
+    remaining = dict(remaining_counts)
+    sampled = {}
+    positions = list(beliefs.keys())
+    rng.shuffle(positions) # 随机打乱位置顺序，避免固定偏差
+    # 2) 逐个位置采样
+    for pos in positions:
+        dist = dict(beliefs[pos])  # 当前位置的类型概率分布
+       # 2.1) 去除那些已无剩余配额的类型
+        for ptype in list(dist.keys()):
+            if remaining.get(ptype, 0) <= 0:
+                dist.pop(ptype)
+        total = sum(dist.values())
+        if total <= 0:
+            # 若当前分布全为 0，则在剩余还有配额的类型中均匀采样
+            dist = {ptype: 1 for ptype, cnt in remaining.items() if cnt > 0}
+            total = sum(dist.values())
+            if total <= 0:
+                # 配额全部用完（信念与棋盘不一致），退回到所有类型均匀采样
+                dist = {ptype: 1 for ptype in beliefs[pos]}
+                total = sum(dist.values())
+        # 2.2) 归一化概率后随机选择
+        probs = {ptype: val/total for ptype, val in dist.items()}
+        choice = rng.choices(list(probs.keys()), weights=probs.values())[0]
+        sampled[pos] = choice
+        # 2.3) 扣减该类型的剩余配额（可以是浮点数）
+        remaining[choice] = remaining.get(choice, 0) - 1
+    # 3) 返回这次完整采样的对手隐藏状态
+    return sampled
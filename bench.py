@@ -0,0 +1,341 @@
+# bench.py - Reproducible Micro- and Macro-Benchmarks for Four Kingdoms Military Chess
+
+# This module times the hot paths of the rules and AI code on fixed inputs, so every change to
+# them can be measured against a saved baseline:
+#   is_connected_by, can_move, clear_path, clear_straight_rail_path   (routes / chessboard)
+#   legal_moves                                                      (movegen)
+#   update_all_movable, check_elimination                            (game_state)
+#   normalize_and_constrain, sample_state                            (belief_sampler)
+#   random_games                                                     (selfplay.play_game)
+
+# Inputs are reproducible: standard positions come from Game.generate_random_setup under a
+# fixed seed, half of them advanced by a fixed number of random plies (mid-game positions with
+# open railways), and every query list is drawn from a seeded random.Random. Each benchmark
+# runs `repeat` times with the garbage collector paused and keeps the fastest run.
+# Every benchmark also records a checksum of its answers (e.g. how many can_move queries were
+# True). An optimization must leave the checksums unchanged; a different checksum means the
+# optimized code computes something else.
+
+# Results are written as JSON; --baseline compares against an earlier file and exits with
+# status 1 if any benchmark got slower than the tolerance allows or its checksum changed.
+
+# Usage:
+#     python bench.py --output baseline.json
+#     python bench.py --baseline baseline.json --output after.json
+
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from belief_sampler import BeliefSampler
+from board_encoding import CELLS, PIECE_TYPES, decode_board, encode_board
+from constants import MAX_COUNTS
+from movegen import RAIL_NEIGHBORS, legal_moves, piece_moves
+from routes import LineType, is_connected_by
+from selfplay import FOUR_PLAYER_ORDER, MODES
+
+ALLIANCE_MAP = MODES["4p"][1]
+SIDES = FOUR_PLAYER_ORDER
+MIDGAME_PLIES = 60
+
+# name -> benchmark function(positions, rng) returning (operations, checksum, seconds);
+# only the timed part of the function counts, building its inputs does not
+BENCHMARKS = {}
+
+
+def benchmark(name: str):
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+# `count` encoded four-player positions: openings from Game.generate_random_setup, every
+# second one advanced by MIDGAME_PLIES random moves.
+def standard_positions(count: int = 8, seed: int = 0) -> list[bytes]:
+    from game import Game
+
+    rng = random.Random(seed)
+    positions = []
+    for i in range(count):
+        random.seed(rng.getrandbits(32))
+        game = Game()
+        game.generate_random_setup()
+        board = game.board
+        board.set_alliance_map(ALLIANCE_MAP)
+        if i % 2:
+            for ply in range(MIDGAME_PLIES):
+                moves = legal_moves(board, SIDES[ply % len(SIDES)])
+                if moves:
+                    board.apply_move(*rng.choice(moves))
+        positions.append(encode_board(board))
+    return positions
+
+
+def _boards(positions):
+    return [decode_board(code, ALLIANCE_MAP) for code in positions]
+
+
+def _rail_cells():
+    return [cell for cell, links in RAIL_NEIGHBORS.items() if links]
+
+
+@benchmark("is_connected_by")
+def bench_is_connected_by(positions, rng):
+    queries = []
+    for _ in range(100000):
+        x, y = rng.choice(CELLS)
+        dx, dy = rng.choice(((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (2, 0)))
+        queries.append((x, y, x + dx, y + dy, rng.choice((LineType.ROAD, LineType.RAIL))))
+    start = time.perf_counter()
+    hits = sum(1 for q in queries if is_connected_by(*q))
+    return len(queries), hits, time.perf_counter() - start
+
+
+@benchmark("can_move")
+def bench_can_move(positions, rng):
+    boards = _boards(positions)
+    queries = []
+    for board in boards:
+        pieces = [(x, y) for x, y in CELLS if board.grid[y][x] is not None]
+        for _ in range(6000):
+            queries.append((board, *rng.choice(pieces), *rng.choice(CELLS)))
+    start = time.perf_counter()
+    hits = sum(1 for board, x1, y1, x2, y2 in queries if board.can_move(x1, y1, x2, y2))
+    return len(queries), hits, time.perf_counter() - start
+
+
+@benchmark("clear_path")
+def bench_clear_path(positions, rng):
+    boards = _boards(positions)
+    rail = _rail_cells()
+    queries = [(board, *rng.choice(rail), *rng.choice(rail))
+               for board in boards for _ in range(1500)]
+    start = time.perf_counter()
+    hits = sum(1 for board, x1, y1, x2, y2 in queries
+               if board.clear_path(x1, y1, x2, y2, LineType.RAIL))
+    return len(queries), hits, time.perf_counter() - start
+
+
+@benchmark("clear_straight_rail_path")
+def bench_clear_straight_rail_path(positions, rng):
+    boards = _boards(positions)
+    rail = _rail_cells()
+    lines = {a: [b for b in rail if (a[0] == b[0]) != (a[1] == b[1])] for a in rail}
+    queries = []
+    for board in boards:
+        for _ in range(8000):
+            x1, y1 = rng.choice(rail)
+            # mostly cells on the same line, where the path actually has to be walked
+            x2, y2 = rng.choice(lines[x1, y1]) if rng.random() < 0.8 else rng.choice(rail)
+            queries.append((board, x1, y1, x2, y2))
+    start = time.perf_counter()
+    hits = sum(1 for board, x1, y1, x2, y2 in queries
+               if board.clear_straight_rail_path(x1, y1, x2, y2))
+    return len(queries), hits, time.perf_counter() - start
+
+
+@benchmark("legal_moves")
+def bench_legal_moves(positions, rng):
+    boards = _boards(positions)
+    start = time.perf_counter()
+    total = 0
+    for _ in range(50):
+        for board in boards:
+            for side in SIDES:
+                total += len(legal_moves(board, side))
+    return 50 * len(boards) * len(SIDES), total, time.perf_counter() - start
+
+
+@benchmark("piece_moves")
+def bench_piece_moves(positions, rng):
+    boards = _boards(positions)
+    cells = [(board, x, y) for board in boards for x, y in CELLS if board.grid[y][x] is not None]
+    start = time.perf_counter()
+    total = sum(len(piece_moves(board, x, y)) for _ in range(50) for board, x, y in cells)
+    return 50 * len(cells), total, time.perf_counter() - start
+
+
+@benchmark("update_all_movable")
+def bench_update_all_movable(positions, rng):
+    from game_state import GameState
+
+    state = GameState()
+    boards = _boards(positions)
+    start = time.perf_counter()
+    for _ in range(100):
+        for board in boards:
+            state.update_all_movable(board)
+    elapsed = time.perf_counter() - start
+    movable = sum(1 for board in boards for x, y in CELLS
+                  if board.grid[y][x] is not None and board.grid[y][x].movable)
+    return 100 * len(boards), movable, elapsed
+
+
+@benchmark("check_elimination")
+def bench_check_elimination(positions, rng):
+    from game import Game
+    from game_state import GameState
+
+    games = []
+    for board in _boards(positions):
+        game = Game()
+        game.board = board
+        games.append(game)
+    state = GameState()
+    start = time.perf_counter()
+    for _ in range(50):
+        for game in games:
+            state.check_elimination(game)
+    elapsed = time.perf_counter() - start
+    pieces = sum(1 for game in games for x, y in CELLS if game.board.grid[y][x] is not None)
+    return 50 * len(games), pieces, elapsed
+
+
+def _samplers(positions):
+    samplers = []
+    for board in _boards(positions):
+        for y, row in enumerate(board.grid):
+            for piece in row:
+                if piece is not None and piece.owner != "Red":
+                    piece.revealed = False
+        samplers.append(BeliefSampler(board, None, list(PIECE_TYPES), MAX_COUNTS, "Red"))
+    return samplers
+
+
+@benchmark("normalize_and_constrain")
+def bench_normalize_and_constrain(positions, rng):
+    samplers = _samplers(positions)
+    start = time.perf_counter()
+    for _ in range(10):
+        for sampler in samplers:
+            sampler._normalize_and_constrain()
+    elapsed = time.perf_counter() - start
+    checksum = round(sum(d["Flag"] for s in samplers for d in s.beliefs.values()), 6)
+    return 10 * len(samplers), checksum, elapsed
+
+
+@benchmark("sample_state")
+def bench_sample_state(positions, rng):
+    samplers = _samplers(positions)
+    draws = 100
+    random.seed(rng.getrandbits(32))    # sample_state draws from the global generator
+    start = time.perf_counter()
+    flags = 0
+    for sampler in samplers:
+        for _ in range(draws):
+            sample = sampler.sample_state()
+            flags += sum(1 for t in sample.values() if t == "Flag")
+    return draws * len(samplers), flags, time.perf_counter() - start
+
+
+@benchmark("random_games")
+def bench_random_games(positions, rng):
+    from agents import RandomAgent
+    from selfplay import play_game
+
+    agents = {1: RandomAgent(rng.getrandbits(32)), 2: RandomAgent(rng.getrandbits(32))}
+    openings = positions[::2]
+    start = time.perf_counter()
+    # random agents ignore what they see, so skip building observations for face-down openings
+    plies = sum(play_game(code, "4p", agents, max_plies=1000, observe=False)["plies"]
+                for code in openings)
+    return len(openings), plies, time.perf_counter() - start
+
+
+# Run the selected benchmarks (all if `names` is None) and return the results document.
+def run_benchmarks(names=None, positions: int = 8, seed: int = 0, repeat: int = 5) -> dict:
+    codes = standard_positions(positions, seed)
+    results = {}
+    for name in names or BENCHMARKS:
+        func = BENCHMARKS[name]
+        best = None
+        for _ in range(repeat):
+            # the same queries on every run: a fresh generator with a per-benchmark seed;
+            # no garbage collection pauses inside the timed part
+            gc.collect()
+            gc.disable()
+            try:
+                ops, checksum, seconds = func(codes, random.Random(f"{seed}/{name}"))
+            finally:
+                gc.enable()
+            if best is None or seconds < best[2]:
+                best = (ops, checksum, seconds)
+        ops, checksum, seconds = best
+        results[name] = {"ops": ops, "seconds": seconds,
+                         "ops_per_sec": ops / seconds if seconds else 0.0,
+                         "checksum": checksum}
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "positions": positions,
+            "seed": seed,
+            "repeat": repeat,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+# Compare `current` with `baseline` (both run_benchmarks documents). Returns one row per
+# benchmark present in both: (name, baseline ops/s, current ops/s, speedup, status), where
+# status is "ok", "slower" (speedup below 1 - tolerance) or "changed" (checksum differs).
+def compare(current: dict, baseline: dict, tolerance: float = 0.10) -> list[tuple]:
+    rows = []
+    for name, now in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        speedup = now["ops_per_sec"] / before["ops_per_sec"] if before["ops_per_sec"] else 0.0
+        if now["checksum"] != before["checksum"]:
+            status = "changed"
+        elif speedup < 1.0 - tolerance:
+            status = "slower"
+        else:
+            status = "ok"
+        rows.append((name, before["ops_per_sec"], now["ops_per_sec"], speedup, status))
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rules / AI benchmark suite")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--positions", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed slowdown against the baseline (fraction)")
+    args = parser.parse_args()
+
+    unknown = [n for n in args.names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    doc = run_benchmarks(args.names or None, args.positions, args.seed, args.repeat)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(doc, baseline, args.tolerance)
+        print(f"{'benchmark':>24} {'baseline/s':>12} {'now/s':>12} {'speedup':>8}  status")
+        for name, before, now, speedup, status in rows:
+            print(f"{name:>24} {before:>12.1f} {now:>12.1f} {speedup:>7.2f}x  {status}")
+        sys.exit(1 if any(status != "ok" for *_, status in rows) else 0)
+
+    print(f"{'benchmark':>24} {'ops':>8} {'seconds':>9} {'ops/s':>12}  checksum")
+    for name, r in doc["results"].items():
+        print(f"{name:>24} {r['ops']:>8} {r['seconds']:>9.4f} {r['ops_per_sec']:>12.1f}  {r['checksum']}")
@@ -0,0 +1,86 @@
+# board_encoding.py - Compact Board Encoding for Four Kingdoms Military Chess
+
+# This module packs a ChessBoard into a flat byte string with one byte per playable cell.
+# The encoding is cheap to copy, hash and send to worker processes, so search code can
+# pass positions around without pickling the Piece object graph.
+
+# Cell ids are dense: only the playable cells (see routes.is_displayable) are numbered,
+# in row-major order. Each byte is 0 for an empty cell, otherwise:
+#   bits 0-3  piece type code (1..12, index into PIECE_TYPES plus one)
+#   bits 4-5  owner index (index into OWNERS)
+#   bit  6    revealed flag
+
+from chessboard import ChessBoard
+from piece import Piece
+from routes import is_displayable
+from constants import BOARD_SIZE, PIECE_RANKS
+
+# Owner order matches the turn order in game_state.COLORS
+OWNERS = ("Red", "Yellow", "Green", "Blue")
+OWNER_CODE = {owner: i for i, owner in enumerate(OWNERS)}
+
+# Piece types ordered from weakest to strongest mobile piece, immobile pieces first
+PIECE_TYPES = (
+    "Flag", "Mine", "Bomb", "Engineer", "PlatoonLeader", "CompanyLeader",
+    "BattalionLeader", "RegimentLeader", "Brigadier", "DivisionCommander",
+    "CorpsCommander", "General",
+)
+TYPE_CODE = {name: i + 1 for i, name in enumerate(PIECE_TYPES)}
+
+TYPE_MASK = 0x0F
+OWNER_SHIFT = 4
+REVEALED_BIT = 0x40
+EMPTY = 0
+
+# Dense cell numbering: CELLS[cell_id] = (x, y), CELL_ID[(x, y)] = cell_id
+CELLS = tuple(
+    (x, y)
+    for y in range(BOARD_SIZE)
+    for x in range(BOARD_SIZE)
+    if is_displayable(y, x)
+)
+CELL_ID = {cell: i for i, cell in enumerate(CELLS)}
+NUM_CELLS = len(CELLS)
+
+
+# Return the byte code of a single piece (0 for None).
+def piece_code(piece: Piece | None) -> int:
+    if piece is None:
+        return EMPTY
+    code = TYPE_CODE[piece.name] | (OWNER_CODE[piece.owner] << OWNER_SHIFT)
+    if piece.revealed:
+        code |= REVEALED_BIT
+    return code
+
+
+# Split a byte code into (owner, piece type, revealed).
+def decode_piece_code(code: int) -> tuple[str, str, bool]:
+    return (
+        OWNERS[(code >> OWNER_SHIFT) & 0x03],
+        PIECE_TYPES[(code & TYPE_MASK) - 1],
+        bool(code & REVEALED_BIT),
+    )
+
+
+# Encode the pieces on the board as bytes of length NUM_CELLS.
+def encode_board(board: ChessBoard) -> bytes:
+    grid = board.grid
+    return bytes(piece_code(grid[y][x]) for x, y in CELLS)
+
+
+# Build a ChessBoard from an encoding produced by encode_board.
+# If alliance_map is given it replaces the board's default alliance map.
+def decode_board(data: bytes, alliance_map: dict[str, int] | None = None) -> ChessBoard:
+    board = ChessBoard()
+    if alliance_map is not None:
+        board.set_alliance_map(dict(alliance_map))
+    grid = board.grid
+    for cell_id, code in enumerate(data):
+        if code == EMPTY:
+            continue
+        owner, name, revealed = decode_piece_code(code)
+        piece = Piece(name, PIECE_RANKS[name], owner)
+        piece.revealed = revealed
+        x, y = CELLS[cell_id]
+        grid[y][x] = piece
+    return board
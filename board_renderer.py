@@ -0,0 +1,204 @@
+# board_renderer.py - Cached Board and Piece Rendering for Four Kingdoms Military Chess
+
+# This module draws the board for the pygame GUI (military_chess_gui.py) and for offscreen
+# rendering, doing as little work per frame as possible:
+# - The static board (grid, obstacles, camps, HQs) is drawn once onto a background surface.
+# - Every piece glyph (owner, type or hidden) is rendered once and reused.
+# - Fonts are created once per size. Piece labels are Chinese when a CJK font is found and
+#   Latin abbreviations otherwise (pygame's built-in font has no CJK glyphs).
+# - draw_pieces() redraws only the cells whose content changed since the last call and
+#   returns their rectangles, so the caller can update just those parts of the display.
+# Cells are addressed as (row, col) like the GUI; pieces come from ChessBoard.get_piece(col, row).
+
+import os
+import warnings
+from functools import lru_cache
+
+import pygame
+
+from constants import camp_positions, hq_positions
+
+PADDING_CELLS = 2
+GRID_SIZE = 40
+BOARD_ROWS = 17
+BOARD_COLS = 17
+WIDTH = GRID_SIZE * (BOARD_COLS + 2 * PADDING_CELLS)
+HEIGHT = GRID_SIZE * (BOARD_ROWS + 2 * PADDING_CELLS)
+FONT_PATH = "/System/Library/Fonts/STHeiti Medium.ttc"
+# System fonts with CJK glyphs, tried in order when FONT_PATH is missing (pygame.font.match_font)
+CJK_FONT_NAMES = [
+    "notosanscjksc", "notosanscjk", "notosanscjkscregular", "sourcehansanssc", "sourcehansans",
+    "wenquanyizenhei", "wenquanyimicrohei", "simhei", "microsoftyahei", "pingfangsc",
+    "heitisc", "stheiti", "arialunicodems", "droidsansfallback",
+]
+
+WHITE = (255, 255, 255)
+GRAY = (220, 220, 220)
+BLUE = (50, 50, 255)
+BLACK = (0, 0, 0)
+CAMP_COLOR = (180, 180, 180)
+HQ_COLOR = (100, 100, 100)
+
+OWNER_TO_COLOR = {
+    "Red": (255, 0, 0),
+    "Green": (0, 200, 0),
+    "Blue": (0, 100, 255),
+    "Yellow": (200, 200, 0),
+}
+
+DISPLAY_NAMES = {
+    "General": "司", "CorpsCommander": "军", "DivisionCommander": "师",
+    "Brigadier": "旅", "RegimentLeader": "团", "BattalionLeader": "营",
+    "CompanyLeader": "连", "PlatoonLeader": "排", "Engineer": "兵",
+    "Bomb": "炸", "Mine": "雷", "Flag": "旗",
+}
+# Labels used when no CJK font is installed
+LATIN_NAMES = {
+    "General": "GEN", "CorpsCommander": "COR", "DivisionCommander": "DIV",
+    "Brigadier": "BRI", "RegimentLeader": "REG", "BattalionLeader": "BAT",
+    "CompanyLeader": "COY", "PlatoonLeader": "PLT", "Engineer": "ENG",
+    "Bomb": "BOM", "Mine": "MIN", "Flag": "FLG",
+}
+
+# Black cells that are not part of the board: the four corners and the center blocks
+OBSTACLE_CELLS = frozenset(
+    [(r, c) for r in range(BOARD_ROWS) for c in range(BOARD_COLS)
+     if (r < 6 or r >= 11) and (c < 6 or c >= 11)]
+    + [(6, 7), (6, 9), (7, 6), (7, 7), (7, 8), (7, 9), (7, 10),
+       (8, 7), (8, 9), (9, 6), (9, 7), (9, 8), (9, 9), (9, 10), (10, 7), (10, 9)]
+)
+CAMP_CELLS = frozenset((y, x) for x, y in camp_positions)    # camp_positions is (x, y)
+HQ_CELLS = frozenset(hq_positions)                             # hq_positions is (row, col)
+
+
+# Path of a font file with CJK glyphs: FONT_PATH, else the first installed CJK_FONT_NAMES
+# font, else None.
+@lru_cache(maxsize=None)
+def cjk_font_path() -> str | None:
+    if os.path.exists(FONT_PATH):
+        return FONT_PATH
+    if not pygame.font.get_init():
+        pygame.font.init()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")   # sysfont warns when fc-list is missing
+        return pygame.font.match_font(CJK_FONT_NAMES)
+
+
+# The GUI font at `size`, loaded once. Falls back to pygame's default font (no CJK glyphs)
+# where no CJK font is installed.
+@lru_cache(maxsize=None)
+def load_font(size: int = 18) -> pygame.font.Font:
+    if not pygame.font.get_init():
+        pygame.font.init()
+    path = cjk_font_path()
+    if path is not None:
+        try:
+            return pygame.font.Font(path, size)
+        except (FileNotFoundError, OSError):
+            pass
+    return pygame.font.Font(None, size + 4)
+
+
+# Piece labels for the fonts load_font returns: DISPLAY_NAMES or LATIN_NAMES.
+def piece_labels() -> dict:
+    return DISPLAY_NAMES if cjk_font_path() is not None else LATIN_NAMES
+
+
+class BoardRenderer:
+    def __init__(self, grid_size: int = GRID_SIZE, padding: int = PADDING_CELLS, font_size: int = 18):
+        self.grid_size = grid_size
+        self.padding = padding
+        self.size = (grid_size * (BOARD_COLS + 2 * padding), grid_size * (BOARD_ROWS + 2 * padding))
+        self.font = load_font(font_size)
+        self.labels = piece_labels()
+        self.background = self._draw_background()
+        self.glyphs = {}
+        self.shown = {}    # (row, col) -> key of what draw_pieces last drew there
+
+    def cell_rect(self, row: int, col: int) -> pygame.Rect:
+        g = self.grid_size
+        return pygame.Rect((col + self.padding) * g, (row + self.padding) * g, g, g)
+
+    def _draw_background(self) -> pygame.Surface:
+        surface = pygame.Surface(self.size)
+        surface.fill(BLACK)
+        for row in range(BOARD_ROWS):
+            for col in range(BOARD_COLS):
+                if (row, col) in OBSTACLE_CELLS:
+                    continue
+                rect = self.cell_rect(row, col)
+                pygame.draw.rect(surface, WHITE, rect)
+                pygame.draw.rect(surface, GRAY, rect, 1)
+                if (row, col) in CAMP_CELLS:
+                    pygame.draw.rect(surface, CAMP_COLOR, rect)
+                elif (row, col) in HQ_CELLS:
+                    pygame.draw.rect(surface, HQ_COLOR, rect)
+        return surface
+
+    # The glyph of a piece of `owner`; `name` None draws it face down (no label).
+    def glyph(self, owner: str, name: str | None) -> pygame.Surface:
+        key = (owner, name)
+        surf = self.glyphs.get(key)
+        if surf is None:
+            g = self.grid_size
+            surf = pygame.Surface((g, g), pygame.SRCALPHA)
+            center = (g // 2, g // 2)
+            radius = g // 2 - max(1, g * 3 // 20)
+            pygame.draw.circle(surf, OWNER_TO_COLOR[owner], center, radius)
+            pygame.draw.circle(surf, BLACK, center, radius, max(1, g // 20))
+            if name is not None:
+                label = self.font.render(self.labels.get(name, name[:2]), True, BLACK)
+                # shrink labels that do not fit into the piece (three-letter Latin names)
+                width = radius * 3 // 2
+                if label.get_width() > width:
+                    height = max(1, label.get_height() * width // label.get_width())
+                    label = pygame.transform.smoothscale(label, (width, height))
+                surf.blit(label, label.get_rect(center=center))
+            self.glyphs[key] = surf
+        return surf
+
+    # Forget what is on screen, so the next draw_pieces redraws every cell.
+    def invalidate(self) -> None:
+        self.shown = {}
+
+    # Draw the cell (row, col) with `key` = (owner, name or None, selected) or None if empty.
+    def draw_cell(self, surface: pygame.Surface, row: int, col: int, key) -> pygame.Rect:
+        rect = self.cell_rect(row, col)
+        surface.blit(self.background, rect, rect)
+        if key is not None:
+            owner, name, selected = key
+            if owner is not None:
+                surface.blit(self.glyph(owner, name), rect)
+            if selected:
+                pygame.draw.rect(surface, BLUE, rect, max(1, self.grid_size * 3 // 40))
+        return rect
+
+    # Bring the pieces on `surface` up to date with `board` and return the changed rects.
+    # show_label(piece) decides whether a piece is drawn face up; `selected` is the
+    # highlighted (row, col) or None.
+    def draw_pieces(self, surface: pygame.Surface, board, show_label=lambda piece: True,
+                    selected=None) -> list[pygame.Rect]:
+        dirty = []
+        grid = board.grid
+        shown = self.shown
+        for row in range(BOARD_ROWS):
+            for col in range(BOARD_COLS):
+                if (row, col) in OBSTACLE_CELLS:
+                    continue
+                piece = grid[row][col]
+                is_selected = selected == (row, col)
+                if piece is not None and piece.alive:
+                    key = (piece.owner, piece.name if show_label(piece) else None, is_selected)
+                else:
+                    key = (None, None, True) if is_selected else None
+                if shown.get((row, col), 0) != key:
+                    shown[(row, col)] = key
+                    dirty.append(self.draw_cell(surface, row, col, key))
+        return dirty
+
+    # Draw the whole board (background plus pieces) onto `surface`.
+    def draw_board(self, surface: pygame.Surface, board, show_label=lambda piece: True,
+                   selected=None) -> None:
+        surface.blit(self.background, (0, 0))
+        self.invalidate()
+        self.draw_pieces(surface, board, show_label, selected)
@@ -13,11 +13,20 @@
 #   - Non-engineer pieces can only move in straight lines or arcs on railways (no right-angle turns)
 # - Provide utility functions for validating legal moves during gameplay
 
+from enum import IntEnum
 from typing import List, Tuple
 from piece import Piece
 from routes import is_connected_by, get_connections, LineType
 from constants import BOARD_SIZE, camp_positions, hq_positions, ALLIANCE, MAX_COUNTS, special_paths, center_blocks
 
+# Result of executing a move, from the point of view of the moving piece.
+# The values fit in a nibble so that game records can store them compactly.
+class Outcome(IntEnum):
+    MOVE = 0    # Moved to an empty cell
+    WIN = 1     # Attacker captured the target
+    TRADE = 2   # Both pieces were removed
+    LOSE = 3    # Attacker was removed, target stays
+
 class ChessBoard:
     #_init_ defines an empty 17*17 board
     def __init__(self):
@@ -31,6 +40,13 @@ class ChessBoard:
         self.cols = len(self.grid[0])
         from constants import ALLIANCE as DEFAULT_ALLIANCE
         self.alliance_map = DEFAULT_ALLIANCE.copy()
+        # Undo log of move_piece: [make_move record, pieces removed afterwards as (x, y, piece)]
+        self.history = []
+        # Change counter for cached views (observe); bumped by every method that edits the
+        # grid. Code that edits grid or piece.revealed directly must call touch().
+        self.version = 0
+        self._observed = {}
+        self._observed_version = -1
     
     def set_alliance_map(self, new_map: dict[str,int]):
         self.alliance_map = new_map
@@ -55,6 +71,7 @@ class ChessBoard:
     def place_piece(self, x: int, y: int, piece: Piece) -> bool:
         if self.grid[y][x] is None:
             self.grid[y][x] = piece
+            self.version += 1
             return True
         return False
 
@@ -162,35 +179,90 @@ class ChessBoard:
                 print("Cannot attack allied piece.")
                 return False
 
-        # Execute the move or combat
+        # Execute the move or combat; the result is kept for game records and undo
+        record = self.make_move(x1, y1, x2, y2)
+        self.last_outcome = record[6]
+        self.history.append([record, []])
+        return True
+
+    # Remove the piece at (x, y) outside of a move (e.g. when its side is eliminated).
+    # The removal is logged with the last move so that undo_move puts it back.
+    def remove_piece(self, x: int, y: int) -> Piece | None:
+        piece = self.grid[y][x]
+        self.grid[y][x] = None
+        self.version += 1
+        if piece is not None and self.history:
+            self.history[-1][1].append((x, y, piece))
+        return piece
+
+    # Take back the last move made with move_piece, restoring captured pieces and any
+    # pieces removed after it. Returns the undone make_move record, or None if there is none.
+    def undo_move(self):
+        if not self.history:
+            return None
+        record, removed = self.history.pop()
+        for x, y, piece in reversed(removed):
+            self.grid[y][x] = piece
+        self.unmake_move(record)
+        return record
+
+    # Execute a move from (x1, y1) to (x2, y2) that has already been validated.
+    # Resolves combat exactly like move_piece and returns the Outcome of the move.
+    # Search code calls this directly so that generated moves are not re-checked.
+    def apply_move(self, x1: int, y1: int, x2: int, y2: int) -> 'Outcome':
+        piece = self.grid[y1][x1]
+        target = self.grid[y2][x2]
+        self.version += 1
+
         if target is None:
              # Simple move to an empty cell
             self.grid[y2][x2] = piece
             self.grid[y1][x1] = None
+            return Outcome.MOVE
+
+         # Bombs cause mutual destruction
+        if piece.name == "Bomb" or target.name == "Bomb":
+            piece.kill()
+            target.kill()
+            self.grid[y2][x2] = None
+            self.grid[y1][x1] = None
+            return Outcome.TRADE
+
+        # Normal combat resolution
+        outcome = Outcome.WIN
+        if piece.can_defeat(target):
+            target.kill()
+            self.grid[y2][x2] = piece
         else:
-             # Bombs cause mutual destruction
-            if piece.name == "Bomb" or target.name == "Bomb":
-                piece.kill()
+            piece.kill()
+            outcome = Outcome.LOSE
+            # Mutual destruction if equal rank, or specific special cases (e.g. landmine/engineer)
+            if piece.rank == target.rank or piece.rank == 1 or target.rank == 1:
                 target.kill()
                 self.grid[y2][x2] = None
-                self.grid[y1][x1] = None
-                return True
+                outcome = Outcome.TRADE
 
-            # Normal combat resolution
-            if piece.can_defeat(target):
-                target.kill()
-                self.grid[y2][x2] = piece
-            else:
-                piece.kill()
-                # Mutual destruction if equal rank, or specific special cases (e.g. landmine/engineer)
-                if piece.rank == target.rank or piece.rank == 1 or target.rank == 1:
-                    target.kill()
-                    self.grid[y2][x2] = None
-
-             # Clear the source cell in all combat cases
-            self.grid[y1][x1] = None
+         # Clear the source cell in all combat cases
+        self.grid[y1][x1] = None
+        return outcome
 
-        return True
+    # Execute a validated move like apply_move and return an undo record for unmake_move.
+    # The record is (x1, y1, x2, y2, moving piece, target piece or None, Outcome).
+    def make_move(self, x1: int, y1: int, x2: int, y2: int) -> tuple:
+        piece = self.grid[y1][x1]
+        target = self.grid[y2][x2]
+        outcome = self.apply_move(x1, y1, x2, y2)
+        return (x1, y1, x2, y2, piece, target, outcome)
+
+    # Take back a move made with make_move. Moves must be undone in reverse order.
+    def unmake_move(self, record: tuple) -> None:
+        x1, y1, x2, y2, piece, target, _ = record
+        self.version += 1
+        self.grid[y1][x1] = piece
+        self.grid[y2][x2] = target
+        piece.alive = True
+        if target is not None:
+            target.alive = True
 
     # Safely get the piece at (x, y). Returns None if the cell is invalid or empty.
     def get_piece(self, x: int, y: int) -> Piece | None:
@@ -312,10 +384,28 @@ class ChessBoard:
         limit = MAX_COUNTS.get(piece_type, 0)
         return count < limit
     
+    # Positions of the pieces whose type `my_side` cannot see: other sides' unrevealed pieces.
     def get_all_hidden_positions(self, my_side) -> List[Tuple[int, int]]:
         hidden: List[Tuple[int, int]] = []
         for y, row in enumerate(self.grid):
             for x, piece in enumerate(row):
-                if piece is not None and piece.owner != my_side:
+                if piece is not None and piece.owner != my_side and not piece.revealed:
                     hidden.append((x, y))
-        return hidden
\ No newline at end of file
+        return hidden
+
+    # Mark the board as changed after editing grid cells or piece.revealed directly.
+    def touch(self) -> None:
+        self.version += 1
+
+    # Fog-of-war view of the board for `side` (an immutable observation.Observation):
+    # own pieces in full, revealed pieces of other sides, unknown markers for the rest.
+    # The view is cached per side until the board changes.
+    def observe(self, side: str):
+        if self._observed_version != self.version:
+            self._observed = {}
+            self._observed_version = self.version
+        view = self._observed.get(side)
+        if view is None:
+            from observation import observe_board
+            view = self._observed[side] = observe_board(self, side)
+        return view
\ No newline at end of file
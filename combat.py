@@ -0,0 +1,161 @@
+# combat.py - Expected Combat Outcomes for Four Kingdoms Military Chess
+
+# This module tells an AI what an attack is likely to bring when the defender's type is not
+# known: for every legal attack of a side it returns P(win), P(trade), P(lose), P(Flag
+# captured) and the expected material change, in one call.
+
+# The combat rules are tabulated once: OUTCOME[a][d] is the Outcome of a piece of type
+# PIECE_TYPES[a] attacking one of type PIECE_TYPES[d], found by playing that fight with
+# ChessBoard.apply_move, so the table always follows the board's rules. Each attacker type
+# then has one row per result (win / trade / lose / Flag capture / material delta) over the
+# defender types, and an attack's odds are those rows multiplied with the defender's type
+# distribution:
+# - a revealed defender (or any defender when no sampler is given) is its own type
+# - a hidden defender takes its BeliefSampler row (beliefs[target]), normalized; cells the
+#   sampler has no belief for fall back to the sampler's remaining piece counts
+# Material values are rollout.PIECE_VALUES.
+
+from board_encoding import PIECE_TYPES
+from chessboard import ChessBoard, Outcome
+from constants import PIECE_RANKS
+from movegen import legal_moves
+from piece import Piece
+from rollout import PIECE_VALUES
+
+TYPE_INDEX = {name: i for i, name in enumerate(PIECE_TYPES)}
+
+
+# Outcome of a piece of type `attacker` attacking one of type `defender`.
+def _fight(attacker: str, defender: str) -> Outcome:
+    board = ChessBoard()
+    board.place_piece(6, 6, Piece(attacker, PIECE_RANKS[attacker], "Red"))
+    board.place_piece(6, 7, Piece(defender, PIECE_RANKS[defender], "Green"))
+    return board.apply_move(6, 6, 6, 7)
+
+
+OUTCOME = tuple(tuple(_fight(a, d) for d in PIECE_TYPES) for a in PIECE_TYPES)
+
+
+def _rows(value):
+    return tuple(tuple(value(a, d, OUTCOME[i][j]) for j, d in enumerate(PIECE_TYPES))
+                 for i, a in enumerate(PIECE_TYPES))
+
+
+WIN_ROW = _rows(lambda a, d, o: float(o == Outcome.WIN))
+TRADE_ROW = _rows(lambda a, d, o: float(o == Outcome.TRADE))
+LOSE_ROW = _rows(lambda a, d, o: float(o == Outcome.LOSE))
+FLAG_ROW = _rows(lambda a, d, o: float(d == "Flag" and o == Outcome.WIN))
+# Material change for the attacker's side: captured value minus lost value
+DELTA_ROW = _rows(lambda a, d, o: (PIECE_VALUES[d] if o != Outcome.LOSE else 0.0)
+                                  - (PIECE_VALUES[a] if o != Outcome.WIN else 0.0))
+
+
+class AttackOdds:
+    __slots__ = ("move", "p_win", "p_trade", "p_lose", "p_flag", "delta")
+
+    def __init__(self, move, p_win, p_trade, p_lose, p_flag, delta):
+        self.move = move
+        self.p_win = p_win
+        self.p_trade = p_trade
+        self.p_lose = p_lose
+        self.p_flag = p_flag
+        self.delta = delta      # expected material change for the attacker
+
+    def __repr__(self):
+        return (f"AttackOdds({self.move}, win={self.p_win:.2f}, trade={self.p_trade:.2f}, "
+                f"lose={self.p_lose:.2f}, flag={self.p_flag:.2f}, delta={self.delta:+.2f})")
+
+
+# Type distribution of `target` at `pos` as seen by the attacker: a list over PIECE_TYPES.
+def type_distribution(target, pos, sampler=None) -> list[float]:
+    if sampler is None or target.revealed:
+        dist = [0.0] * len(PIECE_TYPES)
+        dist[TYPE_INDEX[target.name]] = 1.0
+        return dist
+    row = sampler.beliefs.get(pos)
+    if row:
+        dist = [max(0.0, row.get(t, 0.0)) for t in PIECE_TYPES]
+        total = sum(dist)
+        if total > 0:
+            return [p / total for p in dist]
+    dist = [max(0, sampler.remaining_counts.get(t, 0)) for t in PIECE_TYPES]
+    total = sum(dist) or 1
+    return [p / total for p in dist]
+
+
+# Odds of every legal attack of `side` (or of the attacks among `moves`), in move order.
+# Hidden defenders are judged by `sampler`'s beliefs; without a sampler the board is read as
+# full information.
+def attack_odds(board, side: str, sampler=None, moves=None) -> list[AttackOdds]:
+    grid = board.grid
+    if moves is None:
+        moves = legal_moves(board, side)
+    result = []
+    for move in moves:
+        x1, y1, x2, y2 = move
+        target = grid[y2][x2]
+        if target is None:
+            continue
+        a = TYPE_INDEX[grid[y1][x1].name]
+        dist = type_distribution(target, (x2, y2), sampler)
+        odds = [sum(p * r for p, r in zip(dist, rows[a]) if p)
+                for rows in (WIN_ROW, TRADE_ROW, LOSE_ROW, FLAG_ROW, DELTA_ROW)]
+        result.append(AttackOdds(move, *odds))
+    return result
+
+
+# Attacks sorted for move ordering: likely Flag captures first, then by expected material.
+def order_attacks(odds: list[AttackOdds]) -> list[AttackOdds]:
+    return sorted(odds, key=lambda o: (-o.p_flag, -o.delta))
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import random
+
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    from belief_sampler import BeliefSampler
+    from constants import MAX_COUNTS
+    from game import Game
+    from selfplay import MODES
+
+    parser = argparse.ArgumentParser(description="Expected outcomes of the attacks in a random position")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--plies", type=int, default=60, help="random plies before the attacks are listed")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    game = Game()
+    game.generate_random_setup_red_green()
+    turn_order, alliance_map = MODES["2p"]
+    board = game.board
+    board.set_alliance_map(alliance_map)
+    for row in board.grid:
+        for piece in row:
+            if piece is not None and piece.owner != "Red":
+                piece.revealed = False
+    board.touch()
+    sampler = BeliefSampler(board, None, list(MAX_COUNTS), MAX_COUNTS, "Red")
+    rng = random.Random(args.seed)
+    for ply in range(args.plies):
+        side = turn_order[ply % 2]
+        moves = legal_moves(board, side)
+        if not moves:
+            break
+        x1, y1, x2, y2 = move = rng.choice(moves)
+        attacker, target = board.grid[y1][x1], board.grid[y2][x2]
+        board.apply_move(*move)
+        if attacker.owner != "Red":
+            sampler.update((x1, y1), (x2, y2))
+        elif target is not None:
+            sampler.update((x1, y1), (x2, y2), attacker, target)
+        if target is not None and board.grid[y2][x2] is not None:
+            # the survivor of a fight has shown its type (as in features.py)
+            board.grid[y2][x2].revealed = True
+            board.touch()
+
+    for odds in order_attacks(attack_odds(board, "Red", sampler)):
+        x1, y1, x2, y2 = odds.move
+        truth = board.grid[y2][x2].name
+        print(f"{board.grid[y1][x1].name:>18} -> {truth:<18} {odds}")
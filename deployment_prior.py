@@ -0,0 +1,185 @@
+# deployment_prior.py - Empirical Deployment Priors for Four Kingdoms Military Chess
+
+# This module learns where players put their pieces. An offline aggregator streams through
+# game record archives (and setup books) and counts, for every cell and piece type, how
+# many deployments put that type on that cell. BeliefSampler takes the resulting tensor as
+# its `prior`, so the opening beliefs follow real deployments instead of giving every legal
+# type the same weight.
+
+# The tensor has NUM_CELLS rows (board_encoding cell ids) and len(PIECE_TYPES) columns
+# (PIECE_TYPES order); entry [cid][t] is the number of observed deployments with type t on
+# cell cid. With `symmetric` aggregation every deployment is counted on all four seats
+# (through the seat-relative cells of setup_book), so a two-player archive also informs the
+# Yellow and Blue zones and every seat gets four times the data.
+
+# Prior file layout (little endian), read in one go:
+#   PRIOR_HEADER                 8 bytes, magic and format version
+#   deployments                  u32, number of seat deployments counted
+#   counts                       NUM_CELLS * len(PIECE_TYPES) u32, row-major
+# load_prior() caches the tensor per file (keyed by path, size and modification time), so
+# every game and every BeliefSampler of a process shares one copy, and forked workers
+# inherit it.
+
+# Usage:
+#     python deployment_prior.py build prior.spr --archive selfplay.sgr --symmetric
+#     python deployment_prior.py info prior.spr
+#     sampler = BeliefSampler(board, None, list(MAX_COUNTS), MAX_COUNTS, "Red",
+#                             prior=load_prior("prior.spr"))
+
+import os
+import sys
+from array import array
+
+from board_encoding import CELL_ID, NUM_CELLS, OWNER_SHIFT, PIECE_TYPES, TYPE_MASK
+from setup_book import SEAT_CELLS, SEATS
+
+PRIOR_HEADER = b"SPRIOR\x01\x00"   # magic, format version 1
+NUM_TYPES = len(PIECE_TYPES)
+
+# Seat-relative index of every zone cell id (None for the center), and the cell ids of
+# each seat-relative index on every seat
+_SEAT_INDEX = [None] * NUM_CELLS
+for _seat in SEATS:
+    for _i, _cell in enumerate(SEAT_CELLS[_seat]):
+        _SEAT_INDEX[CELL_ID[_cell]] = _i
+_MIRRORS = tuple(tuple(CELL_ID[SEAT_CELLS[seat][i]] for seat in SEATS)
+                 for i in range(len(SEAT_CELLS["Red"])))
+
+_cache = {}
+
+
+class PriorAggregator:
+    # Accumulates counts in one flat array; nothing is kept per game, so archives of any
+    # size stream through in constant memory.
+    def __init__(self, symmetric: bool = False):
+        self.symmetric = symmetric
+        self.counts = array("I", bytes(4 * NUM_CELLS * NUM_TYPES))
+        self.deployments = 0
+
+    # Count the deployment of every seat on the encoded board `code` (board_encoding),
+    # `weight` times.
+    def add(self, code: bytes, weight: int = 1) -> None:
+        counts = self.counts
+        seats = set()
+        for cid, c in enumerate(code):
+            if not c:
+                continue
+            t = (c & TYPE_MASK) - 1
+            index = _SEAT_INDEX[cid]
+            if index is None:
+                continue
+            seats.add(c >> OWNER_SHIFT & 0x03)
+            for target in (_MIRRORS[index] if self.symmetric else (cid,)):
+                counts[target * NUM_TYPES + t] += weight
+        self.deployments += weight * len(seats) * (len(SEATS) if self.symmetric else 1)
+
+    # Count the starting deployments of every complete game of a game record archive.
+    # Only the deployment bytes are read; moves are skipped by GameRecordReader.scan().
+    def add_archive(self, path: str) -> int:
+        from game_record import GameRecordReader
+        games = 0
+        with GameRecordReader(path) as reader:
+            for offset, *_ in reader.scan():
+                setup = reader.deployment(offset)
+                if setup is not None:   # games started from a mid-game position are skipped
+                    self.add(setup)
+                    games += 1
+        return games
+
+    # Count the deployments of a setup book, each as often as it was played (at least once).
+    def add_book(self, book) -> int:
+        from setup_book import place_deployment
+        entries = 0
+        for seat, key, games, _ in book.entries():
+            code = bytearray(NUM_CELLS)
+            place_deployment(code, seat, key)
+            self.add(code, max(games, 1))
+            entries += 1
+        return entries
+
+    def write(self, path: str) -> None:
+        counts = array("I", self.counts)
+        deployments = array("I", [self.deployments])
+        if sys.byteorder != "little":
+            counts.byteswap()
+            deployments.byteswap()
+        with open(path, "wb") as f:
+            f.write(PRIOR_HEADER)
+            f.write(deployments.tobytes())
+            f.write(counts.tobytes())
+
+
+# The prior tensor of the file at `path`: a tuple of NUM_CELLS rows, each a tuple of
+# NUM_TYPES counts in PIECE_TYPES order. Cached per file; a rewritten file is read again.
+def load_prior(path: str) -> tuple:
+    stat = os.stat(path)
+    key = (os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+    tensor = _cache.get(key)
+    if tensor is None:
+        with open(path, "rb") as f:
+            data = f.read()
+        expected = len(PRIOR_HEADER) + 4 + 4 * NUM_CELLS * NUM_TYPES
+        if data[:len(PRIOR_HEADER)] != PRIOR_HEADER or len(data) != expected:
+            raise ValueError(f"{path} is not a deployment prior file")
+        counts = memoryview(data)[len(PRIOR_HEADER) + 4:].cast("I")
+        if sys.byteorder != "little":
+            counts = array("I", counts)
+            counts.byteswap()
+        tensor = _cache[key] = tuple(tuple(counts[cid * NUM_TYPES:(cid + 1) * NUM_TYPES])
+                                     for cid in range(NUM_CELLS))
+    return tensor
+
+
+# Number of deployments counted in the prior file at `path`.
+def prior_deployments(path: str) -> int:
+    with open(path, "rb") as f:
+        header = f.read(len(PRIOR_HEADER) + 4)
+    return int.from_bytes(header[len(PRIOR_HEADER):], "little")
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Build and inspect deployment priors")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="aggregate game archives and setup books")
+    build.add_argument("prior")
+    build.add_argument("--archive", action="append", default=[], help="game record file (.sgr)")
+    build.add_argument("--book", action="append", default=[], help="setup book (setup_book.py)")
+    build.add_argument("--symmetric", action="store_true",
+                       help="count every deployment on all four seats")
+    info = commands.add_parser("info", help="print the most frequent type of every cell of a seat")
+    info.add_argument("prior")
+    info.add_argument("--seat", choices=SEATS, default="Green")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        from setup_book import SetupBook
+        aggregator = PriorAggregator(args.symmetric)
+        start = time.perf_counter()
+        for path in args.archive:
+            print(f"{path}: {aggregator.add_archive(path)} games")
+        for path in args.book:
+            with SetupBook(path) as book:
+                print(f"{path}: {aggregator.add_book(book)} setups")
+        aggregator.write(args.prior)
+        print(f"{aggregator.deployments} deployments in {time.perf_counter() - start:.2f}s "
+              f"written to {args.prior}")
+    else:
+        start = time.perf_counter()
+        tensor = load_prior(args.prior)
+        elapsed = time.perf_counter() - start
+        print(f"{prior_deployments(args.prior)} deployments, loaded in {elapsed * 1000:.2f} ms")
+        cells = SEAT_CELLS[args.seat]
+        for row in range(6):
+            line = []
+            for cell in cells[row * 5:(row + 1) * 5]:
+                counts = tensor[CELL_ID[cell]]
+                total = sum(counts)
+                if total:
+                    t = max(range(NUM_TYPES), key=counts.__getitem__)
+                    line.append(f"{PIECE_TYPES[t][:10]:>10} {counts[t] / total:4.0%}")
+                else:
+                    line.append(f"{'-':>15}")
+            print("  ".join(line))
@@ -0,0 +1,142 @@
+# distances.py - Move Distance Tables for Four Kingdoms Military Chess
+
+# This module answers "how many moves does this piece need to reach that cell" over the real
+# road and railway graph, for evaluation functions and rollout policies that cannot afford a
+# search per query (rollout.HeuristicRolloutPolicy and rollout.static_evaluate use it).
+
+# Distances count moves, not route edges: on an empty board one move takes a piece to any
+# road or rail neighbor, along a whole straight railway or special L-shaped rail path, and an
+# Engineer anywhere on the connected railway network. Pieces never leave a headquarters, so
+# no cell is reachable from an HQ.
+
+# Tables (built on first use, then shared by every caller and inherited by forked workers):
+#   distance_table(engineer)   NUM_CELLS x NUM_CELLS uint8 matrix as bytes, row = source cell
+#                              id, column = target cell id (board_encoding numbering)
+#   hq_distances(engineer)     NUM_CELLS x len(HQ_CELLS) uint8 matrix: for every cell, the
+#                              distance to each headquarters cell
+# UNREACHABLE (255) marks pairs with no path. numpy users can view a table without copying:
+#     numpy.frombuffer(distance_table(), numpy.uint8).reshape(NUM_CELLS, NUM_CELLS)
+
+# The empty-board distance is a lower bound once pieces stand in the way. board_distance()
+# tightens it for a piece on a real board: its first move is generated on the actual board
+# (blocked rails, own pieces, camps), the rest comes from the table.
+
+from collections import deque
+
+from board_encoding import CELLS, CELL_ID, NUM_CELLS
+from movegen import (
+    HQ_CELLS as _HQ_SET, RAIL_NEIGHBORS, RAIL_RAYS, ROAD_NEIGHBORS, SPECIAL_PATH_OF, piece_moves,
+)
+
+UNREACHABLE = 255
+
+# Headquarters cells as (x, y), in the order of the hq_distances() columns
+HQ_CELLS = tuple(sorted(_HQ_SET))
+HQ_IDS = tuple(CELL_ID[cell] for cell in HQ_CELLS)
+
+_tables = {}
+
+
+# Cells one move away from `cell` on an empty board.
+def _move_targets(cell, engineer: bool) -> set:
+    if cell in _HQ_SET:
+        return set()
+    targets = set(ROAD_NEIGHBORS.get(cell, ()))
+    targets.update(RAIL_NEIGHBORS.get(cell, ()))
+    targets.update(SPECIAL_PATH_OF.get(cell, ()))
+    for ray in RAIL_RAYS.get(cell, ()):
+        targets.update(ray)
+    if engineer and RAIL_NEIGHBORS.get(cell):
+        seen = {cell}
+        queue = deque([cell])
+        while queue:
+            for n in RAIL_NEIGHBORS.get(queue.popleft(), ()):
+                if n not in seen:
+                    seen.add(n)
+                    queue.append(n)
+        targets.update(seen)
+    targets.discard(cell)
+    return {CELL_ID[c] for c in targets if c in CELL_ID}
+
+
+def _build(engineer: bool) -> bytes:
+    graph = [_move_targets(cell, engineer) for cell in CELLS]
+    table = bytearray([UNREACHABLE]) * (NUM_CELLS * NUM_CELLS)
+    for src in range(NUM_CELLS):
+        row = src * NUM_CELLS
+        table[row + src] = 0
+        frontier = [src]
+        depth = 0
+        while frontier and depth < UNREACHABLE - 1:
+            depth += 1
+            nxt = []
+            for cid in frontier:
+                for n in graph[cid]:
+                    if table[row + n] == UNREACHABLE:
+                        table[row + n] = depth
+                        nxt.append(n)
+            frontier = nxt
+    return bytes(table)
+
+
+# All-pairs move distances on an empty board (see the module comment for the layout).
+def distance_table(engineer: bool = False) -> bytes:
+    key = ("pairs", engineer)
+    table = _tables.get(key)
+    if table is None:
+        table = _tables[key] = _build(engineer)
+    return table
+
+
+# Distance from every cell to every headquarters: row `cell_id` holds len(HQ_CELLS) bytes.
+def hq_distances(engineer: bool = False) -> bytes:
+    key = ("hq", engineer)
+    table = _tables.get(key)
+    if table is None:
+        pairs = distance_table(engineer)
+        table = _tables[key] = bytes(
+            pairs[src * NUM_CELLS + hq] for src in range(NUM_CELLS) for hq in HQ_IDS
+        )
+    return table
+
+
+# Moves from `src` to `dst` ((x, y) cells) on an empty board.
+def distance(src, dst, engineer: bool = False) -> int:
+    return distance_table(engineer)[CELL_ID[src] * NUM_CELLS + CELL_ID[dst]]
+
+
+# The distance vector of `cell` ((x, y)) to the headquarters, in HQ_CELLS order.
+def hq_vector(cell, engineer: bool = False) -> bytes:
+    start = CELL_ID[cell] * len(HQ_CELLS)
+    return hq_distances(engineer)[start:start + len(HQ_CELLS)]
+
+
+# Moves the piece at (x, y) needs to reach `target` ((x, y)) on `board`, with its first move
+# taken on the actual board: 0 if it stands there, UNREACHABLE if it cannot move at all.
+# Still a lower bound, but it sees pieces that block the piece right now.
+def board_distance(board, x: int, y: int, target) -> int:
+    if (x, y) == target:
+        return 0
+    piece = board.grid[y][x]
+    table = distance_table(piece.name == "Engineer")
+    dst = CELL_ID[target]
+    best = UNREACHABLE
+    for _, _, x2, y2 in piece_moves(board, x, y):
+        if (x2, y2) == target:
+            return 1
+        d = table[CELL_ID[(x2, y2)] * NUM_CELLS + dst]
+        if d + 1 < best:
+            best = d + 1
+    return best
+
+
+if __name__ == "__main__":
+    import time
+
+    for engineer in (False, True):
+        start = time.perf_counter()
+        table = distance_table(engineer)
+        elapsed = time.perf_counter() - start
+        reachable = [d for d in table if d != UNREACHABLE]
+        print(f"{'engineer' if engineer else 'other':>8}: {len(table)} bytes in {elapsed * 1000:.1f} ms, "
+              f"max distance {max(reachable)}, mean {sum(reachable) / len(reachable):.2f}")
@@ -0,0 +1,400 @@
+# engine_protocol.py - Text Engine Protocol over stdin/stdout for Four Kingdoms Military Chess
+
+# This module lets agents run as separate engine processes that speak a small UCI-style text
+# protocol, so engines can be benchmarked and run in parallel without sharing an interpreter
+# (or the GIL) with the driver.
+
+# Engine side (one command per line on stdin, replies on stdout):
+#   uci                                  -> "id name <agent spec>", "uciok"
+#   isready                              -> "readyok"
+#   setoption name seed value <n>        reseed the agent
+#   ucinewgame                           start a new game
+#   position <mode> <board hex> [side <side>] [moves <m> ...]
+#                                        full-information position (board_encoding hex), then
+#                                        the moves played from it; the side to move is <side>
+#                                        (default: the first in turn order) and then follows
+#                                        the game flow of selfplay.play_game
+#   observe <mode> <side> <view hex>     the side to move only sees its Observation; unknown
+#                                        pieces are sampled from a BeliefSampler
+#   go [movetime <ms>]                   -> "bestmove <m>" or "bestmove none"
+#   quit
+# A move <m> is written "x1,y1,x2,y2".
+
+# Driver side:
+#   EngineProcess   one engine subprocess (uci handshake on start)
+#   EnginePool      a fixed set of warm engine processes shared by threads
+#   EngineAgent     agents.py-style agent backed by an engine process, usable in selfplay
+# Run an engine:      python engine_protocol.py --agent mcts:iterations=200
+# Engine vs engine:   python engine_protocol.py --match heuristic random --games 20 --parallel 4
+
+import os
+import queue
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from board_encoding import OWNER_SHIFT, PIECE_TYPES, REVEALED_BIT, TYPE_MASK, decode_board
+from constants import MAX_COUNTS
+from movegen import legal_moves, resolve_eliminations, winning_alliance, next_side, skip_stuck_side
+from observation import UNKNOWN, Observation, board_from_observation
+
+
+def format_move(move) -> str:
+    return "none" if move is None else ",".join(str(v) for v in move)
+
+
+def parse_move(token: str):
+    return None if token == "none" else tuple(int(v) for v in token.split(","))
+
+
+# ---------------------------------------------------------------------------
+# Engine side
+# ---------------------------------------------------------------------------
+
+# Replay `moves` from the encoded board `code`, `side` moving first, and return
+# (board, side to move, turn order).
+def position_after(mode: str, code: bytes, moves, side: str | None = None):
+    from selfplay import MODES
+    turn_order, alliance_map = MODES[mode]
+    board = decode_board(code, alliance_map)
+    sides = resolve_eliminations(board, list(turn_order))
+    if winning_alliance(board, sides) is not None:
+        side = None
+    elif side not in sides:
+        side = next_side(turn_order, side, sides) if side in turn_order else sides[0]
+    for move in moves:
+        while side is not None and not legal_moves(board, side):
+            side, sides = skip_stuck_side(board, turn_order, sides, side)
+        board.apply_move(*move)
+        sides = resolve_eliminations(board, sides)
+        side = None if winning_alliance(board, sides) is not None else next_side(turn_order, side, sides)
+    return board, side, turn_order
+
+
+# A board and BeliefSampler for `side` built from its Observation. The sampler's counts are
+# the full armies of the sides with unknown pieces minus their revealed pieces.
+def observed_position(mode: str, side: str, obs: Observation):
+    from belief_sampler import BeliefSampler
+    from selfplay import MODES
+    turn_order, alliance_map = MODES[mode]
+    board = board_from_observation(obs, alliance_map)
+    hidden_owners = {c >> OWNER_SHIFT & 0x03 for c in obs.codes if c & TYPE_MASK == UNKNOWN}
+    if not hidden_owners:
+        return board, None, turn_order
+    counts = {t: n * len(hidden_owners) for t, n in MAX_COUNTS.items()}
+    for c in obs.codes:
+        t = c & TYPE_MASK
+        if c and t != UNKNOWN and c >> OWNER_SHIFT & 0x03 in hidden_owners:
+            counts[PIECE_TYPES[t - 1]] = max(counts[PIECE_TYPES[t - 1]] - 1, 0)
+    sampler = BeliefSampler(board, None, list(PIECE_TYPES), counts, side)
+    return board, sampler, turn_order
+
+
+# Set the search time of an agent for one move if its engine has a time limit.
+def _set_movetime(agent, seconds):
+    search = getattr(agent, "search", None)
+    if search is not None and hasattr(search, "time_limit"):
+        search.time_limit = seconds
+
+
+# Serve the engine protocol for the agent built from `spec` until "quit" or end of input.
+def run_engine(spec: str, stdin=sys.stdin, stdout=sys.stdout) -> None:
+    from agents import make_agent
+    agent = make_agent(spec)
+    default_time = getattr(getattr(agent, "search", None), "time_limit", None)
+    board = side = turn_order = sampler = None
+
+    def reply(line):
+        stdout.write(line + "\n")
+        stdout.flush()
+
+    for line in stdin:
+        words = line.split()
+        if not words:
+            continue
+        cmd, args = words[0], words[1:]
+        try:
+            if cmd == "uci":
+                reply(f"id name {spec}")
+                reply("uciok")
+            elif cmd == "isready":
+                reply("readyok")
+            elif cmd == "setoption" and len(args) == 4 and args[1].lower() == "seed":
+                agent.seed(int(args[3]) if args[3].lstrip("-").isdigit() else args[3])
+            elif cmd == "ucinewgame":
+                board = side = sampler = None
+            elif cmd == "position":
+                first = args[3] if args[2:3] == ["side"] else None
+                rest = args[4:] if first else args[2:]
+                moves = [parse_move(m) for m in rest[1:]] if rest[:1] == ["moves"] else []
+                board, side, turn_order = position_after(args[0], bytes.fromhex(args[1]), moves,
+                                                         first)
+                sampler = None
+            elif cmd == "observe":
+                side = args[1]
+                obs = Observation(side, bytes.fromhex(args[2]))
+                board, sampler, turn_order = observed_position(args[0], side, obs)
+            elif cmd == "go":
+                movetime = int(args[args.index("movetime") + 1]) / 1000 if "movetime" in args else default_time
+                _set_movetime(agent, movetime)
+                move = None
+                if board is not None and side is not None:
+                    move = agent.select_move(board, side, turn_order, sampler)
+                reply(f"bestmove {format_move(move)}")
+            elif cmd == "quit":
+                break
+            else:
+                reply(f"info string unknown command {cmd}")
+        except (ValueError, IndexError, KeyError) as e:
+            reply(f"info string error {e!r}")
+            if cmd == "go":
+                reply("bestmove none")
+
+
+# ---------------------------------------------------------------------------
+# Driver side
+# ---------------------------------------------------------------------------
+
+# Command line that runs this module as an engine for an agent spec.
+def engine_command(agent_spec: str) -> list[str]:
+    return [sys.executable, os.path.abspath(__file__), "--agent", agent_spec]
+
+
+class EngineProcess:
+    # command: argument list or shell-style string of the engine executable
+    def __init__(self, command):
+        if isinstance(command, str):
+            command = shlex.split(command)
+        self.proc = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     text=True, bufsize=1)
+        self.send("uci")
+        self.name = self.expect("id name")[len("id name "):]
+        self.expect("uciok")
+        self.ready()
+
+    def send(self, line: str) -> None:
+        self.proc.stdin.write(line + "\n")
+        self.proc.stdin.flush()
+
+    # Read lines until one starts with `prefix` and return it.
+    def expect(self, prefix: str) -> str:
+        while True:
+            line = self.proc.stdout.readline()
+            if not line:
+                raise RuntimeError(f"engine exited while waiting for {prefix!r}")
+            if line.startswith(prefix):
+                return line.rstrip("\n")
+
+    def ready(self) -> None:
+        self.send("isready")
+        self.expect("readyok")
+
+    def seed(self, seed) -> None:
+        self.send(f"setoption name seed value {seed}")
+
+    def new_game(self) -> None:
+        self.send("ucinewgame")
+
+    # Ask for a move. Either `board` (full information) or `observation` must be given.
+    # A `seed` reseeds the engine first, so the answer does not depend on the engine's history.
+    def go(self, mode: str, board=None, side: str | None = None, observation=None,
+           movetime_ms: int | None = None, seed=None):
+        if seed is not None:
+            self.seed(seed)
+        if observation is not None:
+            self.send(f"observe {mode} {observation.side} {observation.codes.hex()}")
+        else:
+            from board_encoding import encode_board
+            self.send(f"position {mode} {encode_board(board).hex()} side {side}")
+        self.send("go" if movetime_ms is None else f"go movetime {movetime_ms}")
+        return parse_move(self.expect("bestmove").split()[1])
+
+    def close(self) -> None:
+        if self.proc.poll() is None:
+            try:
+                self.send("quit")
+                self.proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self.proc.kill()
+
+
+class EnginePool:
+    # `size` warm engine processes started from `command`; threads borrow them with acquire().
+    def __init__(self, command, size: int = 2):
+        self.engines = [EngineProcess(command) for _ in range(size)]
+        self.idle = queue.Queue()
+        for engine in self.engines:
+            self.idle.put(engine)
+
+    @contextmanager
+    def acquire(self):
+        engine = self.idle.get()
+        try:
+            yield engine
+        finally:
+            self.idle.put(engine)
+
+    def close(self) -> None:
+        for engine in self.engines:
+            engine.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Agent (agents.py interface) that asks an engine process for its moves. The engine only
+# sees the mover's Observation unless observe=False. Give either a command / agent spec (a
+# private process is started and kept for the agent's lifetime) or an EnginePool.
+# A seeded agent with a pool sends every request a seed derived from its own seed and a move
+# counter, since the engine it borrows may have served any other agent or game before.
+# calls / seconds count the move requests and their round-trip time.
+class EngineAgent:
+    name = "engine"
+
+    def __init__(self, seed=None, command=None, agent: str = "random", pool: EnginePool = None,
+                 movetime: int | None = None, observe: bool = True):
+        self.pool = pool
+        self.engine = None if pool is not None else EngineProcess(command or engine_command(agent))
+        self.movetime = movetime
+        self.observe = observe
+        self.calls = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+        self._seed = None
+        self._requests = 0
+        if seed is not None:
+            self.seed(seed)
+
+    # Seeds are sent as text, so string seeds (as used by selfplay) reach the engine unchanged.
+    def seed(self, seed) -> None:
+        seed = str(seed).replace(" ", "")
+        if self.engine is not None:
+            self.engine.seed(seed)
+        else:
+            with self._lock:
+                self._seed, self._requests = seed, 0
+
+    # Seed for the next request to a pooled engine, or None if the agent is unseeded.
+    def _request_seed(self):
+        if self.engine is not None or self._seed is None:
+            return None
+        with self._lock:
+            self._requests += 1
+            return f"{self._seed}/{self._requests}"
+
+    def _ask(self, engine, board, side, turn_order, seed=None):
+        mode = "2p" if len(turn_order) == 2 else "4p"
+        if self.observe:
+            return engine.go(mode, observation=board.observe(side), movetime_ms=self.movetime,
+                             seed=seed)
+        return engine.go(mode, board, side, movetime_ms=self.movetime, seed=seed)
+
+    def select_move(self, board, side: str, turn_order, sampler=None):
+        start = time.perf_counter()
+        if self.engine is not None:
+            move = self._ask(self.engine, board, side, turn_order)
+        else:
+            seed = self._request_seed()
+            with self.pool.acquire() as engine:
+                move = self._ask(engine, board, side, turn_order, seed)
+        with self._lock:
+            self.calls += 1
+            self.seconds += time.perf_counter() - start
+        return move
+
+    def close(self) -> None:
+        if self.engine is not None:
+            self.engine.close()
+
+
+# Play `games` games between two engine pools on `parallel` threads (each game borrows one
+# engine per alliance for every move). Returns the results and timing.
+def run_match(spec_a: str, spec_b: str, games: int = 10, parallel: int = 2, mode: str = "2p",
+              movetime: int | None = None, max_plies: int = 2000, seed: int = 0) -> dict:
+    import random
+    from selfplay import make_setup, play_game
+
+    rng = random.Random(seed)
+    setups = []
+    for _ in range(games):
+        random.seed(rng.getrandbits(63))
+        setups.append(make_setup(mode))
+
+    wins = {"a": 0, "b": 0, None: 0}
+    totals = {"calls": 0, "seconds": 0.0}
+    work = queue.Queue()
+    for i in range(games):
+        work.put(i)
+    with EnginePool(engine_command(spec_a), parallel) as pool_a, \
+            EnginePool(engine_command(spec_b), parallel) as pool_b:
+        pools = {"a": pool_a, "b": pool_b}
+
+        # Agent A takes alliance 1 in even games; every piece starts face down and the
+        # survivors of fights are revealed, as on the game server. Each game has its own
+        # agents seeded from the match seed, so its moves do not depend on which engines of
+        # the pools answer them.
+        def worker():
+            while True:
+                try:
+                    i = work.get_nowait()
+                except queue.Empty:
+                    return
+                agents = {label: EngineAgent(f"{seed}/{i}/{label}", pool=pool, movetime=movetime)
+                          for label, pool in pools.items()}
+                first, second = ("a", "b") if i % 2 == 0 else ("b", "a")
+                code = bytes(c & ~REVEALED_BIT for c in setups[i])
+                winner = play_game(code, mode, {1: agents[first], 2: agents[second]},
+                                   max_plies, reveal_survivors=True)["winner"]
+                with lock:
+                    wins[None if winner is None else (first if winner == 1 else second)] += 1
+                    totals["calls"] += sum(a.calls for a in agents.values())
+                    totals["seconds"] += sum(a.seconds for a in agents.values())
+
+        lock = threading.Lock()
+        threads = [threading.Thread(target=worker) for _ in range(parallel)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+    calls, seconds = totals["calls"], totals["seconds"]
+    return {
+        "games": games, "seconds": elapsed, "wins_a": wins["a"], "wins_b": wins["b"],
+        "draws": wins[None], "moves": calls,
+        "ms_per_move": 1000 * seconds / calls if calls else 0.0,
+        "moves_per_sec": calls / elapsed if elapsed else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    parser = argparse.ArgumentParser(description="Engine protocol: run an engine or an engine match")
+    parser.add_argument("--agent", default="random", help="agent spec served as an engine")
+    parser.add_argument("--match", nargs=2, metavar=("AGENT_A", "AGENT_B"),
+                        help="play engine processes of two agent specs against each other")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--parallel", type=int, default=2, help="engines per side / games at once")
+    parser.add_argument("--mode", choices=("2p", "4p"), default="2p")
+    parser.add_argument("--movetime", type=int, help="milliseconds per move")
+    parser.add_argument("--max-plies", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.match:
+        s = run_match(args.match[0], args.match[1], args.games, args.parallel, args.mode,
+                      args.movetime, args.max_plies, args.seed)
+        print(f"{s['games']} games in {s['seconds']:.1f}s  A {s['wins_a']} / B {s['wins_b']} / "
+              f"draw {s['draws']}  {s['moves']} moves  {s['ms_per_move']:.2f} ms/move  "
+              f"{s['moves_per_sec']:.0f} moves/s")
+    else:
+        run_engine(args.agent)
@@ -0,0 +1,280 @@
+# features.py - Training-Data Export to NumPy Feature Planes for Four Kingdoms Military Chess
+
+# This module turns binary game records (game_record.py) into per-ply training tensors and
+# writes them as chunked .npy shards that can be opened with np.load(..., mmap_mode="r").
+
+# Every ply is seen from the side to move. A piece counts as revealed once it has survived a
+# fight (its type became public); the side to move knows its own pieces and the revealed ones,
+# and gets BeliefSampler marginals for the rest.
+
+# Arrays per shard (N = plies in the shard):
+#   planes   (N, NUM_PLANES, 17, 17) uint8
+#              0..95   owner (4) x type (12) x revealed (2) one-hot of the pieces whose type
+#                      the side to move knows; plane = owner * 24 + type * 2 + revealed
+#              96..99  pieces of each owner whose type is unknown to the side to move
+#              100     railway cells, 101 road cells (from routes.connections)
+#              102..105 side to move (one plane per owner, all ones)
+#   beliefs  (N, 12, 17, 17) float16  type marginals at the unknown pieces (zero elsewhere)
+#   boards   (N, 129) uint8   full-information board_encoding of the position
+#   moves    (N, 2) uint8     from / to cell id of the move played
+#   outcomes (N,) int8        chessboard.Outcome of the move
+#   values   (N,) int8        +1 / -1 if the mover's alliance won / lost the game, 0 otherwise
+#   sides    (N,) uint8       owner code of the side to move
+#   games, plies (N,) int32 / int16  game index in the archive and ply number
+# index.json in the output directory lists the shards and their sizes.
+
+# Export is parallel and streaming: the archive is only scanned (not decoded) in the parent,
+# each worker decodes its own range of games from the memory-mapped file and writes its shards
+# itself, so memory use is bounded by the shard size, not the archive size.
+
+import json
+import os
+
+import numpy as np
+
+from board_encoding import (
+    CELLS, NUM_CELLS, OWNER_CODE, OWNER_SHIFT, REVEALED_BIT, TYPE_CODE, TYPE_MASK, PIECE_TYPES,
+    encode_board, decode_board,
+)
+from belief_sampler import BeliefSampler
+from chessboard import Outcome
+from constants import MAX_COUNTS
+from game_record import GameRecordReader
+from mcts import _pool_context
+from movegen import RAIL_NEIGHBORS, ROAD_NEIGHBORS
+
+BOARD_SIZE = 17
+NUM_TYPES = len(PIECE_TYPES)
+UNKNOWN_PLANE = 4 * NUM_TYPES * 2
+RAIL_PLANE = UNKNOWN_PLANE + 4
+ROAD_PLANE = RAIL_PLANE + 1
+SIDE_PLANE = ROAD_PLANE + 1
+NUM_PLANES = SIDE_PLANE + 4
+
+CELL_X = np.array([x for x, _ in CELLS], dtype=np.intp)
+CELL_Y = np.array([y for _, y in CELLS], dtype=np.intp)
+
+# Static route planes, copied into every ply
+ROUTE_PLANES = np.zeros((2, BOARD_SIZE, BOARD_SIZE), dtype=np.uint8)
+for (_x, _y), _links in RAIL_NEIGHBORS.items():
+    if _links:
+        ROUTE_PLANES[0, _y, _x] = 1
+for (_x, _y), _links in ROAD_NEIGHBORS.items():
+    if _links:
+        ROUTE_PLANES[1, _y, _x] = 1
+
+
+# Belief marginals (cell id -> {type: p}) for the unknown pieces of `owner`. `moved` cells hold
+# pieces that have moved, so they cannot be Mines or Flags.
+# The counts only use what `observer` can know: the full army minus the known pieces of
+# `owner` on the board and minus `lost` ({type: n}), its pieces captured while their type was
+# public. Pieces that were captured face down stay in the counts, as their types never showed.
+def owner_beliefs(code: bytes, known, moved, owner: int, observer: str, lost=None) -> dict:
+    hidden = bytearray(NUM_CELLS)
+    counts = dict(MAX_COUNTS)
+    for name, n in (lost or {}).items():
+        counts[name] = max(counts[name] - n, 0)
+    for cid, c in enumerate(code):
+        if c and (c >> OWNER_SHIFT) & 0x03 == owner:
+            if known[cid]:
+                name = PIECE_TYPES[(c & TYPE_MASK) - 1]
+                counts[name] = max(counts[name] - 1, 0)
+            else:
+                # the sampler's board only keeps the owner of an unknown piece, not its type
+                hidden[cid] = TYPE_CODE["PlatoonLeader"] | c & ~TYPE_MASK & ~REVEALED_BIT
+    if not any(hidden):
+        return {}
+    sampler = BeliefSampler(decode_board(bytes(hidden)), None, list(PIECE_TYPES), counts, observer)
+    cells = {}
+    for cid, c in enumerate(hidden):
+        if c and moved[cid]:
+            dist = sampler.beliefs[CELLS[cid]]
+            dist["Mine"] = dist["Flag"] = 0.0
+    sampler._normalize_and_constrain()
+    for cid, c in enumerate(hidden):
+        if c:
+            cells[cid] = sampler.beliefs[CELLS[cid]]
+    return cells
+
+
+# Feature planes and belief planes of one position seen by `side`.
+# revealed / moved: per cell id flags of the pieces standing there; lost: owner code ->
+# {type: n} of the pieces captured while revealed (see owner_beliefs).
+def encode_position(code: bytes, side: str, revealed, moved, with_beliefs: bool = True,
+                    lost=None):
+    planes = np.zeros((NUM_PLANES, BOARD_SIZE, BOARD_SIZE), dtype=np.uint8)
+    beliefs = np.zeros((NUM_TYPES, BOARD_SIZE, BOARD_SIZE), dtype=np.float16)
+    me = OWNER_CODE[side]
+    arr = np.frombuffer(code, dtype=np.uint8)
+    occupied = arr != 0
+    owner = (arr >> OWNER_SHIFT) & 0x03
+    types = (arr & TYPE_MASK).astype(np.intp) - 1
+    rev = np.frombuffer(bytes(revealed), dtype=np.uint8).astype(bool)
+    known = occupied & ((owner == me) | rev)
+
+    cells = np.nonzero(known)[0]
+    planes[owner[cells] * 2 * NUM_TYPES + types[cells] * 2 + rev[cells], CELL_Y[cells], CELL_X[cells]] = 1
+    cells = np.nonzero(occupied & ~known)[0]
+    planes[UNKNOWN_PLANE + owner[cells], CELL_Y[cells], CELL_X[cells]] = 1
+    planes[RAIL_PLANE:SIDE_PLANE] = ROUTE_PLANES
+    planes[SIDE_PLANE + me] = 1
+
+    if with_beliefs and len(cells):
+        for o in sorted(set(owner[cells].tolist())):
+            lost_o = lost.get(o) if lost else None
+            for cid, dist in owner_beliefs(code, known, moved, o, side, lost_o).items():
+                x, y = CELLS[cid]
+                beliefs[:, y, x] = [dist.get(name, 0.0) for name in PIECE_TYPES]
+    return planes, beliefs
+
+
+# Yield one feature row per ply of `record` (a GameRecord) as a dict of arrays / scalars.
+def game_rows(record, game_index: int, with_beliefs: bool = True):
+    from selfplay import MODES
+    alliance_map = MODES[record.mode][1]
+    revealed = bytearray(NUM_CELLS)
+    moved = bytearray(NUM_CELLS)
+    lost = {o: dict.fromkeys(MAX_COUNTS, 0) for o in range(4)}
+    cell_id = {cell: i for i, cell in enumerate(CELLS)}
+    for ply, (board, side, move, outcome) in enumerate(record.positions()):
+        code = encode_board(board)
+        planes, beliefs = encode_position(code, side, revealed, moved, with_beliefs, lost)
+        a, b = cell_id[(move[0], move[1])], cell_id[(move[2], move[3])]
+        mover = alliance_map[side]
+        yield {
+            "planes": planes, "beliefs": beliefs, "boards": np.frombuffer(code, dtype=np.uint8),
+            "moves": (a, b), "outcomes": outcome,
+            "values": 0 if not record.winner else (1 if record.winner == mover else -1),
+            "sides": OWNER_CODE[side], "games": game_index, "plies": ply,
+        }
+        # Captured pieces whose type was public leave the belief counts of their owner
+        for cid, removed in ((b, (Outcome.WIN, Outcome.TRADE)), (a, (Outcome.LOSE, Outcome.TRADE))):
+            if outcome in removed and revealed[cid]:
+                c = code[cid]
+                lost[(c >> OWNER_SHIFT) & 0x03][PIECE_TYPES[(c & TYPE_MASK) - 1]] += 1
+        # Track what is public after the move: the survivor of a fight is revealed
+        if outcome == Outcome.MOVE:
+            revealed[b], moved[b] = revealed[a], 1
+        elif outcome == Outcome.WIN:
+            revealed[b], moved[b] = 1, 1
+        elif outcome == Outcome.LOSE:
+            revealed[b] = 1
+        else:
+            revealed[b] = moved[b] = 0
+        revealed[a] = moved[a] = 0
+        # Sides removed from the board leave no flags behind
+        for cid, c in enumerate(encode_board(board)):
+            if not c:
+                revealed[cid] = moved[cid] = 0
+
+
+ARRAY_SPECS = {
+    "planes": ((NUM_PLANES, BOARD_SIZE, BOARD_SIZE), np.uint8),
+    "beliefs": ((NUM_TYPES, BOARD_SIZE, BOARD_SIZE), np.float16),
+    "boards": ((NUM_CELLS,), np.uint8),
+    "moves": ((2,), np.uint8),
+    "outcomes": ((), np.int8),
+    "values": ((), np.int8),
+    "sides": ((), np.uint8),
+    "games": ((), np.int32),
+    "plies": ((), np.int16),
+}
+
+
+# Preallocated arrays for one shard, written out with np.save when full.
+class ShardWriter:
+    def __init__(self, out_dir: str, prefix: str, shard_plies: int):
+        self.out_dir = out_dir
+        self.prefix = prefix
+        self.shard_plies = shard_plies
+        self.buffers = {name: np.zeros((shard_plies, *shape), dtype=dtype)
+                        for name, (shape, dtype) in ARRAY_SPECS.items()}
+        self.count = 0
+        self.shards = []
+
+    def add(self, row: dict) -> None:
+        for name, buf in self.buffers.items():
+            buf[self.count] = row[name]
+        self.count += 1
+        if self.count == self.shard_plies:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.count:
+            return
+        name = f"{self.prefix}_{len(self.shards):04d}"
+        for key, buf in self.buffers.items():
+            np.save(os.path.join(self.out_dir, f"{name}.{key}.npy"), buf[:self.count])
+        self.shards.append({"name": name, "plies": self.count})
+        self.count = 0
+
+
+# Worker task: export games [start, stop) of the archive (given as scan() offsets).
+def _export_task(args):
+    path, out_dir, chunk, offsets, start, shard_plies, with_beliefs = args
+    writer = ShardWriter(out_dir, f"shard_{chunk:05d}", shard_plies)
+    with GameRecordReader(path) as reader:
+        for i, offset in enumerate(offsets):
+            for row in game_rows(reader.read(offset), start + i, with_beliefs):
+                writer.add(row)
+    writer.flush()
+    return writer.shards
+
+
+# Export every game of the archive `path` into shards under `out_dir`, splitting the games
+# into chunks of `games_per_chunk` processed on `workers` processes. Returns the index.
+def export(path: str, out_dir: str, workers: int = 1, games_per_chunk: int = 64,
+           shard_plies: int = 2048, with_beliefs: bool = True) -> dict:
+    os.makedirs(out_dir, exist_ok=True)
+    with GameRecordReader(path) as reader:
+        offsets = [offset for offset, *_ in reader.scan()]
+    tasks = [(path, out_dir, i // games_per_chunk, offsets[i:i + games_per_chunk], i,
+              shard_plies, with_beliefs)
+             for i in range(0, len(offsets), games_per_chunk)]
+    if workers > 1:
+        with _pool_context().Pool(workers) as pool:
+            results = list(pool.imap(_export_task, tasks))
+    else:
+        results = [_export_task(t) for t in tasks]
+
+    index = {
+        "source": os.path.abspath(path),
+        "games": len(offsets),
+        "plies": sum(s["plies"] for shards in results for s in shards),
+        "arrays": {name: {"shape": list(shape), "dtype": np.dtype(dtype).name}
+                   for name, (shape, dtype) in ARRAY_SPECS.items()},
+        "shards": [s for shards in results for s in shards],
+    }
+    with open(os.path.join(out_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+    return index
+
+
+# Memory-map one array of every shard listed in an export index.
+def load_shards(out_dir: str, array: str = "planes") -> list:
+    with open(os.path.join(out_dir, "index.json"), encoding="utf-8") as f:
+        index = json.load(f)
+    return [np.load(os.path.join(out_dir, f"{s['name']}.{array}.npy"), mmap_mode="r")
+            for s in index["shards"]]
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    parser = argparse.ArgumentParser(description="Export game records to NumPy feature shards")
+    parser.add_argument("records", help="game record file (.sgr)")
+    parser.add_argument("out_dir")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--games-per-chunk", type=int, default=64)
+    parser.add_argument("--shard-plies", type=int, default=2048)
+    parser.add_argument("--no-beliefs", action="store_true", help="skip BeliefSampler marginals")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = export(args.records, args.out_dir, args.workers, args.games_per_chunk,
+                   args.shard_plies, not args.no_beliefs)
+    elapsed = time.perf_counter() - start
+    print(f"{index['games']} games, {index['plies']} plies, {len(index['shards'])} shards "
+          f"in {elapsed:.1f}s ({index['plies'] / elapsed:.0f} plies/s)")
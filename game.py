@@ -4,6 +4,7 @@
 # initialization, and player interaction before and during the game.
 
 import pygame
+from board_renderer import load_font
 from chessboard import ChessBoard
 from piece import Piece
 from constants import (
@@ -42,6 +43,10 @@ class Game:
 
         self.popup_board_pos: tuple[int, int] | None = None
         self.popup_owner: str | None = None
+        # Turn index before each move in board.history, restored by undo()
+        self.turn_log: list[int] = []
+        # BeliefSampler of the player at the screen (Red) in a red-green game, else None
+        self.belief_sampler = None
 
 
         OWNER_TO_COLOR = {
@@ -116,6 +121,19 @@ class Game:
                 self.selected = (row, col)
             return False
 
+    # Take back the last move (see ChessBoard.undo_move) and give the turn back to the
+    # side that played it. Returns False if there is nothing to undo.
+    def undo(self, state) -> bool:
+        if self.board.undo_move() is None:
+            return False
+        if self.turn_log:
+            state.current_turn_index = self.turn_log.pop()
+        state.game_over = False
+        state.winning_alliance = None
+        self.selected = None
+        self.clear_overlay()
+        return True
+
     def on_right_click(self, row: int, col: int) -> None:
         if (row, col) in camp_positions:
             return
@@ -220,6 +238,7 @@ class Game:
                         piece.revealed = True
                         self.board.grid[row][col] = piece
                         self.board.place_piece(col, row, piece)
+                        self.board.touch()
                         self.clear_overlay()
                     return
 
@@ -242,7 +261,7 @@ class Game:
         popup_surf = pygame.Surface((w, h), pygame.SRCALPHA)
         popup_surf.fill((255, 255, 200, 220))
         screen.blit(popup_surf, (x0, y0))
-        font = pygame.font.Font("/System/Library/Fonts/STHeiti Medium.ttc", 18)
+        font = load_font(18)
 
         for i in range(self.POPUP_ROWS):
             for j in range(self.POPUP_COLS):
@@ -267,6 +286,7 @@ class Game:
         if self.selected:
             row, col = self.selected
             self.board.grid[row][col] = None
+            self.board.touch()
             self.selected = None
 
     def get_piece(self, col: int, row: int):
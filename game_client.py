@@ -0,0 +1,137 @@
+# game_client.py - Game Server Client and Load Test for Four Kingdoms Military Chess
+
+# This module talks to game_server.py. GameClient keeps the seat's Observation up to date from
+# the server's start / update messages and asks a move function for a move on every turn.
+# The load test opens many connections at once, plays random legal moves on all of them and
+# reports server throughput (moves per second) and move latency (time from sending a move to
+# receiving the update that confirms it), including the 99th percentile.
+
+# Usage:
+#     python game_server.py --port 7878 &
+#     python game_client.py --games 1000 --mode 2p --port 7878
+
+import asyncio
+import json
+import random
+import time
+
+from observation import Observation
+
+
+class GameClient:
+    # choose(client, legal) returns the move to play (a list [x1, y1, x2, y2]); it may be a
+    # coroutine function.
+    def __init__(self, choose, mode: str = "2p", game: str | None = None):
+        self.choose = choose
+        self.mode = mode
+        self.game = game
+        self.side = None
+        self.view = None        # Observation of this seat
+        self.result = None      # the server's "end" message
+        self.latencies = []     # seconds from sending a move to its update
+        self.moves = 0
+        self._sent_at = None
+
+    async def _send(self, writer, message: dict) -> None:
+        writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+        await writer.drain()
+
+    def _apply(self, message: dict) -> None:
+        if message["type"] == "start":
+            self.side = message["side"]
+            self.view = Observation(self.side, bytes.fromhex(message["view"]))
+        elif message["diff"]:
+            codes = bytearray(self.view.codes)
+            for cid, code in message["diff"]:
+                codes[cid] = code
+            self.view = Observation(self.side, codes)
+
+    # Connect, join a match and play it to the end. Returns the "end" message.
+    async def play(self, host: str = "127.0.0.1", port: int = 7878) -> dict:
+        reader, writer = await asyncio.open_connection(host, port)
+        join = {"op": "join", "mode": self.mode}
+        if self.game is not None:
+            join["game"] = self.game
+        await self._send(writer, join)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                kind = message["type"]
+                if kind in ("start", "update"):
+                    if kind == "update" and self._sent_at is not None and message["side"] == self.side:
+                        self.latencies.append(time.perf_counter() - self._sent_at)
+                        self._sent_at = None
+                    self._apply(message)
+                elif kind == "turn":
+                    move = self.choose(self, message["legal"])
+                    if asyncio.iscoroutine(move):
+                        move = await move
+                    self._sent_at = time.perf_counter()
+                    self.moves += 1
+                    await self._send(writer, {"op": "move", "move": list(move)})
+                elif kind == "end":
+                    self.result = message
+                    break
+                elif kind == "error":
+                    raise RuntimeError(message["message"])
+        finally:
+            writer.close()
+        return self.result
+
+
+# Move function of a bot that plays uniformly random legal moves.
+def random_mover(rng):
+    return lambda client, legal: rng.choice(legal)
+
+
+# Play `games` matches at once against the server and return throughput / latency figures.
+async def load_test(games: int, mode: str = "2p", host: str = "127.0.0.1", port: int = 7878,
+                    seed: int = 0) -> dict:
+    seats = 2 if mode == "2p" else 4
+    rng = random.Random(seed)
+    clients = [GameClient(random_mover(random.Random(rng.getrandbits(63))), mode,
+                          game=f"load-{seed}-{i // seats}")
+               for i in range(games * seats)]
+    start = time.perf_counter()
+    results = await asyncio.gather(*(c.play(host, port) for c in clients), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    errors = [r for r in results if isinstance(r, BaseException)]
+    latencies = sorted(t for c in clients for t in c.latencies)
+    moves = sum(c.moves for c in clients)
+
+    def percentile(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else 0.0
+
+    return {
+        "games": games,
+        "finished": sum(1 for c in clients if c.result is not None) // seats,
+        "errors": len(errors),
+        "moves": moves,
+        "seconds": elapsed,
+        "moves_per_sec": moves / elapsed if elapsed else 0.0,
+        "latency_p50_ms": percentile(0.50) * 1000,
+        "latency_p99_ms": percentile(0.99) * 1000,
+        "latency_max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Game server load test")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7878)
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--mode", choices=("2p", "4p"), default="2p")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stats = asyncio.run(load_test(args.games, args.mode, args.host, args.port, args.seed))
+    print(f"{stats['finished']}/{stats['games']} games  {stats['moves']} moves in "
+          f"{stats['seconds']:.1f}s  {stats['moves_per_sec']:.0f} moves/s  "
+          f"latency p50 {stats['latency_p50_ms']:.1f} ms  p99 {stats['latency_p99_ms']:.1f} ms  "
+          f"max {stats['latency_max_ms']:.1f} ms  errors {stats['errors']}")
@@ -0,0 +1,292 @@
+# game_record.py - Compact Binary Game Records for Four Kingdoms Military Chess
+
+# This module stores finished (or in-progress) games in an append-only binary file and reads
+# them back as a stream, so self-play archives stay small and can be scanned without loading.
+
+# A record file starts with the 8-byte FILE_HEADER and is followed by game records:
+#   b"G" or b"P"           record tag: "G" starts from a deployment, "P" from any position
+#   mode                   1 byte, index into MODE_NAMES ("2p", "4p")
+#   deployment             "G": 65 bytes, the type code (board_encoding, 0 = empty) of every
+#                          cell id packed two per byte, low nibble first. Owners are not
+#                          stored: at deployment every piece stands in its owner's zone
+#                          (COLOR_ZONES).
+#                          "P": 129 bytes, the full board_encoding of the starting board, for
+#                          games that start after pieces have left their zones
+#   moves                  2 bytes per move: from cell id, to cell id (both < 129)
+#   0xFF                   end-of-moves marker (never a cell id)
+#   winner                 1 byte: winning alliance, 0 if the game was not decided
+#   plies                  4 bytes, little endian
+#   outcomes               ceil(plies / 2) bytes: the chessboard.Outcome of every move packed
+#                          two per byte, low nibble first
+# Moves are written as they are played; the outcomes follow in the trailer, so a game that was
+# cut off (crash, still being played) simply has no trailer and is skipped by the reader.
+# A game costs 73 bytes (137 from a position) plus 2.5 bytes per ply.
+
+import mmap
+import os
+
+from board_encoding import (
+    CELLS, CELL_ID, NUM_CELLS, OWNER_CODE, OWNER_SHIFT, TYPE_MASK, encode_board, decode_board,
+)
+from constants import COLOR_ZONES
+from movegen import legal_moves, resolve_eliminations, next_side, skip_stuck_side
+
+FILE_HEADER = b"SGREC\x00\x01\x00"   # magic, format version 1
+GAME_TAG = b"G"
+POSITION_TAG = b"P"
+END_OF_MOVES = 0xFF
+MODE_NAMES = ("2p", "4p")
+DEPLOYMENT_BYTES = (NUM_CELLS + 1) // 2
+_SETUP_BYTES = {GAME_TAG: DEPLOYMENT_BYTES, POSITION_TAG: NUM_CELLS}
+_TRAILER = 5   # winner + plies
+
+
+# Owner code of the deployment zone of every cell id (None for the center)
+def _zone_owner(x: int, y: int):
+    for owner, (x1, y1, x2, y2) in COLOR_ZONES.items():
+        if x1 <= x <= x2 and y1 <= y <= y2:
+            return OWNER_CODE[owner]
+    return None
+
+
+ZONE_OWNER = tuple(_zone_owner(x, y) for x, y in CELLS)
+
+
+# Pack the type codes of an encoded deployment (board_encoding.encode_board) into nibbles.
+def pack_deployment(code: bytes) -> bytes:
+    types = [0] * (2 * DEPLOYMENT_BYTES)
+    for cid, c in enumerate(code):
+        if c:
+            if (c >> OWNER_SHIFT) & 0x03 != ZONE_OWNER[cid]:
+                raise ValueError(f"Piece at cell {CELLS[cid]} is outside its owner's zone")
+            types[cid] = c & TYPE_MASK
+    return bytes(types[i] | types[i + 1] << 4 for i in range(0, len(types), 2))
+
+
+# Inverse of pack_deployment: an encoded board with owners taken from the zones and every
+# piece revealed.
+def unpack_deployment(packed) -> bytes:
+    code = bytearray(NUM_CELLS)
+    for cid in range(NUM_CELLS):
+        t = packed[cid >> 1] >> (4 * (cid & 1)) & 0x0F
+        if t:
+            code[cid] = t | ZONE_OWNER[cid] << OWNER_SHIFT | 0x40
+    return bytes(code)
+
+
+# Pack a list of Outcome values two per byte.
+def pack_outcomes(outcomes) -> bytes:
+    out = bytearray((len(outcomes) + 1) // 2)
+    for i, o in enumerate(outcomes):
+        out[i >> 1] |= int(o) << (4 * (i & 1))
+    return bytes(out)
+
+
+class GameRecord:
+    # mode: "2p" or "4p"; setup: encoded starting board; moves: (x1, y1, x2, y2) tuples;
+    # outcomes: chessboard.Outcome per move; winner: alliance or 0
+    def __init__(self, mode: str, setup: bytes, moves, outcomes, winner: int = 0):
+        self.mode = mode
+        self.setup = setup
+        self.moves = moves
+        self.outcomes = outcomes
+        self.winner = winner
+
+    @property
+    def plies(self) -> int:
+        return len(self.moves)
+
+    # The starting position as a ChessBoard with the mode's alliance map.
+    def initial_board(self):
+        from selfplay import MODES
+        return decode_board(self.setup, MODES[self.mode][1])
+
+    # Yield (board, side to move, move, outcome) before every move. The board is the same
+    # ChessBoard object throughout; the move is applied when the generator resumes.
+    # Eliminated and stuck sides are removed as in selfplay.play_game.
+    def positions(self):
+        from selfplay import MODES
+        turn_order = MODES[self.mode][0]
+        board = self.initial_board()
+        sides = resolve_eliminations(board, list(turn_order))
+        side = turn_order[0]
+        for move, outcome in zip(self.moves, self.outcomes):
+            while not legal_moves(board, side):
+                side, sides = skip_stuck_side(board, turn_order, sides, side)
+            yield board, side, move, outcome
+            board.apply_move(*move)
+            sides = resolve_eliminations(board, sides)
+            side = next_side(turn_order, side, sides)
+
+    # Yield the board after every move (the same ChessBoard object, updated in place).
+    def replay(self):
+        previous = None
+        for board, _, _, _ in self.positions():
+            if previous is not None:
+                yield previous
+            previous = board
+        if previous is not None:
+            yield previous
+
+
+class GameRecordWriter:
+    # Appends to `path`, creating it (with the file header) if needed.
+    # Use begin_game / add_move / end_game while a game is played, or write_game for a
+    # finished one. flush() pushes everything written so far to disk.
+    # A game left without its trailer by an earlier writer is cut off first, so the new games
+    # follow the last complete one.
+    def __init__(self, path: str):
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new:
+            with GameRecordReader(path) as reader:
+                end = reader.end_of_games()
+            if end < os.path.getsize(path):
+                os.truncate(path, end)
+        self.file = open(path, "ab")
+        if new:
+            self.file.write(FILE_HEADER)
+        self.outcomes = None
+
+    def begin_game(self, board_or_code, mode: str) -> None:
+        if self.outcomes is not None:
+            raise RuntimeError("end_game() the current game first")
+        code = board_or_code if isinstance(board_or_code, (bytes, bytearray)) else encode_board(board_or_code)
+        try:
+            record = GAME_TAG + bytes((MODE_NAMES.index(mode),)) + pack_deployment(code)
+        except ValueError:
+            # pieces outside their zones: store the whole board
+            record = POSITION_TAG + bytes((MODE_NAMES.index(mode),)) + bytes(code)
+        self.file.write(record)
+        self.outcomes = []
+
+    def add_move(self, move, outcome) -> None:
+        x1, y1, x2, y2 = move
+        self.file.write(bytes((CELL_ID[(x1, y1)], CELL_ID[(x2, y2)])))
+        self.outcomes.append(outcome)
+
+    # Drop the last move of the current game (the file is cut back by one move).
+    def undo_move(self) -> None:
+        if not self.outcomes:
+            return
+        self.outcomes.pop()
+        self.file.flush()
+        self.file.truncate(os.fstat(self.file.fileno()).st_size - 2)
+        self.file.seek(0, os.SEEK_END)
+
+    def end_game(self, winner: int | None = 0) -> None:
+        n = len(self.outcomes)
+        self.file.write(bytes((END_OF_MOVES, winner or 0)) + n.to_bytes(4, "little")
+                        + pack_outcomes(self.outcomes))
+        self.outcomes = None
+        self.file.flush()
+
+    def write_game(self, setup, mode: str, moves, outcomes, winner: int | None = 0) -> None:
+        self.begin_game(setup, mode)
+        self.file.write(b"".join(bytes((CELL_ID[(m[0], m[1])], CELL_ID[(m[2], m[3])]))
+                                 for m in moves))
+        self.outcomes = list(outcomes)
+        self.end_game(winner)
+
+    def flush(self) -> None:
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GameRecordReader:
+    # Memory-maps `path` and iterates its complete games in file order. Only the bytes of the
+    # games actually decoded are touched, so archives of millions of games can be scanned
+    # (scan() does not decode moves at all).
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if self.data[:len(FILE_HEADER)] != FILE_HEADER:
+            raise ValueError(f"{path} is not a game record file")
+
+    # Yield (offset, mode, winner, plies) of every complete game, skipping over the moves
+    # with a single find for the end-of-moves marker. Stops at the first incomplete game.
+    def scan(self):
+        data = self.data
+        pos = len(FILE_HEADER)
+        end = len(data)
+        while pos + 2 <= end and data[pos:pos + 1] in _SETUP_BYTES:
+            head = 2 + _SETUP_BYTES[data[pos:pos + 1]]
+            if pos + head > end:
+                return
+            marker = data.find(b"\xff", pos + head)
+            if marker < 0 or marker + 1 + _TRAILER > end:
+                return
+            plies = int.from_bytes(data[marker + 2:marker + 6], "little")
+            after = self._after(pos, plies)
+            if marker - pos - head != 2 * plies or after > end:
+                return
+            yield pos, MODE_NAMES[data[pos + 1]], data[marker + 1], plies
+            pos = after
+
+    # Offset just past the last complete game.
+    def end_of_games(self) -> int:
+        end = len(FILE_HEADER)
+        for offset, _, _, plies in self.scan():
+            end = self._after(offset, plies)
+        return end
+
+    def _head(self, offset: int) -> int:
+        return 2 + _SETUP_BYTES[self.data[offset:offset + 1]]
+
+    def _after(self, offset: int, plies: int) -> int:
+        return offset + self._head(offset) + 2 * plies + 1 + _TRAILER + (plies + 1) // 2
+
+    # Encoded starting board of the game at `offset`.
+    def setup(self, offset: int) -> bytes:
+        start = offset + self._head(offset)
+        if self.data[offset:offset + 1] == POSITION_TAG:
+            return bytes(self.data[offset + 2:start])
+        return unpack_deployment(self.data[offset + 2:start])
+
+    # Encoded starting board of the game at `offset` if it starts from a deployment (every
+    # piece in its own zone), else None.
+    def deployment(self, offset: int) -> bytes | None:
+        if self.data[offset:offset + 1] != GAME_TAG:
+            return None
+        return self.setup(offset)
+
+    # Decode the game starting at `offset` (as returned by scan()).
+    def read(self, offset: int) -> GameRecord:
+        data = self.data
+        start = offset + self._head(offset)
+        marker = data.find(b"\xff", start)
+        raw = data[start:marker]
+        moves = [CELLS[raw[i]] + CELLS[raw[i + 1]] for i in range(0, len(raw), 2)]
+        plies = len(moves)
+        packed = data[marker + 1 + _TRAILER:marker + 1 + _TRAILER + (plies + 1) // 2]
+        outcomes = [packed[i >> 1] >> (4 * (i & 1)) & 0x0F for i in range(plies)]
+        return GameRecord(MODE_NAMES[data[offset + 1]], self.setup(offset), moves, outcomes, data[marker + 1])
+
+    def __iter__(self):
+        for offset, *_ in self.scan():
+            yield self.read(offset)
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Iterate the games of a record file.
+def read_games(path: str):
+    with GameRecordReader(path) as reader:
+        yield from reader
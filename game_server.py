@@ -0,0 +1,318 @@
+# game_server.py - Asyncio Game Server for Four Kingdoms Military Chess
+
+# This module hosts many simultaneous games over TCP in a single asyncio process, so bots can
+# play each other (and humans) without the GUI.
+
+# - Every match has its own ChessBoard, its own fog-of-war view per seat (ChessBoard.observe)
+#   and a chess clock per seat (time bank plus increment). A seat that runs out of time,
+#   resigns or disconnects is removed from the board like an eliminated side.
+# - Pieces start face down. The survivor of a fight becomes revealed, as in features.py.
+# - Players only ever receive their own Observation: the full view when the match starts,
+#   then only the cells that changed in it after every move.
+# - Finished games can be appended to a binary game record file (game_record.py).
+
+# Protocol: one JSON object per line (UTF-8, "\n" terminated) in both directions.
+# Client -> server
+#   {"op": "join", "mode": "2p"}                   queue for the next free match of that mode
+#   {"op": "join", "mode": "2p", "game": "name"}   meet other players in the named match
+#   {"op": "move", "move": [x1, y1, x2, y2]}
+#   {"op": "resign"}
+# Server -> client
+#   {"type": "start", "game": id, "mode": m, "side": s, "seats": [...], "view": hex,
+#    "clock": seconds}                              view = Observation.codes as hex
+#   {"type": "turn", "side": s, "ply": n, "legal": [[x1, y1, x2, y2], ...], "clock": seconds}
+#                                                   sent to the seat that has to move
+#   {"type": "update", "ply": n, "side": s, "move": [...], "outcome": o,
+#    "diff": [[cell_id, code], ...], "out": [sides removed]}
+#   {"type": "end", "winner": alliance or null, "reason": "win" | "max_plies", "plies": n}
+#   {"type": "error", "message": text}
+# game_client.py has a client and a load-test driver.
+
+# Usage:
+#     python game_server.py --port 7878 --clock 300 --increment 2
+
+import asyncio
+import itertools
+import json
+import random
+
+from board_encoding import NUM_CELLS, decode_board
+from game_record import GameRecordWriter
+from movegen import legal_moves, resolve_eliminations, winning_alliance, next_side, skip_stuck_side
+from selfplay import MODES, make_setup, reveal_survivor
+
+
+# Cells of `new` that differ from `old` as [cell id, code] pairs.
+def view_diff(old: bytes, new: bytes) -> list:
+    if old == new:
+        return []
+    return [[cid, new[cid]] for cid in range(NUM_CELLS) if old[cid] != new[cid]]
+
+
+class Seat:
+    def __init__(self, writer):
+        self.writer = writer
+        self.side = None
+        self.match = None
+        self.joined = False
+        self.view = b""
+        self.clock = 0.0
+        self.moves = asyncio.Queue()   # moves (tuples) or None for resign / disconnect
+        self.connected = True
+
+    async def send(self, message: dict) -> None:
+        if not self.connected:
+            return
+        try:
+            self.writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+            await self.writer.drain()
+        except (ConnectionError, RuntimeError):
+            self.connected = False
+
+
+class Match:
+    def __init__(self, match_id: int, mode: str, seats, setup: bytes, clock: float,
+                 increment: float, max_plies: int):
+        self.id = match_id
+        self.mode = mode
+        self.turn_order, alliance_map = MODES[mode]
+        self.setup = setup
+        self.board = decode_board(setup, alliance_map)
+        for row in self.board.grid:
+            for p in row:
+                if p is not None:
+                    p.revealed = False
+        self.board.touch()
+        self.seats = dict(zip(self.turn_order, seats))
+        for side, seat in self.seats.items():
+            seat.side, seat.match, seat.clock = side, self, clock
+        self.increment = increment
+        self.max_plies = max_plies
+        self.to_move = None
+        self.moves, self.outcomes = [], []
+        self.winner = None
+        self.forfeit_at = None   # ply of the first forfeit, if any
+
+    # Take a seat out of the game and clear its pieces from the board.
+    def _forfeit(self, side: str, sides: list) -> list:
+        board = self.board
+        for y, row in enumerate(board.grid):
+            for x, p in enumerate(row):
+                if p is not None and p.owner == side:
+                    board.remove_piece(x, y)
+        return [s for s in sides if s != side]
+
+    async def _broadcast(self, message: dict) -> None:
+        await asyncio.gather(*(seat.send(message) for seat in self.seats.values()))
+
+    # Send every seat its view diff after a move (or forfeit) by `side`.
+    async def _update(self, side, move, outcome, out) -> None:
+        sends = []
+        for s, seat in self.seats.items():
+            view = self.board.observe(s).codes
+            diff = view_diff(seat.view, view)
+            seat.view = view
+            sends.append(seat.send({"type": "update", "ply": len(self.moves), "side": side,
+                                    "move": move, "outcome": outcome, "diff": diff, "out": out}))
+        await asyncio.gather(*sends)
+
+    # Wait for a legal move of `side`, charging its clock. Returns None on forfeit.
+    async def _next_move(self, side: str, legal: list):
+        seat = self.seats[side]
+        legal_set = set(legal)
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            try:
+                move = await asyncio.wait_for(seat.moves.get(), timeout=max(seat.clock, 0.0))
+            except asyncio.TimeoutError:
+                seat.clock = 0.0
+                return None
+            seat.clock -= loop.time() - start
+            if move is None:
+                return None
+            if move in legal_set:
+                seat.clock += self.increment
+                return move
+            await seat.send({"type": "error", "message": f"illegal move {list(move)}"})
+
+    async def run(self) -> None:
+        board = self.board
+        for side, seat in self.seats.items():
+            seat.view = board.observe(side).codes
+            await seat.send({"type": "start", "game": self.id, "mode": self.mode, "side": side,
+                             "seats": list(self.turn_order), "view": seat.view.hex(),
+                             "clock": seat.clock})
+        sides = resolve_eliminations(board, list(self.turn_order))
+        side = self.turn_order[0] if winning_alliance(board, sides) is None else None
+        while side is not None and len(self.moves) < self.max_plies:
+            legal = legal_moves(board, side)
+            if not legal:
+                stuck = side
+                side, sides = skip_stuck_side(board, self.turn_order, sides, side)
+                await self._update(stuck, None, None, [stuck])
+                continue
+            self.to_move = side
+            seat = self.seats[side]
+            await seat.send({"type": "turn", "side": side, "ply": len(self.moves),
+                             "legal": legal, "clock": seat.clock})
+            move = await self._next_move(side, legal)
+            self.to_move = None
+            if move is None:
+                if self.forfeit_at is None:
+                    self.forfeit_at = len(self.moves)
+                remaining = self._forfeit(side, sides)
+                outcome = None
+            else:
+                outcome = board.apply_move(*move)
+                reveal_survivor(board, move, outcome)
+                self.moves.append(move)
+                self.outcomes.append(outcome)
+                remaining = resolve_eliminations(board, sides)
+            out = [s for s in sides if s not in remaining]
+            await self._update(side, move and list(move), None if outcome is None else int(outcome), out)
+            if not remaining or winning_alliance(board, remaining) is not None:
+                side = None
+            else:
+                side = next_side(self.turn_order, side, remaining)
+            sides = remaining
+        self.winner = winning_alliance(board, sides) if sides else None
+        await self._broadcast({"type": "end", "winner": self.winner,
+                               "reason": "win" if self.winner is not None else "max_plies",
+                               "plies": len(self.moves)})
+
+
+class GameServer:
+    # clock: time bank per seat in seconds; increment: seconds added after each move.
+    # record: optional game record file that finished games are appended to.
+    def __init__(self, clock: float = 300.0, increment: float = 0.0, max_plies: int = 2000,
+                 book=None, record: str | None = None, seed: int | None = None):
+        self.clock = clock
+        self.increment = increment
+        self.max_plies = max_plies
+        self.book = book
+        self.rng = random.Random(seed)
+        self.writer = GameRecordWriter(record) if record else None
+        self.waiting = {}             # (mode, name) -> seats waiting for the match to fill up
+        self.matches = {}             # match id -> running Match
+        self.ids = itertools.count(1)
+        self.finished = 0
+
+    def _start_match(self, mode: str, seats) -> None:
+        random.seed(self.rng.getrandbits(63))
+        match = Match(next(self.ids), mode, seats, make_setup(mode, self.book), self.clock,
+                      self.increment, self.max_plies)
+        self.matches[match.id] = match
+        asyncio.get_running_loop().create_task(self._run_match(match))
+
+    async def _run_match(self, match: Match) -> None:
+        try:
+            await match.run()
+        finally:
+            del self.matches[match.id]
+            self.finished += 1
+            # Game records have no forfeit entry, so only games that a forfeit did not
+            # cut short can be replayed from their moves
+            if self.writer is not None and match.forfeit_at in (None, len(match.moves)):
+                self.writer.write_game(match.setup, match.mode, match.moves, match.outcomes,
+                                       match.winner)
+            for seat in match.seats.values():
+                if seat.connected:
+                    seat.writer.close()
+
+    def _join(self, seat: Seat, request: dict) -> str | None:
+        mode = request.get("mode", "2p")
+        if mode not in MODES:
+            return f"unknown mode {mode!r}"
+        key = (mode, request.get("game"))
+        queue = self.waiting.setdefault(key, [])
+        queue.append(seat)
+        if len(queue) == len(MODES[mode][0]):
+            del self.waiting[key]
+            self._start_match(mode, queue)
+        return None
+
+    def _leave(self, seat: Seat) -> None:
+        for key, queue in list(self.waiting.items()):
+            if seat in queue:
+                queue.remove(seat)
+                if not queue:
+                    del self.waiting[key]
+
+    # One client connection: a join request, then moves until the match ends.
+    async def handle(self, reader, writer) -> None:
+        seat = Seat(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    op = request["op"]
+                except (ValueError, KeyError, TypeError):
+                    await seat.send({"type": "error", "message": "bad request"})
+                    continue
+                if op == "join" and not seat.joined:
+                    error = self._join(seat, request)
+                    seat.joined = error is None
+                    if error:
+                        await seat.send({"type": "error", "message": error})
+                elif op == "move" and seat.match is not None:
+                    if seat.match.to_move != seat.side:
+                        await seat.send({"type": "error", "message": "not your turn"})
+                    else:
+                        try:
+                            seat.moves.put_nowait(tuple(int(v) for v in request["move"]))
+                        except (KeyError, TypeError, ValueError):
+                            await seat.send({"type": "error", "message": "bad move"})
+                elif op == "resign" and seat.match is not None:
+                    seat.moves.put_nowait(None)
+                else:
+                    await seat.send({"type": "error", "message": f"unexpected {op!r}"})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            seat.connected = False
+            self._leave(seat)
+            if seat.match is not None:
+                seat.moves.put_nowait(None)
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 7878) -> None:
+        server = await asyncio.start_server(self.handle, host, port, backlog=4096)
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    from selfplay import load_book
+
+    parser = argparse.ArgumentParser(description="Asyncio game server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7878)
+    parser.add_argument("--clock", type=float, default=300.0, help="time bank per seat (seconds)")
+    parser.add_argument("--increment", type=float, default=0.0, help="seconds added per move")
+    parser.add_argument("--max-plies", type=int, default=2000)
+    parser.add_argument("--book",
+                        help="setup book file (setup_book.py, or hex-encoded boards one per line)")
+    parser.add_argument("--record", help="append finished games to this game record file")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    server = GameServer(args.clock, args.increment, args.max_plies,
+                        load_book(args.book) if args.book else None, args.record, args.seed)
+    print(f"serving on {args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
@@ -82,7 +82,7 @@ class GameState:
             for c in range(game.board.cols):
                 p = game.board.get_piece(c, r)
                 if p and p.owner == color:
-                    game.board.grid[r][c] = None
+                    game.board.remove_piece(c, r)
         # If the eliminated side was about to play, skip their turn
         if COLORS[self.current_turn_index] == color:
             self.next_turn()
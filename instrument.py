@@ -0,0 +1,302 @@
+# instrument.py - Optional Rules-Engine Instrumentation for Four Kingdoms Military Chess
+
+# This module counts calls and accumulates time in the hot methods of ChessBoard, GameState
+# and BeliefSampler (plus the functions a search calls directly: movegen.legal_moves,
+# movegen.reachable_cells and belief_sampler.sample_assignment), and keeps histograms of
+#   bfs_expansions   cells expanded per engineer rail BFS, in ChessBoard.clear_path and in
+#                    movegen.reachable_cells (the move generator of the AI searches)
+#   ipf_iterations   iterations per BeliefSampler._normalize_and_constrain
+#   ipf_cells        cells normalized per _normalize_and_constrain
+#   samples_drawn    hidden pieces assigned per sample_state / sample_assignment
+# so a live AI turn can be broken down without attaching cProfile.
+
+# Nothing is wrapped until enable() is called: it replaces the methods on the classes (and
+# the functions in every loaded module that imported them) with timing wrappers; disable()
+# puts the originals back. Disabled, the engine runs the original code with no extra cost.
+# Stats are per process: workers forked by a process pool count in their own copy.
+
+#     import instrument
+#     with instrument.enabled():
+#         agent.select_move(board, side, turn_order)
+#     print(instrument.format_stats(instrument.snapshot()))
+
+import sys
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from functools import wraps
+
+import belief_sampler
+import chessboard
+import movegen
+from belief_sampler import BeliefSampler
+from chessboard import ChessBoard
+from game_state import GameState
+
+
+# Calls, total and slowest time of one wrapped method.
+class Stat:
+    __slots__ = ("calls", "seconds", "max_seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+    def as_dict(self) -> dict:
+        return {"calls": self.calls, "seconds": self.seconds,
+                "mean_us": self.seconds / self.calls * 1e6 if self.calls else 0.0,
+                "max_us": self.max_seconds * 1e6}
+
+
+# Exact counts of small non-negative integers, summarized in power-of-two buckets.
+class Histogram:
+    def __init__(self):
+        self.counts = Counter()
+
+    def add(self, value: int) -> None:
+        self.counts[value] += 1
+
+    def as_dict(self) -> dict:
+        count = sum(self.counts.values())
+        total = sum(v * n for v, n in self.counts.items())
+        buckets = Counter()
+        for value, n in self.counts.items():
+            low = 1 << value.bit_length() >> 1
+            buckets[f"{low}-{2 * low - 1}" if low > 1 else str(low)] += n
+        order = sorted(buckets, key=lambda b: int(b.split("-")[0]))
+        return {"count": count, "mean": total / count if count else 0.0,
+                "max": max(self.counts, default=0), "buckets": {b: buckets[b] for b in order}}
+
+
+# Number of get_connections calls made by chessboard.py while instrumented; each one is a
+# cell expanded by the clear_path BFS.
+_expansions = [0]
+_get_connections = chessboard.get_connections
+
+
+def _counting_get_connections(x, y):
+    _expansions[0] += 1
+    return _get_connections(x, y)
+
+
+# Cells expanded by the engineer flood fill of movegen.reachable_cells from (x, y), found by
+# replaying the fill (the probe runs outside the timed call). None for other pieces.
+def _reachable_expansions(token, result, board, x, y):
+    grid = board.grid
+    if grid[y][x].name != "Engineer":
+        return None
+    visited = {(x, y)}
+    queue = deque([(x, y)])
+    while queue:
+        cell = queue.popleft()
+        for n in movegen.RAIL_NEIGHBORS.get(cell, ()):
+            if n not in visited and grid[n[1]][n[0]] is None:
+                visited.add(n)
+                queue.append(n)
+    return len(visited)
+
+
+# Histogram probes: (name, before(*args), after(token, result, *args, **kwargs) -> value);
+# an `after` that returns None records nothing for that call.
+def _ipf_iterations(token, result, self, iterations=5):
+    return iterations
+
+
+_PROBES = {
+    (ChessBoard, "clear_path"): [
+        ("bfs_expansions", lambda *args: _expansions[0],
+         lambda token, result, *args: _expansions[0] - token)],
+    (movegen, "reachable_cells"): [("bfs_expansions", None, _reachable_expansions)],
+    (BeliefSampler, "_normalize_and_constrain"): [
+        ("ipf_iterations", None, _ipf_iterations),
+        ("ipf_cells", None, lambda token, result, self, *args, **kwargs: len(self.beliefs))],
+    (BeliefSampler, "sample_state"): [
+        ("samples_drawn", None, lambda token, result, *args: len(result))],
+    (belief_sampler, "sample_assignment"): [
+        ("samples_drawn", None, lambda token, result, *args, **kwargs: len(result))],
+}
+
+# Methods and functions wrapped by enable()
+TARGETS = {
+    ChessBoard: ("can_move", "move_piece", "apply_move", "make_move", "unmake_move",
+                 "clear_path", "clear_straight_rail_path", "get_all_hidden_positions", "observe"),
+    GameState: ("is_movable", "update_all_movable", "check_elimination", "check_victory"),
+    BeliefSampler: ("initialize_beliefs", "_normalize_and_constrain", "update", "sample_state",
+                    "reset"),
+    movegen: ("legal_moves", "reachable_cells"),
+    belief_sampler: ("sample_assignment",),
+}
+
+_stats: dict[str, Stat] = {}
+_histograms: dict[str, Histogram] = {}
+_installed = []     # (namespace, name, original) for disable()
+
+
+def _wrap(key: str, func, probes):
+    stat = _stats.setdefault(key, Stat())
+    clock = time.perf_counter
+    if not probes:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                stat.calls += 1
+                stat.seconds += elapsed
+                if elapsed > stat.max_seconds:
+                    stat.max_seconds = elapsed
+        return wrapper
+
+    probes = [(_histograms.setdefault(name, Histogram()), before, after)
+              for name, before, after in probes]
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        tokens = [before(*args) if before else None for _, before, _ in probes]
+        start = clock()
+        result = func(*args, **kwargs)
+        elapsed = clock() - start
+        stat.calls += 1
+        stat.seconds += elapsed
+        if elapsed > stat.max_seconds:
+            stat.max_seconds = elapsed
+        for (histogram, _, after), token in zip(probes, tokens):
+            value = after(token, result, *args, **kwargs)
+            if value is not None:
+                histogram.add(value)
+        return result
+    return wrapper
+
+
+def is_enabled() -> bool:
+    return bool(_installed)
+
+
+# Swap the instrumented methods in. Module functions are replaced in their own module and in
+# every loaded module that imported them by name (e.g. mcts.sample_assignment).
+def enable() -> None:
+    if _installed:
+        return
+    for target, names in TARGETS.items():
+        for name in names:
+            key = f"{target.__name__}.{name}"
+            if isinstance(target, type):
+                original = target.__dict__[name]
+                setattr(target, name, _wrap(key, original, _PROBES.get((target, name))))
+                _installed.append((target, name, original))
+                continue
+            original = getattr(target, name)
+            wrapper = _wrap(key, original, _PROBES.get((target, name)))
+            for module in list(sys.modules.values()):
+                if getattr(module, name, None) is original:
+                    setattr(module, name, wrapper)
+                    _installed.append((module, name, original))
+    chessboard.get_connections = _counting_get_connections
+    _installed.append((chessboard, "get_connections", _get_connections))
+
+
+# Put the original methods back. Collected stats are kept until reset().
+def disable() -> None:
+    while _installed:
+        namespace, name, original = _installed.pop()
+        setattr(namespace, name, original)
+
+
+def reset() -> None:
+    for stat in _stats.values():
+        stat.calls = 0
+        stat.seconds = stat.max_seconds = 0.0
+    for histogram in _histograms.values():
+        histogram.counts.clear()
+
+
+# Instrumentation for the duration of a with block (stats are reset on entry).
+@contextmanager
+def enabled():
+    was_enabled = is_enabled()
+    reset()
+    enable()
+    try:
+        yield
+    finally:
+        if not was_enabled:
+            disable()
+
+
+# The collected stats: {"methods": {"Class.method": {calls, seconds, mean_us, max_us}},
+# "histograms": {name: {count, mean, max, buckets}}}, methods that were called only.
+def snapshot() -> dict:
+    return {
+        "methods": {key: stat.as_dict() for key, stat in sorted(_stats.items()) if stat.calls},
+        "histograms": {name: h.as_dict() for name, h in sorted(_histograms.items()) if h.counts},
+    }
+
+
+# Human-readable table of a snapshot, slowest methods first.
+def format_stats(stats: dict) -> str:
+    lines = [f"{'method':<44} {'calls':>9} {'seconds':>9} {'mean us':>9} {'max us':>9}"]
+    methods = sorted(stats["methods"].items(), key=lambda item: -item[1]["seconds"])
+    for key, s in methods:
+        lines.append(f"{key:<44} {s['calls']:>9} {s['seconds']:>9.3f} "
+                     f"{s['mean_us']:>9.1f} {s['max_us']:>9.1f}")
+    for name, h in stats["histograms"].items():
+        buckets = " ".join(f"{b}:{n}" for b, n in h["buckets"].items())
+        lines.append(f"{name}: n={h['count']} mean={h['mean']:.1f} max={h['max']}  {buckets}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import os
+    import random
+
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    from agents import make_agent
+    from constants import MAX_COUNTS
+    from game import Game
+    from selfplay import MODES
+
+    parser = argparse.ArgumentParser(description="Profile one AI turn with the rules-engine counters")
+    parser.add_argument("--agent", default="mcts:iterations=200")
+    parser.add_argument("--mode", choices=sorted(MODES), default="2p")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hidden", action="store_true",
+                        help="hide the enemy pieces and search with a BeliefSampler")
+    parser.add_argument("--json", action="store_true", help="print the snapshot as JSON")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    game = Game()
+    if args.mode == "2p":
+        game.generate_random_setup_red_green()
+    else:
+        game.generate_random_setup()
+    turn_order, alliance_map = MODES[args.mode]
+    board = game.board
+    board.set_alliance_map(alliance_map)
+    side = turn_order[0]
+    agent = make_agent(args.agent, seed=args.seed)
+
+    with enabled():
+        sampler = None
+        if args.hidden:
+            for row in board.grid:
+                for piece in row:
+                    if piece is not None and piece.owner != side:
+                        piece.revealed = False
+            board.touch()
+            sampler = BeliefSampler(board, None, list(MAX_COUNTS), MAX_COUNTS, side)
+        start = time.perf_counter()
+        move = agent.select_move(board, side, turn_order, sampler)
+        elapsed = time.perf_counter() - start
+        stats = snapshot()
+
+    if args.json:
+        print(json.dumps(stats, indent=2))
+    else:
+        print(f"{args.agent}: {side} plays {move} in {elapsed:.2f}s")
+        print(format_stats(stats))
@@ -0,0 +1,428 @@
+# mcts.py - Determinized Monte Carlo Tree Search for Four Kingdoms Military Chess
+
+# This module implements a single-observer, determinized UCT search over hidden information.
+# Every iteration samples a full-information board from the BeliefSampler, descends the shared
+# tree using only the moves that are legal in that sample, expands one node and plays a rollout.
+
+# Besides the plain MCTS class it provides two ways of using several processes:
+# - RootParallelMCTS: N workers each grow their own tree from their own determinizations and
+#   the visit counts of the root moves are summed to pick the move.
+# - LeafParallelMCTS: one tree in the parent process; leaves are selected in batches (with a
+#   virtual loss) and their rollouts are evaluated by a process pool.
+
+# Positions are sent to workers as the compact byte encoding from board_encoding, never as
+# ChessBoard objects. Workers are forked where possible so they inherit the already-built
+# routes.connections topology and movegen tables instead of rebuilding them.
+
+import math
+import multiprocessing as mp
+import random
+import time
+
+from board_encoding import (
+    encode_board, decode_board, CELL_ID, OWNER_CODE, OWNER_SHIFT, TYPE_CODE, REVEALED_BIT,
+)
+from belief_sampler import sample_assignment
+from movegen import legal_moves, resolve_eliminations, winning_alliance, next_side, skip_stuck_side
+from rollout import playout, random_policy
+from transposition import TranspositionTable, hash_board
+
+# Turn order of the Red-Green two-player mode (see two_player_mode.COLORS)
+TWO_PLAYER_ORDER = ("Red", "Green")
+# Largest rollout count kept in a transposition-table entry (its signed-byte depth field)
+TT_MAX_COUNT = 127
+
+
+# Everything a search needs to know about the root, in a small picklable form.
+# `hidden` lists the cells whose piece type is unknown to `side`; `beliefs` and
+# `remaining` are plain-dict snapshots of the BeliefSampler used to fill them in.
+class RootPosition:
+    def __init__(self, code: bytes, side: str, turn_order, alliance_map: dict,
+                 hidden=(), beliefs=None, remaining=None):
+        self.code = code
+        self.side = side
+        self.turn_order = tuple(turn_order)
+        self.alliance_map = dict(alliance_map)
+        self.hidden = tuple(hidden)
+        self.beliefs = beliefs or {}
+        self.remaining = remaining or {}
+
+    # Build the root from a live board. Without a sampler the board is searched as-is
+    # (perfect information); with one, hidden enemy pieces are re-sampled each iteration.
+    @classmethod
+    def from_board(cls, board, side: str, turn_order=TWO_PLAYER_ORDER, sampler=None):
+        hidden = ()
+        beliefs = remaining = None
+        if sampler is not None:
+            hidden = tuple(board.get_all_hidden_positions(side))
+            beliefs = {pos: dict(sampler.beliefs.get(pos, {})) for pos in hidden}
+            remaining = dict(sampler.remaining_counts)
+        return cls(encode_board(board), side, turn_order, board.alliance_map,
+                   hidden, beliefs, remaining)
+
+    # Return a full-information ChessBoard sampled from the beliefs.
+    def determinize(self, rng):
+        if not self.hidden:
+            return decode_board(self.code, self.alliance_map)
+        code = bytearray(self.code)
+        assignment = sample_assignment(self.beliefs, self.remaining, rng)
+        for pos, ptype in assignment.items():
+            cid = CELL_ID[pos]
+            owner_bits = code[cid] & (0x03 << OWNER_SHIFT)
+            code[cid] = TYPE_CODE[ptype] | owner_bits | (code[cid] & REVEALED_BIT)
+        return decode_board(bytes(code), self.alliance_map)
+
+    # Sides that still have pieces on the root board, in turn order.
+    def sides(self):
+        present = {(c >> OWNER_SHIFT) & 0x03 for c in self.code if c}
+        return [s for s in self.turn_order if OWNER_CODE[s] in present]
+
+
+class Node:
+    __slots__ = ("move", "parent", "mover", "children", "visits", "value", "avail")
+
+    def __init__(self, move=None, parent=None, mover=None):
+        self.move = move
+        self.parent = parent
+        self.mover = mover          # Side that played `move` to reach this node
+        self.children = {}          # move -> Node
+        self.visits = 0
+        self.value = 0.0            # Sum of rewards from the point of view of `mover`
+        self.avail = 0              # Times this move was legal when its parent was visited
+
+
+class MCTS:
+    # iterations: number of determinized iterations per search (ignored if time_limit is set)
+    # exploration: UCB exploration constant
+    # rollout_depth: plies played in a rollout before it is scored as unfinished
+    # rollout_policy: callable(board, side, moves, rng) -> move
+    # evaluator: callable(board, alliance) -> value in [0, 1] for unfinished rollouts
+    # rollout_depth and evaluator default to the policy's own `depth` / `evaluate`
+    # attributes when it has them (see rollout.HeuristicRolloutPolicy), else 200 / 0.5
+    # tt: optional TranspositionTable; a newly expanded node whose position was already
+    #     reached through another move order starts from that position's rollout statistics
+    #     (at most tt_prior_visits pseudo-visits). The entry keeps the mean reward and the
+    #     rollout count in its depth field, capped at TT_MAX_COUNT: past that many rollouts
+    #     each new result gets weight 1 / (TT_MAX_COUNT + 1), a running average of about the
+    #     last 128 results rather than the mean of all of them
+    # progress: optional callable(info dict) called after every iteration of run() with the
+    #     iterations done and seconds spent so far (throttle inside the callback if needed)
+    def __init__(self, iterations: int = 1000, exploration: float = 1.4,
+                 rollout_depth: int | None = None, rollout_policy=random_policy,
+                 evaluator=None, time_limit: float | None = None, seed=None,
+                 tt: TranspositionTable | None = None, tt_prior_visits: int = 8, progress=None):
+        self.iterations = iterations
+        self.exploration = exploration
+        if rollout_depth is None:
+            rollout_depth = getattr(rollout_policy, "depth", 200)
+        if evaluator is None:
+            evaluator = getattr(rollout_policy, "evaluate", None)
+        self.rollout_depth = rollout_depth
+        self.rollout_policy = rollout_policy
+        self.evaluator = evaluator
+        self.time_limit = time_limit
+        self.rng = random.Random(seed)
+        self.tt = tt
+        self.tt_prior_visits = tt_prior_visits
+        self.progress = progress
+
+    # Return the best move for `side`, or None if it has no legal move.
+    def search(self, board, side: str, sampler=None, turn_order=TWO_PLAYER_ORDER):
+        root = RootPosition.from_board(board, side, turn_order, sampler)
+        tree = self.run(root, self.iterations, self.time_limit)
+        return best_move(root_statistics(tree))
+
+    # Grow a tree from `root` and return its root node.
+    def run(self, root: RootPosition, iterations: int, time_limit=None) -> Node:
+        tree = Node(mover=None)
+        alliance = root.alliance_map.get(root.side)
+        start = time.perf_counter()
+        deadline = start + time_limit if time_limit else None
+        done = 0
+        while done < iterations or deadline:
+            if deadline and time.perf_counter() >= deadline:
+                break
+            board = root.determinize(self.rng)
+            path, side, sides = self.select(tree, board, root)
+            prior = self.tt_prior(path[-1], board, side)
+            reward = self.rollout(board, side, sides, root.turn_order, alliance)
+            backpropagate(path, reward, alliance, root.alliance_map)
+            self.tt_record(prior, path[-1], reward, alliance, root.alliance_map)
+            done += 1
+            if self.progress is not None:
+                self.progress({"iterations": done, "seconds": time.perf_counter() - start})
+        return tree
+
+    # If `leaf` was just expanded, seed it from the transposition table.
+    # Returns (key, mean, count) for tt_record, or None if the table is not used for this leaf.
+    def tt_prior(self, leaf: Node, board, side, virtual_loss: int = 0):
+        if self.tt is None or side is None or leaf.mover is None or leaf.visits != virtual_loss:
+            return None
+        key = hash_board(board, side)
+        entry = self.tt.probe(key)
+        if entry is None:
+            return key, 0.0, 0
+        mean, count = entry[0], entry[1]
+        prior = min(count, self.tt_prior_visits)
+        leaf.visits += prior
+        leaf.value += mean * prior
+        return key, mean, count
+
+    # Fold one rollout result into the table entry of `leaf` (mean reward for its mover).
+    def tt_record(self, prior, leaf: Node, reward: float, alliance, alliance_map: dict) -> None:
+        if prior is None:
+            return
+        key, mean, count = prior
+        if alliance_map.get(leaf.mover) != alliance:
+            reward = 1.0 - reward
+        count = min(count, TT_MAX_COUNT)
+        self.tt.store(key, (mean * count + reward) / (count + 1), min(count + 1, TT_MAX_COUNT))
+
+    # Descend from the root on `board`, expanding one new node.
+    # Returns the visited path and the (side to move, remaining sides) at the leaf.
+    def select(self, tree: Node, board, root: RootPosition, virtual_loss: int = 0):
+        node = tree
+        side = root.side
+        sides = root.sides()
+        path = [node]
+        while side is not None:
+            moves = legal_moves(board, side)
+            if not moves:
+                side, sides = skip_stuck_side(board, root.turn_order, sides, side)
+                continue
+            children = node.children
+            untried = [m for m in moves if m not in children]
+            for m in moves:
+                child = children.get(m)
+                if child is not None:
+                    child.avail += 1
+            if untried:
+                move = self.rng.choice(untried)
+                child = children[move] = Node(move, node, side)
+                child.avail = 1
+            else:
+                child = self.ucb_child(node, moves)
+            board.apply_move(*child.move)
+            node = child
+            path.append(node)
+            if virtual_loss:
+                node.visits += virtual_loss
+            sides = resolve_eliminations(board, sides)
+            side = None if winning_alliance(board, sides) is not None else next_side(root.turn_order, side, sides)
+            if untried:
+                break
+        return path, side, sides
+
+    # Pick the child with the highest UCB score among the moves legal in this determinization.
+    def ucb_child(self, node: Node, moves) -> Node:
+        best, best_score = None, -math.inf
+        c = self.exploration
+        for m in moves:
+            child = node.children[m]
+            score = child.value / child.visits + c * math.sqrt(math.log(child.avail) / child.visits)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    # Play out the game from `board` and score it for `alliance` in [0, 1].
+    def rollout(self, board, side, sides, turn_order, alliance) -> float:
+        return playout(board, side, sides, turn_order, alliance, self.rollout_policy,
+                       self.rollout_depth, self.evaluator, self.rng)
+
+
+# Add a rollout result to every node on the path.
+def backpropagate(path, reward: float, alliance, alliance_map: dict) -> None:
+    for node in path:
+        node.visits += 1
+        if node.mover is not None:
+            node.value += reward if alliance_map.get(node.mover) == alliance else 1.0 - reward
+
+
+# Return {move: (visits, value)} for the children of a root node.
+def root_statistics(tree: Node) -> dict:
+    return {m: (c.visits, c.value) for m, c in tree.children.items()}
+
+
+# Merge root statistics from several trees by summing visits and values.
+def merge_statistics(stats_list) -> dict:
+    merged = {}
+    for stats in stats_list:
+        for move, (visits, value) in stats.items():
+            v, w = merged.get(move, (0, 0.0))
+            merged[move] = (v + visits, w + value)
+    return merged
+
+
+# The most visited move (ties broken by value), or None if there are no statistics.
+def best_move(stats: dict):
+    if not stats:
+        return None
+    return max(stats, key=lambda m: stats[m])
+
+
+# ---------------------------------------------------------------------------
+# Multi-process search
+# ---------------------------------------------------------------------------
+
+# Per-process search configuration, installed by _init_worker
+_worker_search: MCTS | None = None
+
+
+# Pool initializer: keep one MCTS instance (and its rollout policy) per worker.
+# tt_config, if given, builds the worker's own empty transposition table.
+def _init_worker(search_kwargs: dict, tt_config: dict | None = None) -> None:
+    global _worker_search
+    if tt_config is not None:
+        search_kwargs = dict(search_kwargs, tt=TranspositionTable(**tt_config))
+    _worker_search = MCTS(**search_kwargs)
+
+
+# Root parallelism task: grow a private tree and return its root statistics.
+def _root_task(args):
+    root, iterations, time_limit, seed = args
+    _worker_search.rng.seed(seed)
+    return root_statistics(_worker_search.run(root, iterations, time_limit))
+
+
+# Leaf parallelism task: play one rollout from an encoded leaf position.
+def _rollout_task(args):
+    code, alliance_map, side, sides, turn_order, alliance, seed = args
+    _worker_search.rng.seed(seed)
+    board = decode_board(code, alliance_map)
+    return _worker_search.rollout(board, side, sides, turn_order, alliance)
+
+
+# Start-method context: fork shares the imported topology, spawn is the portable fallback.
+def _pool_context():
+    methods = mp.get_all_start_methods()
+    return mp.get_context("fork" if "fork" in methods else "spawn")
+
+
+class RootParallelMCTS(MCTS):
+    # Root parallelism: `workers` processes each run `iterations` determinized iterations
+    # on their own tree; root visit counts are summed. The pool stays alive between
+    # searches, so use close() (or a with-block) when done.
+    # A transposition table passed as `tt` is not shared: each worker gets its own
+    # table of the same size.
+    worker_tables = True
+
+    def __init__(self, workers: int = 2, **kwargs):
+        super().__init__(**kwargs)
+        self.workers = workers
+        worker_kwargs = dict(kwargs)
+        worker_kwargs.pop("seed", None)
+        worker_kwargs.pop("progress", None)
+        tt = worker_kwargs.pop("tt", None)
+        tt_config = tt.config() if tt is not None and self.worker_tables else None
+        self.pool = _pool_context().Pool(workers, _init_worker, (worker_kwargs, tt_config))
+
+    def search(self, board, side: str, sampler=None, turn_order=TWO_PLAYER_ORDER):
+        root = RootPosition.from_board(board, side, turn_order, sampler)
+        return best_move(self.search_root(root))
+
+    # Run the workers on `root` and return the merged root statistics.
+    def search_root(self, root: RootPosition) -> dict:
+        tasks = [(root, self.iterations, self.time_limit, self.rng.getrandbits(64))
+                 for _ in range(self.workers)]
+        return merge_statistics(self.pool.map(_root_task, tasks))
+
+    def close(self) -> None:
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LeafParallelMCTS(RootParallelMCTS):
+    # Leaf parallelism: a single tree in this process; `batch_size` leaves are selected
+    # with a virtual loss and their rollouts run in the pool together. The transposition
+    # table, if any, stays in this process with the tree.
+    worker_tables = False
+
+    def __init__(self, workers: int = 2, batch_size: int | None = None, **kwargs):
+        super().__init__(workers, **kwargs)
+        self.batch_size = batch_size or workers
+
+    def search_root(self, root: RootPosition) -> dict:
+        return root_statistics(self.run(root, self.iterations, self.time_limit))
+
+    def run(self, root: RootPosition, iterations: int, time_limit=None) -> Node:
+        tree = Node(mover=None)
+        alliance = root.alliance_map.get(root.side)
+        deadline = time.perf_counter() + time_limit if time_limit else None
+        done = 0
+        while done < iterations or deadline:
+            if deadline and time.perf_counter() >= deadline:
+                break
+            batch = min(self.batch_size, iterations - done) if not deadline else self.batch_size
+            paths, priors, tasks = [], [], []
+            for _ in range(batch):
+                board = root.determinize(self.rng)
+                path, side, sides = self.select(tree, board, root, virtual_loss=1)
+                priors.append(self.tt_prior(path[-1], board, side, virtual_loss=1))
+                paths.append(path)
+                tasks.append((encode_board(board), root.alliance_map, side, sides,
+                              root.turn_order, alliance, self.rng.getrandbits(64)))
+            rewards = self.pool.map(_rollout_task, tasks)
+            for path, prior, reward in zip(paths, priors, rewards):
+                for node in path[1:]:
+                    node.visits -= 1
+                backpropagate(path, reward, alliance, root.alliance_map)
+                self.tt_record(prior, path[-1], reward, alliance, root.alliance_map)
+            done += batch
+        return tree
+
+
+# ---------------------------------------------------------------------------
+# Scaling benchmark
+# ---------------------------------------------------------------------------
+
+# Measure root-parallel iterations per second for 1..max_workers processes on a fixed
+# random Red-Green deployment. Each worker runs `iterations` iterations, so ideal scaling
+# keeps the wall time constant while the total throughput grows with the worker count.
+def scaling_benchmark(max_workers: int, iterations: int = 50, rollout_depth: int = 100,
+                      seed: int = 0) -> list[dict]:
+    from game import Game
+    random.seed(seed)
+    game = Game()
+    game.generate_random_setup_red_green()
+    game.board.set_alliance_map({"Red": 1, "Green": 2})
+    root = RootPosition.from_board(game.board, "Red")
+
+    results = []
+    for n in range(1, max_workers + 1):
+        with RootParallelMCTS(workers=n, iterations=iterations,
+                              rollout_depth=rollout_depth, seed=seed) as search:
+            search.search_root(root)  # warm up the pool
+            start = time.perf_counter()
+            stats = search.search_root(root)
+            elapsed = time.perf_counter() - start
+        total = sum(v for v, _ in stats.values())
+        results.append({"workers": n, "iterations": total, "seconds": elapsed,
+                        "iterations_per_sec": total / elapsed})
+    base = results[0]["iterations_per_sec"]
+    for r in results:
+        r["speedup"] = r["iterations_per_sec"] / base
+        r["efficiency"] = r["speedup"] / r["workers"]
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description="Root-parallel MCTS scaling benchmark")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--iterations", type=int, default=50, help="iterations per worker")
+    parser.add_argument("--rollout-depth", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'iters':>7} {'seconds':>8} {'iter/s':>9} {'speedup':>8} {'eff':>6}")
+    for r in scaling_benchmark(args.workers, args.iterations, args.rollout_depth, args.seed):
+        print(f"{r['workers']:>7} {r['iterations']:>7} {r['seconds']:>8.2f} "
+              f"{r['iterations_per_sec']:>9.1f} {r['speedup']:>8.2f} {r['efficiency']:>6.2f}")
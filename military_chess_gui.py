@@ -3,62 +3,52 @@ import sys
 from game import Game
 from game_state import game_state
 from two_player_mode import two_player_mode
+from board_encoding import encode_board
+from game_record import GameRecordWriter
+from snapshot import save_snapshot
+from ai_worker import AIWorker, AI_MOVE, AI_PROGRESS
+from belief_sampler import BeliefSampler
+from belief_overlay import BeliefOverlay, HEATMAP_TYPES
+from board_encoding import PIECE_TYPES
+from constants import MAX_COUNTS
+from board_renderer import (
+    BoardRenderer, load_font, OBSTACLE_CELLS, PADDING_CELLS, GRID_SIZE, BOARD_ROWS, BOARD_COLS,
+    WIDTH, HEIGHT,
+)
 
 
 # ----------------------- visual constants ---------------------------
-PADDING_CELLS = 2
-GRID_SIZE = 40
-BOARD_ROWS = 17
-BOARD_COLS = 17
-WIDTH = GRID_SIZE * (BOARD_COLS + 2 * PADDING_CELLS)
-HEIGHT = GRID_SIZE * (BOARD_ROWS + 2 * PADDING_CELLS)
-FPS = 60
-
-
-WHITE = (255, 255, 255)
-GRAY = (220, 220, 220)
-BLUE = (50, 50, 255)
-BLACK = (0, 0, 0)
-
-OWNER_TO_COLOR = {
-    "Red": (255, 0, 0),
-    "Green": (0, 200, 0),
-    "Blue": (0, 100, 255),
-    "Yellow": (200, 200, 0),
-}
-
-DISPLAY_NAMES = {
-    "General": "司", "CorpsCommander": "军", "DivisionCommander": "师",
-    "Brigadier": "旅", "RegimentLeader": "团", "BattalionLeader": "营",
-    "CompanyLeader": "连", "PlatoonLeader": "排", "Engineer": "兵",
-    "Bomb": "炸", "Mine": "雷", "Flag": "旗",
-}
+# Board drawing (colors, glyphs, cached surfaces) lives in board_renderer.py
+CAPTION = "四国军棋 - 可视化棋盘"
+
+# Every game played in the GUI is streamed to GAME_LOG_FILE; "保存" appends the game so far
+# to SAVED_GAMES_FILE. Both use the binary format of game_record.py.
+GAME_LOG_FILE = "game_log.sgr"
+SAVED_GAMES_FILE = "saved_games.sgr"
+# "保存" also writes the current position and turn state (snapshot.py)
+SNAPSHOT_FILE = "saved_position.snap"
+# "电脑" lets this agent (agents.make_agent spec) play every side except Red. It searches in
+# the background (ai_worker.py); the window only wakes up for input and AI events.
+AI_AGENT = "mcts:iterations=1000000,time_limit=3.0"
+
 
 # ----------------------- helper -------------------------------------
 
 def _is_obstacle_cell(row: int, col: int) -> bool:
     """Return True for黑色障碍格子 (不能走 / 不可选)."""
-    if (row < 6 and col < 6) or (row < 6 and col >= 11) or (row >= 11 and col < 6) or (row >= 11 and col >= 11):
-        return True
-    center_blocks = {
-        (6, 7), (6, 9),
-        (7, 6), (7, 7), (7, 8), (7, 9), (7, 10),
-        (8, 7), (8, 9),
-        (9, 6), (9, 7), (9, 8), (9, 9), (9, 10),
-        (10, 7), (10, 9),
-    }
-    return (row, col) in center_blocks
+    return (row, col) in OBSTACLE_CELLS
 
 # ----------------------- main loop ----------------------------------
 
 def main() -> None:
     pygame.init()
     pygame.font.init()
-    font = pygame.font.Font("/System/Library/Fonts/STHeiti Medium.ttc", 18)
+    font = load_font(18)
 
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
-    pygame.display.set_caption("四国军棋 - 可视化棋盘")
-    clock = pygame.time.Clock()
+    pygame.display.set_caption(CAPTION)
+    # The loop sleeps in pygame.event.wait(); mouse motion would only wake it for nothing
+    pygame.event.set_blocked(pygame.MOUSEMOTION)
 
     #功能按钮
     BUTTONS = [
@@ -69,19 +59,110 @@ def main() -> None:
         {"label": "红绿随机",  "rect": pygame.Rect(300, 20, 60, 30)},
         {"label": "开始",     "rect": pygame.Rect(370, 20, 60, 30)},
         {"label": "红绿开始",    "rect": pygame.Rect(440, 20, 60, 30)},
+        {"label": "电脑",     "rect": pygame.Rect(510, 20, 60, 30)},
+        {"label": "概率",     "rect": pygame.Rect(580, 20, 60, 30)},
     ]
     game = Game()  # core logic instance
     state_manager = game_state
 
+    # Static layer: board plus buttons, drawn once. Each frame only the changed cells are
+    # redrawn and pushed to the display; the whole window only when the popup opens/closes.
+    renderer = BoardRenderer()
+    background = renderer.background.copy()
+    for button in BUTTONS:
+        pygame.draw.rect(background, (200, 200, 200), button["rect"])
+        pygame.draw.rect(background, (0, 0, 0), button["rect"], 2)
+        label = font.render(button["label"], True, (0, 0, 0))
+        background.blit(label, label.get_rect(center=button["rect"].center))
+    renderer.background = background
+    overlay_shown = None
+    full_redraw = True
+    # "概率" cycles the belief heatmap (red-green games): Red's belief that each hidden
+    # enemy piece is HEATMAP_TYPES[heat_index]
+    beliefs = BeliefOverlay()
+    heat_index = 0
+    heat_shown = None
+
+    # Pieces are face down for the player at the screen (Red) once a game is running
+    def show_label(piece) -> bool:
+        return (not state_manager.is_playing) or piece.owner == 'Red' or piece.revealed
+    game_log = None       # GameRecordWriter of the game being played
+    record = None         # [mode, starting board encoding, moves, outcomes] of that game
+
+    # Start logging a new game from the current board, closing an unfinished one. A board
+    # whose pieces have already left their zones is logged as a position record.
+    def start_record(mode: str) -> None:
+        nonlocal game_log, record
+        if game_log is not None:
+            game_log.end_game(0)
+            game_log.close()
+        record = [mode, encode_board(game.board), [], []]
+        game.board.history.clear()
+        game.turn_log.clear()
+        game_log = GameRecordWriter(GAME_LOG_FILE)
+        game_log.begin_game(record[1], mode)
+
+    ai = AIWorker(AI_AGENT)
+    ai_enabled = False
+
+    def ai_turn() -> bool:
+        return (ai_enabled and state_manager.is_playing
+                and state_manager.current_player() != 'Red')
+
+    # Bookkeeping after `move` = (x1, y1, x2, y2) was played on the board by the side to move.
+    # attacker / defender are the pieces on the two cells before the move.
+    def finish_move(move, attacker, defender) -> None:
+        sampler = game.belief_sampler
+        if sampler is not None:
+            x1, y1, x2, y2 = move
+            if attacker.owner != sampler.my_side:
+                sampler.update((x1, y1), (x2, y2))
+            elif defender is not None:
+                sampler.update((x1, y1), (x2, y2), attacker, defender)
+        if game_log is not None:
+            game_log.add_move(move, game.board.last_outcome)
+            record[2].append(move)
+            record[3].append(game.board.last_outcome)
+        if state_manager.is_playing:
+            game.turn_log.append(state_manager.current_turn_index)
+            state_manager.next_turn()
+
+    # Ask the AI for a move when it is its turn and it is not already thinking
+    def maybe_start_ai() -> None:
+        if ai_turn() and not state_manager.game_over and not ai.busy and record is not None:
+            side = state_manager.current_player()
+            ai.request(game.board, side, record[0])
+            pygame.display.set_caption(f"{CAPTION} - {side} 思考中")
+
     running = True
     while running:
-        clock.tick(FPS)
-
         # --------------------- events ------------------------------
-        for event in pygame.event.get():
+        # Sleep until something happens, then handle everything that is queued
+        for event in [pygame.event.wait()] + pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
 
+            elif event.type == AI_MOVE:
+                if not ai.is_current(event):
+                    continue
+                pygame.display.set_caption(CAPTION)
+                game.selected = None
+                if event.move is not None:
+                    x1, y1, x2, y2 = event.move
+                    attacker, defender = game.get_piece(x1, y1), game.get_piece(x2, y2)
+                if event.move is not None and game.board.move_piece(*event.move):
+                    game.clear_overlay()
+                    finish_move(tuple(event.move), attacker, defender)
+                else:
+                    print(f"{event.side} 无棋可走，跳过")
+                    state_manager.next_turn()
+
+            elif event.type == AI_PROGRESS:
+                if ai.is_current(event):
+                    info = " ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}"
+                                    for k, v in event.info.items())
+                    pygame.display.set_caption(f"{CAPTION} - {event.side} 思考中 {info}")
+
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 if game.info_items:
                     game.clear_overlay()
@@ -94,6 +175,11 @@ def main() -> None:
                     if not button["rect"].collidepoint(mx, my):
                         continue
 
+                    # every button that replaces or rewinds the board drops the AI's pending answer
+                    if button["label"] in ("清空", "撤销", "开始", "红绿开始", "四方随机", "红绿随机"):
+                        ai.cancel()
+                        pygame.display.set_caption(CAPTION)
+
                     if button["label"] == "四方随机":
                         game.generate_random_setup()
                         game.clear_overlay()
@@ -111,14 +197,59 @@ def main() -> None:
                             "Yellow":2,
                         })
                         state_manager.start_game()
+                        start_record("4p")
                         print("游戏开始，当前轮到：", state_manager.current_player())
                         for r in range(BOARD_ROWS):
                             for c in range(BOARD_COLS):
                                 p = game.get_piece(c, r)
                                 if p and p.owner != 'Red':
                                     p.revealed = False
+                        game.board.touch()
+                        game.belief_sampler = None
+                    elif button["label"] == "保存":
+                        if record is None:
+                            print("还没有开始对局，无法保存")
+                        else:
+                            mode, setup, moves, outcomes = record
+                            with GameRecordWriter(SAVED_GAMES_FILE) as saved:
+                                saved.write_game(setup, mode, moves, outcomes, state_manager.winning_alliance)
+                            save_snapshot(SNAPSHOT_FILE, game.board, state_manager)
+                            print(f"已保存 {len(moves)} 步到 {SAVED_GAMES_FILE}，局面保存到 {SNAPSHOT_FILE}")
+
+                    elif button["label"] == "撤销":
+                        if game.undo(state_manager):
+                            if game_log is not None and record[2]:
+                                game_log.undo_move()
+                                record[2].pop()
+                                record[3].pop()
+                            # against the computer, take back its replies too
+                            while ai_turn() and game.undo(state_manager):
+                                if game_log is not None and record[2]:
+                                    game_log.undo_move()
+                                    record[2].pop()
+                                    record[3].pop()
+                            # beliefs cannot be taken back move by move: start them over
+                            if game.belief_sampler is not None:
+                                game.belief_sampler.reset()
+                            print("已撤销，当前轮到：", state_manager.current_player())
+                        else:
+                            print("没有可以撤销的走法")
+
+                    elif button["label"] == "电脑":
+                        ai_enabled = not ai_enabled
+                        if not ai_enabled:
+                            ai.cancel()
+                            pygame.display.set_caption(CAPTION)
+                        print("电脑对手：", "开启" if ai_enabled else "关闭")
+
+                    elif button["label"] == "概率":
+                        heat_index = (heat_index + 1) % len(HEATMAP_TYPES)
+                        print("概率热力图：", HEATMAP_TYPES[heat_index] or "关闭")
+
                     elif button["label"] == "清空":
                         game.board.grid = [[None]*BOARD_COLS for _ in range(BOARD_ROWS)]
+                        game.board.touch()
+                        game.belief_sampler = None
                         game.clear_overlay()
 
                     elif button["label"] == "红绿开始":
@@ -128,12 +259,16 @@ def main() -> None:
                             "Green": 2,
                         })
                         state_manager.start_game()
+                        start_record("2p")
                         print("红绿模式启动，当前轮到：", state_manager.current_player())
                         for r in range(BOARD_ROWS):
                             for c in range(BOARD_COLS):
                                 p = game.get_piece(c, r)
                                 if p:
                                     p.revealed = False
+                        game.board.touch()
+                        game.belief_sampler = BeliefSampler(game.board, None, list(PIECE_TYPES),
+                                                            MAX_COUNTS, 'Red')
 
 
                     break
@@ -144,6 +279,9 @@ def main() -> None:
 
                 col = mx // GRID_SIZE - PADDING_CELLS
                 row = my // GRID_SIZE - PADDING_CELLS
+                if ai_turn():
+                    print("电脑思考中，请稍候")
+                    continue
                 if state_manager.is_playing and game.selected is None:
                     piece = game.get_piece(col, row)
                     if piece and piece.owner != state_manager.current_player():
@@ -151,16 +289,12 @@ def main() -> None:
                         continue
                 if not _is_obstacle_cell(row, col):
                     if not _is_obstacle_cell(row, col):
-                        moved = game.on_left_click(row, col)
-                        if moved and state_manager.is_playing:
-                            mover = state_manager.current_player()  
-                            hidden = game.board.get_all_hidden_positions(my_side=mover)
-                            print(f"\n>>> {mover} 走完后的隐藏敌方棋子：")
-                            for x, y in hidden:
-                                p = game.get_piece(x, y)
-                                print(f"  位置 {(x, y)} {p.uid} owner={p.owner} revealed={p.revealed}")
-                            
-                            state_manager.next_turn()
+                        source = game.selected
+                        if source is not None:
+                            attacker = game.get_piece(source[1], source[0])
+                            defender = game.get_piece(col, row)
+                        if game.on_left_click(row, col):
+                            finish_move((source[1], source[0], col, row), attacker, defender)
             elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 3:
                 x, y = event.pos
                 col = x // GRID_SIZE - PADDING_CELLS
@@ -174,6 +308,7 @@ def main() -> None:
                     piece = game.get_piece(col, row)
                     if piece:
                         piece.revealed = not piece.revealed
+                        game.board.touch()
 
             elif event.type == pygame.KEYDOWN and game.selected:
                 if event.key in (pygame.K_DELETE, pygame.K_BACKSPACE):
@@ -182,78 +317,47 @@ def main() -> None:
 
         
         # --------------------- drawing -----------------------------
-        screen.fill(BLACK)
-
-        font = pygame.font.Font("/System/Library/Fonts/STHeiti Medium.ttc", 18)
-        for button in BUTTONS:
-            pygame.draw.rect(screen, (200, 200, 200), button["rect"])
-            pygame.draw.rect(screen, (0, 0, 0), button["rect"], 2)
-            label = font.render(button["label"], True, (0, 0, 0))
-            label_rect = label.get_rect(center=button["rect"].center)
-            screen.blit(label, label_rect)
-
-        for row in range(BOARD_ROWS):
-            for col in range(BOARD_COLS):
-                rect = pygame.Rect(
-                    (col + PADDING_CELLS) * GRID_SIZE,
-                    (row + PADDING_CELLS) * GRID_SIZE,
-                    GRID_SIZE, GRID_SIZE
-                )
-                if _is_obstacle_cell(row, col):
-                    pygame.draw.rect(screen, BLACK, rect)
-                else:
-                    pygame.draw.rect(screen, WHITE, rect)
-                    pygame.draw.rect(screen, GRAY, rect, 1)
-
-                # camps / HQ colouring
-                if game.is_camp(col, row):
-                    pygame.draw.rect(screen, (180, 180, 180), rect)
-                elif game.is_hq(col, row):
-                    pygame.draw.rect(screen, (100, 100, 100), rect)
-
-                piece = game.get_piece(col, row)
-                if piece and piece.alive:
-                    center = (
-                        (col + PADDING_CELLS) * GRID_SIZE + GRID_SIZE // 2,
-                        (row + PADDING_CELLS) * GRID_SIZE + GRID_SIZE // 2,
-                    )
-
-                    if state_manager.is_playing and piece.owner != 'Red' and not piece.revealed:
-                        color = OWNER_TO_COLOR[piece.owner]
-                        pygame.draw.circle(screen, color, center, GRID_SIZE // 2 - 6)
-                        pygame.draw.circle(screen, BLACK,  center, GRID_SIZE // 2 - 6, 2)
-
-                    else:
-                        color = OWNER_TO_COLOR[piece.owner]
-                        pygame.draw.circle(screen, color, center, GRID_SIZE // 2 - 6)
-                        pygame.draw.circle(screen, BLACK,  center, GRID_SIZE // 2 - 6, 2)
-
-                        if (not state_manager.is_playing) or piece.owner == 'Red' or piece.revealed:
-                            text = DISPLAY_NAMES.get(piece.name, piece.name[:2])
-                            label = font.render(text, True, BLACK)
-                            screen.blit(label, label.get_rect(center=center))
-
-        # highlight selection
-        if game.selected:
-            row, col = game.selected
-            rect = pygame.Rect(
-                (col + PADDING_CELLS) * GRID_SIZE,
-                (row + PADDING_CELLS) * GRID_SIZE,
-                GRID_SIZE, GRID_SIZE
-            )
-            pygame.draw.rect(screen, BLUE, rect, 3)
-
-        game.draw_overlay(screen) #draw small
+        overlay = (id(game.info_items), game.info_pos) if game.info_items else None
+        if overlay != overlay_shown:
+            overlay_shown = overlay
+            full_redraw = True
+        dirty = []
+        heat = None
+        if HEATMAP_TYPES[heat_index] and game.belief_sampler is not None:
+            heat = beliefs.layer(game.belief_sampler, HEATMAP_TYPES[heat_index])
+        if heat is not heat_shown:
+            heat_shown = heat
+            full_redraw = True
+        if not full_redraw:
+            dirty = renderer.draw_pieces(screen, game.board, show_label, game.selected)
+            # pieces drawn over the popup: redraw everything so it stays on top
+            full_redraw = bool(overlay and dirty)
+            if heat is not None:
+                for rect in dirty:
+                    screen.blit(heat, rect, rect)
+        if full_redraw:
+            renderer.draw_board(screen, game.board, show_label, game.selected)
+            if heat is not None:
+                screen.blit(heat, (0, 0))
+            game.draw_overlay(screen) #draw small
         if state_manager.is_playing:
             state_manager.check_elimination(game)
 
         if state_manager.game_over:
             print(state_manager.get_victory_message())
             running = False
-        pygame.display.flip()
-
-       
-
+        if full_redraw:
+            pygame.display.flip()
+            full_redraw = False
+        elif dirty:
+            pygame.display.update(dirty)
+        if running:
+            maybe_start_ai()
+
+    ai.close()
+    if game_log is not None:
+        game_log.end_game(state_manager.winning_alliance)
+        game_log.close()
     pygame.quit()
     sys.exit()
 
@@ -0,0 +1,244 @@
+# movegen.py - Move Generation for Four Kingdoms Military Chess
+
+# This module enumerates legal moves for search and self-play code.
+# It produces exactly the moves that ChessBoard.move_piece would accept when the pieces'
+# `movable` flags are up to date (as GameState.update_all_movable leaves them), but it
+# walks precomputed neighbor tables instead of calling can_move for every cell pair.
+
+# Moves are tuples (x1, y1, x2, y2), matching the argument order of ChessBoard.move_piece.
+
+from collections import deque
+from routes import connections, LineType, is_displayable
+from constants import BOARD_SIZE, camp_positions, hq_positions, special_paths
+
+# ---------------------------------------------------------------------------
+# Topology tables, built once from routes.connections at import time
+# ---------------------------------------------------------------------------
+
+ROAD_NEIGHBORS: dict[tuple[int, int], tuple[tuple[int, int], ...]] = {}
+RAIL_NEIGHBORS: dict[tuple[int, int], tuple[tuple[int, int], ...]] = {}
+for _cell, _links in connections.items():
+    ROAD_NEIGHBORS[_cell] = tuple(dict.fromkeys(n for n, t in _links if t == LineType.ROAD))
+    RAIL_NEIGHBORS[_cell] = tuple(dict.fromkeys(n for n, t in _links if t == LineType.RAIL))
+
+# RAIL_RAYS[cell] = straight runs of rail-connected cells in each of the four directions
+RAIL_RAYS: dict[tuple[int, int], tuple[tuple[tuple[int, int], ...], ...]] = {}
+for _cell, _rails in RAIL_NEIGHBORS.items():
+    _rays = []
+    for _dx, _dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+        _ray = []
+        _prev = _cell
+        while True:
+            _nxt = (_prev[0] + _dx, _prev[1] + _dy)
+            if _nxt not in RAIL_NEIGHBORS.get(_prev, ()):
+                break
+            _ray.append(_nxt)
+            _prev = _nxt
+        if _ray:
+            _rays.append(tuple(_ray))
+    RAIL_RAYS[_cell] = tuple(_rays)
+
+# SPECIAL_PATH_OF[cell] = the other cells on the special L-shaped rail path through cell
+SPECIAL_PATH_OF: dict[tuple[int, int], tuple[tuple[int, int], ...]] = {}
+for _sp in special_paths:
+    if all(b in RAIL_NEIGHBORS.get(a, ()) for a, b in zip(_sp, _sp[1:])):
+        for _cell in _sp:
+            SPECIAL_PATH_OF.setdefault(_cell, tuple(c for c in _sp if c != _cell))
+
+# Grid neighbors used by the mobility rule of GameState.update_all_movable
+_NEIGHBORS4: dict[tuple[int, int], tuple[tuple[int, int], ...]] = {}
+_EDGE_INWARD: dict[tuple[int, int], tuple[tuple[int, int], ...]] = {}
+for _y in range(BOARD_SIZE):
+    for _x in range(BOARD_SIZE):
+        _NEIGHBORS4[(_x, _y)] = tuple(
+            (_x + dc, _y + dr)
+            for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1))
+            if 0 <= _y + dr < BOARD_SIZE and 0 <= _x + dc < BOARD_SIZE
+        )
+        _inward = []
+        if _x == 0:
+            _inward.append((1, _y))
+        if _x == BOARD_SIZE - 1:
+            _inward.append((BOARD_SIZE - 2, _y))
+        if _y == 0:
+            _inward.append((_x, 1))
+        if _y == BOARD_SIZE - 1:
+            _inward.append((_x, BOARD_SIZE - 2))
+        _EDGE_INWARD[(_x, _y)] = tuple(_inward)
+
+CAMP_CELLS = frozenset(camp_positions)
+HQ_CELLS = frozenset((x, y) for y, x in hq_positions)
+PLAYABLE_CELLS_ORDERED = tuple(
+    (x, y) for y in range(BOARD_SIZE) for x in range(BOARD_SIZE) if is_displayable(y, x)
+)
+PLAYABLE_CELLS = frozenset(PLAYABLE_CELLS_ORDERED)
+
+
+# ---------------------------------------------------------------------------
+# Move generation
+# ---------------------------------------------------------------------------
+
+# Mobility rule of GameState.update_all_movable for the piece at (x, y).
+def is_movable(board, x: int, y: int) -> bool:
+    grid = board.grid
+    piece = grid[y][x]
+    if piece is None or not piece.alive or piece.name in ("Mine", "Flag"):
+        return False
+    owner = piece.owner
+    for nx, ny in _EDGE_INWARD[(x, y)]:
+        n = grid[ny][nx] if (nx, ny) in PLAYABLE_CELLS else None
+        if n is not None and n.owner == owner and n.name == "Mine":
+            return False
+    for nx, ny in _NEIGHBORS4[(x, y)]:
+        if (nx, ny) not in PLAYABLE_CELLS:
+            return True
+        t = grid[ny][nx]
+        if t is None or t.owner != owner:
+            return True
+    return False
+
+
+# Cells the piece at (x, y) can reach under ChessBoard.can_move, ignoring
+# its `movable` flag and the occupant of the destination.
+# Rails run through the blocked center cells, so the result may include cells
+# that are not playable; piece_moves filters those out.
+def reachable_cells(board, x: int, y: int) -> list[tuple[int, int]]:
+    grid = board.grid
+    piece = grid[y][x]
+    src = (x, y)
+    targets = dict.fromkeys(ROAD_NEIGHBORS.get(src, ()))
+    targets.update(dict.fromkeys(RAIL_NEIGHBORS.get(src, ())))
+
+    if piece.name == "Engineer":
+        # Flood fill along rails through empty cells; occupied cells end a branch
+        visited = {src}
+        queue = deque([src])
+        while queue:
+            cell = queue.popleft()
+            for n in RAIL_NEIGHBORS.get(cell, ()):
+                if n in visited:
+                    continue
+                targets[n] = None
+                if grid[n[1]][n[0]] is None:
+                    visited.add(n)
+                    queue.append(n)
+
+    for n in SPECIAL_PATH_OF.get(src, ()):
+        targets[n] = None
+
+    for ray in RAIL_RAYS.get(src, ()):
+        for n in ray:
+            targets[n] = None
+            if grid[n[1]][n[0]] is not None:
+                break
+
+    targets.pop(src, None)
+    return list(targets)
+
+
+# Return all legal moves of the piece at (x, y) as (x1, y1, x2, y2) tuples.
+def piece_moves(board, x: int, y: int) -> list[tuple[int, int, int, int]]:
+    if (x, y) in HQ_CELLS or not is_movable(board, x, y):
+        return []
+    grid = board.grid
+    owner = grid[y][x].owner
+    alliance = board.alliance_map.get(owner)
+    moves = []
+    for x2, y2 in reachable_cells(board, x, y):
+        if (x2, y2) not in PLAYABLE_CELLS:
+            continue
+        target = grid[y2][x2]
+        if target is not None:
+            if (x2, y2) in CAMP_CELLS or target.owner == owner:
+                continue
+            if board.alliance_map.get(target.owner) == alliance:
+                continue
+        moves.append((x, y, x2, y2))
+    return moves
+
+
+# Return all legal moves for the given side.
+def legal_moves(board, side: str) -> list[tuple[int, int, int, int]]:
+    grid = board.grid
+    moves = []
+    for x, y in PLAYABLE_CELLS_ORDERED:
+        p = grid[y][x]
+        if p is not None and p.owner == side:
+            moves.extend(piece_moves(board, x, y))
+    return moves
+
+
+# Return True if the move captures or fights an enemy piece.
+def is_attack(board, move) -> bool:
+    return board.grid[move[3]][move[2]] is not None
+
+
+# ---------------------------------------------------------------------------
+# Game flow helpers (mirroring GameState.check_elimination)
+# ---------------------------------------------------------------------------
+
+# A side stays in the game while it owns a Flag and at least one movable piece.
+def side_alive(board, side: str) -> bool:
+    grid = board.grid
+    has_flag = False
+    has_mobile = False
+    for x, y in PLAYABLE_CELLS_ORDERED:
+        p = grid[y][x]
+        if p is None or p.owner != side:
+            continue
+        if p.name == "Flag":
+            has_flag = True
+        elif not has_mobile and is_movable(board, x, y):
+            has_mobile = True
+        if has_flag and has_mobile:
+            return True
+    return False
+
+
+# Remove the pieces of every side in `sides` that is no longer alive.
+# Returns the sides that remain in the game, in their original order.
+def resolve_eliminations(board, sides) -> list[str]:
+    remaining = [s for s in sides if side_alive(board, s)]
+    if len(remaining) != len(sides):
+        grid = board.grid
+        gone = set(sides) - set(remaining)
+        for x, y in PLAYABLE_CELLS_ORDERED:
+            p = grid[y][x]
+            if p is not None and p.owner in gone:
+                grid[y][x] = None
+        board.touch()
+    return remaining
+
+
+# Return the winning alliance if only one alliance is left among `sides`, else None.
+def winning_alliance(board, sides):
+    alliances = {board.alliance_map.get(s) for s in sides}
+    if len(alliances) == 1:
+        return next(iter(alliances))
+    return None
+
+
+# Return the side that moves after `side`, following `turn_order` but skipping
+# sides that are not in `remaining` (eliminated sides lose their turns).
+def next_side(turn_order, side: str, remaining) -> str:
+    i = turn_order.index(side)
+    for step in range(1, len(turn_order) + 1):
+        candidate = turn_order[(i + step) % len(turn_order)]
+        if candidate in remaining:
+            return candidate
+    return side
+
+
+# Remove a side that has no legal move on its turn and pass to the next one.
+# Returns (next side or None if the game is over, remaining sides).
+def skip_stuck_side(board, turn_order, sides, side):
+    grid = board.grid
+    for row in grid:
+        for x, p in enumerate(row):
+            if p is not None and p.owner == side:
+                row[x] = None
+    board.touch()
+    remaining = [s for s in sides if s != side]
+    if not remaining or winning_alliance(board, remaining) is not None:
+        return None, remaining
+    return next_side(turn_order, side, remaining), remaining
@@ -0,0 +1,78 @@
+# observation.py - Per-Side Observations (Fog of War) for Four Kingdoms Military Chess
+
+# This module projects a full-information ChessBoard onto what one side actually knows:
+# its own pieces in full, the types of revealed pieces of the other sides, and an "unknown"
+# marker for every other piece. Agents, network clients and loggers that should not see the
+# hidden information work on an Observation instead of the board.
+
+# An Observation is immutable and compact: the board_encoding byte layout (one byte per
+# playable cell) where pieces of unknown type carry the type code UNKNOWN and keep only
+# their owner bits. ChessBoard.observe(side) caches one Observation per side and rebuilds
+# it only after the board has changed, so repeated calls are free.
+
+from board_encoding import (
+    CELLS, CELL_ID, OWNERS, OWNER_CODE, OWNER_SHIFT, PIECE_TYPES, REVEALED_BIT, TYPE_CODE,
+    TYPE_MASK, decode_board, piece_code,
+)
+
+UNKNOWN = TYPE_MASK   # type code of a piece whose type the observer does not know
+
+
+class Observation:
+    __slots__ = ("side", "codes")
+
+    # side: observing side; codes: bytes in the board_encoding layout with UNKNOWN types
+    def __init__(self, side: str, codes: bytes):
+        object.__setattr__(self, "side", side)
+        object.__setattr__(self, "codes", bytes(codes))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Observation is immutable")
+
+    # (owner, piece type or None if unknown, revealed) at (x, y), or None for an empty cell.
+    def piece(self, x: int, y: int):
+        cid = CELL_ID.get((x, y))
+        code = self.codes[cid] if cid is not None else 0
+        if not code:
+            return None
+        t = code & TYPE_MASK
+        return (OWNERS[(code >> OWNER_SHIFT) & 0x03],
+                None if t == UNKNOWN else PIECE_TYPES[t - 1],
+                bool(code & REVEALED_BIT))
+
+    # Cells (x, y) holding a piece whose type is unknown to the observer.
+    def hidden_positions(self) -> list[tuple[int, int]]:
+        return [CELLS[cid] for cid, c in enumerate(self.codes) if c & TYPE_MASK == UNKNOWN]
+
+    def __eq__(self, other):
+        return (isinstance(other, Observation)
+                and self.side == other.side and self.codes == other.codes)
+
+    def __hash__(self):
+        return hash((self.side, self.codes))
+
+    def __repr__(self):
+        return f"Observation({self.side!r}, {len(self.hidden_positions())} hidden)"
+
+
+# Build the Observation of `board` for `side`. Use ChessBoard.observe for the cached version.
+def observe_board(board, side: str) -> Observation:
+    grid = board.grid
+    codes = bytearray(len(CELLS))
+    for cid, (x, y) in enumerate(CELLS):
+        p = grid[y][x]
+        if p is None:
+            continue
+        if p.owner == side or p.revealed:
+            codes[cid] = piece_code(p)
+        else:
+            codes[cid] = UNKNOWN | OWNER_CODE[p.owner] << OWNER_SHIFT
+    return Observation(side, codes)
+
+
+# A ChessBoard holding what `obs` shows: known pieces as they are, unknown pieces as unrevealed
+# `placeholder` pieces (a BeliefSampler over this board then samples their real types).
+def board_from_observation(obs: Observation, alliance_map=None, placeholder: str = "PlatoonLeader"):
+    codes = bytes(TYPE_CODE[placeholder] | c & ~TYPE_MASK & ~REVEALED_BIT
+                  if c & TYPE_MASK == UNKNOWN else c for c in obs.codes)
+    return decode_board(codes, alliance_map)
@@ -0,0 +1,284 @@
+# perft.py - Move Generation Perft and Cross-Checking for Four Kingdoms Military Chess
+
+# This module is the correctness anchor for move generation. perft(board, depth) counts the
+# leaf nodes of the full move tree to `depth` plies; two generators that agree on the counts
+# (and, with --check, on the move set of every node) implement the same rules.
+
+# The reference generator asks ChessBoard itself: every (piece, cell) pair goes through
+# can_move plus the remaining checks of move_piece (HQ immobility, movable flags kept up to
+# date like GameState.update_all_movable, no attacks on camps, own or allied pieces). It is
+# slow but is the rules as the GUI plays them. Any other generator with the signature of
+# movegen.legal_moves can be compared against it, named as "module:function".
+
+# Tree rules: sides move in turn order; a side without legal moves is skipped; fights are
+# resolved by make_move / unmake_move, but eliminations and game end are not applied (this
+# tests move generation, not game flow).
+
+# The canonical positions cover openings of both modes, a mid-game with open railways and a
+# hand-built position with engineers on open rails, pieces on the special L-shaped rail
+# paths, pieces in camps and a non-Flag piece in a headquarters.
+
+# Usage:
+#     python perft.py --depth 3                        # reference vs movegen on all positions
+#     python perft.py --depth 2 --fast mymod:moves --check
+#     python perft.py --depth 3 --position rails --divide
+
+import importlib
+import random
+import time
+
+from board_encoding import decode_board, encode_board
+from chessboard import ChessBoard
+from constants import PIECE_RANKS
+from movegen import PLAYABLE_CELLS_ORDERED, legal_moves
+from piece import Piece
+from selfplay import MODES
+
+
+# ---------------------------------------------------------------------------
+# Generators
+# ---------------------------------------------------------------------------
+
+_state = None
+
+
+# Legal moves of `side` by ChessBoard.can_move and the other checks of move_piece.
+def reference_moves(board, side: str) -> list[tuple[int, int, int, int]]:
+    global _state
+    if _state is None:
+        from game_state import GameState
+        _state = GameState()
+    _state.update_all_movable(board)
+    grid = board.grid
+    alliance = board.alliance_map
+    moves = []
+    for x1, y1 in PLAYABLE_CELLS_ORDERED:
+        piece = grid[y1][x1]
+        if piece is None or piece.owner != side or not piece.movable or board.is_hq(x1, y1):
+            continue
+        for x2, y2 in PLAYABLE_CELLS_ORDERED:
+            if not board.can_move(x1, y1, x2, y2):
+                continue
+            target = grid[y2][x2]
+            if target is not None:
+                if board.is_camp(x2, y2) or target.owner == side:
+                    continue
+                if alliance.get(target.owner) == alliance.get(side):
+                    continue
+            moves.append((x1, y1, x2, y2))
+    return moves
+
+
+GENERATORS = {
+    "reference": reference_moves,
+    "movegen": legal_moves,
+}
+
+
+# A generator by name ("reference", "movegen") or as "module:function".
+def load_generator(spec: str):
+    if spec in GENERATORS:
+        return GENERATORS[spec]
+    module, _, name = spec.partition(":")
+    if not name:
+        raise ValueError(f"Unknown generator: {spec} (use one of {', '.join(GENERATORS)} "
+                         "or module:function)")
+    return getattr(importlib.import_module(module), name)
+
+
+# ---------------------------------------------------------------------------
+# Canonical positions
+# ---------------------------------------------------------------------------
+
+def _piece(name: str, owner: str) -> Piece:
+    return Piece(name, PIECE_RANKS[name], owner)
+
+
+# Red vs Green with the special cases laid out: engineers on open rails (flood fill around
+# corners), pieces at both ends of special L-paths, pieces in camps, a Brigadier stuck in
+# its headquarters, mines behind the front.
+def rails_position() -> ChessBoard:
+    board = ChessBoard()
+    layout = {
+        "Red": [
+            ("Flag", 9, 16), ("Brigadier", 7, 16), ("Mine", 8, 16), ("Mine", 8, 15),
+            ("Engineer", 6, 11), ("Engineer", 10, 13), ("General", 7, 12),
+            ("CorpsCommander", 10, 15), ("Bomb", 8, 13), ("PlatoonLeader", 6, 15),
+            ("CompanyLeader", 9, 14),
+        ],
+        "Green": [
+            ("Flag", 7, 0), ("Mine", 6, 1), ("Mine", 8, 0), ("Engineer", 10, 5),
+            ("Engineer", 6, 4), ("DivisionCommander", 9, 2), ("Brigadier", 8, 5),
+            ("Bomb", 7, 4), ("RegimentLeader", 10, 1), ("BattalionLeader", 8, 3),
+        ],
+    }
+    for owner, pieces in layout.items():
+        for name, x, y in pieces:
+            board.place_piece(x, y, _piece(name, owner))
+    board.set_alliance_map(MODES["2p"][1])
+    return board
+
+
+def _random_opening(mode: str, seed: int) -> ChessBoard:
+    from game import Game
+
+    random.seed(seed)
+    game = Game()
+    if mode == "2p":
+        game.generate_random_setup_red_green()
+    else:
+        game.generate_random_setup()
+    game.board.set_alliance_map(MODES[mode][1])
+    return game.board
+
+
+def _midgame(seed: int, plies: int = 40) -> ChessBoard:
+    board = _random_opening("4p", seed)
+    rng = random.Random(seed)
+    order = MODES["4p"][0]
+    for ply in range(plies):
+        moves = legal_moves(board, order[ply % len(order)])
+        if moves:
+            board.apply_move(*rng.choice(moves))
+    return board
+
+
+# name -> (mode, encoded board); built once, decoded fresh for every run
+POSITIONS = {}
+
+
+def canonical_positions() -> dict:
+    if not POSITIONS:
+        POSITIONS["opening-4p"] = ("4p", encode_board(_random_opening("4p", 1)))
+        POSITIONS["opening-2p"] = ("2p", encode_board(_random_opening("2p", 2)))
+        POSITIONS["midgame-4p"] = ("4p", encode_board(_midgame(3)))
+        POSITIONS["rails"] = ("2p", encode_board(rails_position()))
+    return POSITIONS
+
+
+# ---------------------------------------------------------------------------
+# Perft
+# ---------------------------------------------------------------------------
+
+# The side after `index` in turn order that has a legal move, as (index, moves), or
+# (None, []) if no side can move.
+def _next_mover(board, order, index: int, generate):
+    for step in range(len(order)):
+        i = (index + step) % len(order)
+        moves = generate(board, order[i])
+        if moves:
+            return i, moves
+    return None, []
+
+
+# Leaf nodes at `depth` plies below `board`, with order[index] to move.
+def perft(board, order, depth: int, generate=legal_moves, index: int = 0) -> int:
+    if depth == 0:
+        return 1
+    index, moves = _next_mover(board, order, index, generate)
+    if index is None:
+        return 0
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        record = board.make_move(*move)
+        nodes += perft(board, order, depth - 1, generate, index + 1)
+        board.unmake_move(record)
+    return nodes
+
+
+# perft split by root move: {move: leaf nodes below it}.
+def divide(board, order, depth: int, generate=legal_moves) -> dict:
+    index, moves = _next_mover(board, order, 0, generate)
+    result = {}
+    for move in moves:
+        record = board.make_move(*move)
+        result[move] = perft(board, order, depth - 1, generate, (index or 0) + 1)
+        board.unmake_move(record)
+    return result
+
+
+# Walk the tree to `depth` with the reference generator and compare `fast`'s move set at
+# every node. Returns None if they agree everywhere, else a description of the first
+# difference (position hex, side, moves only one of them generates).
+def cross_check(board, order, depth: int, fast, index: int = 0, reference=reference_moves):
+    if depth == 0:
+        return None
+    for step in range(len(order)):
+        i = (index + step) % len(order)
+        side = order[i]
+        expected = set(reference(board, side))
+        got = set(fast(board, side))
+        if expected != got:
+            return {"position": encode_board(board).hex(), "side": side,
+                    "missing": sorted(expected - got), "extra": sorted(got - expected)}
+        if expected:
+            break
+    else:
+        return None
+    for move in sorted(expected):
+        record = board.make_move(*move)
+        problem = cross_check(board, order, depth - 1, fast, i + 1, reference)
+        board.unmake_move(record)
+        if problem is not None:
+            return problem
+    return None
+
+
+# Run perft on `board` with `generate` and return (nodes, seconds).
+def timed_perft(mode: str, code: bytes, depth: int, generate) -> tuple[int, float]:
+    turn_order, alliance_map = MODES[mode]
+    board = decode_board(code, alliance_map)
+    start = time.perf_counter()
+    nodes = perft(board, turn_order, depth, generate)
+    return nodes, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import sys
+
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    parser = argparse.ArgumentParser(description="Move generation perft")
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--reference", default="reference", help="generator the others are checked against")
+    parser.add_argument("--fast", action="append", help="generator(s) to compare (default: movegen)")
+    parser.add_argument("--position", action="append", help="canonical position(s) to use (default: all)")
+    parser.add_argument("--check", action="store_true", help="also compare the move set at every node")
+    parser.add_argument("--divide", action="store_true", help="print node counts per root move")
+    args = parser.parse_args()
+
+    positions = canonical_positions()
+    names = args.position or list(positions)
+    reference = load_generator(args.reference)
+    fast = {spec: load_generator(spec) for spec in (args.fast or ["movegen"])}
+    failed = False
+
+    print(f"{'position':>12} {'generator':>12} {'depth':>5} {'nodes':>10} {'seconds':>8} {'nodes/s':>10}")
+    for name in names:
+        mode, code = positions[name]
+        ref_nodes, ref_seconds = timed_perft(mode, code, args.depth, reference)
+        print(f"{name:>12} {args.reference:>12} {args.depth:>5} {ref_nodes:>10} {ref_seconds:>8.2f} "
+              f"{ref_nodes / ref_seconds if ref_seconds else 0:>10.0f}")
+        for spec, generate in fast.items():
+            nodes, seconds = timed_perft(mode, code, args.depth, generate)
+            status = "ok" if nodes == ref_nodes else "MISMATCH"
+            failed |= nodes != ref_nodes
+            print(f"{name:>12} {spec:>12} {args.depth:>5} {nodes:>10} {seconds:>8.2f} "
+                  f"{nodes / seconds if seconds else 0:>10.0f}  {status} "
+                  f"({ref_seconds / seconds if seconds else 0:.0f}x)")
+            if args.check or nodes != ref_nodes:
+                turn_order, alliance_map = MODES[mode]
+                problem = cross_check(decode_board(code, alliance_map), turn_order, args.depth,
+                                      generate, reference=reference)
+                if problem is not None:
+                    failed = True
+                    print(f"  first difference: {problem}")
+            if args.divide:
+                turn_order, alliance_map = MODES[mode]
+                for move, count in sorted(divide(decode_board(code, alliance_map), turn_order,
+                                                 args.depth, generate).items()):
+                    print(f"    {move}: {count}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,192 @@
+# replay_renderer.py - Headless Game Replay Rendering for Four Kingdoms Military Chess
+
+# This module turns binary game records (game_record.py) into images without opening a window,
+# so a night of self-play can be reviewed as files instead of stepping through it in the GUI.
+# Drawing reuses board_renderer.BoardRenderer (the GUI's cached background and piece glyphs);
+# between plies only the cells that changed are redrawn. pygame runs on the dummy video driver.
+
+# Output per game (index = position of the game in the archive):
+#   contact sheet (default)  {out_dir}/game_{index:05d}.png   every `every`-th ply as a thumbnail
+#   --frames                 {out_dir}/game_{index:05d}/ply_{ply:04d}.png   one full-size image per ply
+# Ply 0 is the starting position; ply k is the board after move k, with the target cell of
+# that move highlighted and a caption line (ply, mover, move, outcome) in the top margin.
+# Pieces are drawn face up: records hold the full-information game.
+
+# Games are rendered in parallel: the parent only scans the archive, each worker decodes and
+# renders its own chunk of games from the memory-mapped file (as in features.py).
+
+# Usage:
+#     python replay_renderer.py selfplay.sgr replays/ --workers 8
+#     python replay_renderer.py selfplay.sgr replays/ --frames --games 10
+
+import os
+from functools import lru_cache
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from board_renderer import BoardRenderer, load_font, BLACK, WHITE
+from chessboard import Outcome
+from game_record import GameRecordReader
+from mcts import _pool_context
+
+SHEET_COLUMNS = 8
+THUMB_SCALE = 0.4       # contact-sheet cell size relative to --grid-size
+SHEET_GAP = 4           # pixels between thumbnails
+
+# Board renderer per cell size, created once per process (glyphs are cached inside it)
+@lru_cache(maxsize=None)
+def _board_renderer(grid_size: int) -> BoardRenderer:
+    return BoardRenderer(grid_size=grid_size, font_size=max(8, grid_size * 9 // 20))
+
+
+# Yield (ply, board, last) for the start of `record` and after each of its moves; `last` is
+# (side, move, outcome) of the move that led to the board, None for ply 0. The board is the
+# same ChessBoard object throughout.
+def frames(record):
+    last = None
+    board = None
+    ply = 0
+    for board, side, move, outcome in record.positions():
+        yield ply, board, last
+        last = (side, move, outcome)
+        ply += 1
+    if board is None:
+        board = record.initial_board()
+    yield ply, board, last
+
+
+class ReplayRenderer:
+    # grid_size: pixels per board cell of the full-size frames
+    def __init__(self, grid_size: int = 40):
+        self.board = _board_renderer(grid_size)
+        self.surface = pygame.Surface(self.board.size)
+        self.caption_font = load_font(max(10, grid_size * 2 // 5))
+        self.caption_rect = pygame.Rect(0, 0, self.board.size[0], self.board.padding * grid_size)
+
+    # Bring the frame surface up to date for `board` (see frames()) and return it.
+    def draw(self, ply: int, board, last, title: str = "") -> pygame.Surface:
+        selected = None
+        text = f"{title}  ply {ply}"
+        if last is not None:
+            side, (x1, y1, x2, y2), outcome = last
+            selected = (y2, x2)
+            text += f"  {side} ({x1},{y1})->({x2},{y2}) {Outcome(outcome).name}"
+        self.board.draw_pieces(self.surface, board, selected=selected)
+        self.surface.blit(self.board.background, self.caption_rect, self.caption_rect)
+        label = self.caption_font.render(text, True, WHITE)
+        self.surface.blit(label, label.get_rect(midleft=(8, self.caption_rect.centery)))
+        return self.surface
+
+    # Start a new game: the next draw() repaints the whole board.
+    def reset(self) -> None:
+        self.surface.blit(self.board.background, (0, 0))
+        self.board.invalidate()
+
+    # Save every ply of `record` as a PNG under `directory`. Returns the number of images.
+    def render_frames(self, record, directory: str, title: str = "", every: int = 1) -> int:
+        os.makedirs(directory, exist_ok=True)
+        self.reset()
+        count = 0
+        for ply, board, last in frames(record):
+            if ply % every and ply != record.plies:
+                continue
+            self.draw(ply, board, last, title)
+            pygame.image.save(self.surface, os.path.join(directory, f"ply_{ply:04d}.png"))
+            count += 1
+        return count
+
+    # Save one contact sheet of `record` (every `every`-th ply plus the final position) to
+    # `path`. The thumbnails are frames of this renderer's size (use a small grid_size), drawn
+    # directly rather than scaled down. Returns the number of thumbnails.
+    def render_sheet(self, record, path: str, title: str = "", every: int = 1,
+                     columns: int = SHEET_COLUMNS) -> int:
+        shown = [p for p in range(record.plies + 1) if p % every == 0 or p == record.plies]
+        thumb = self.board.size
+        rows = (len(shown) + columns - 1) // columns
+        sheet = pygame.Surface((columns * (thumb[0] + SHEET_GAP) + SHEET_GAP,
+                                rows * (thumb[1] + SHEET_GAP) + SHEET_GAP))
+        sheet.fill(BLACK)
+        self.reset()
+        i = 0
+        for ply, board, last in frames(record):
+            if i == len(shown) or ply != shown[i]:
+                continue
+            self.draw(ply, board, last, title)
+            row, col = divmod(i, columns)
+            sheet.blit(self.surface, (SHEET_GAP + col * (thumb[0] + SHEET_GAP),
+                                      SHEET_GAP + row * (thumb[1] + SHEET_GAP)))
+            i += 1
+        pygame.image.save(sheet, path)
+        return i
+
+
+# Worker task: render games [start, start + len(offsets)) of the archive.
+def _render_task(args):
+    path, out_dir, offsets, start, options = args
+    grid_size = options["grid_size"]
+    if not options["frames"]:
+        grid_size = max(4, round(grid_size * options["scale"]))
+    renderer = ReplayRenderer(grid_size)
+    images = 0
+    with GameRecordReader(path) as reader:
+        for i, offset in enumerate(offsets):
+            record = reader.read(offset)
+            index = start + i
+            title = f"game {index} ({record.mode}, winner {record.winner or '-'})"
+            if options["frames"]:
+                images += renderer.render_frames(record, os.path.join(out_dir, f"game_{index:05d}"),
+                                                 title, options["every"])
+            else:
+                renderer.render_sheet(record, os.path.join(out_dir, f"game_{index:05d}.png"),
+                                      title, options["every"], options["columns"])
+                images += 1
+    return images
+
+
+# Render the first `games` games of `path` (all if None) into `out_dir` on `workers`
+# processes. Returns (games, images written).
+def render_archive(path: str, out_dir: str, workers: int = 1, games: int | None = None,
+                   frames: bool = False, every: int = 1, columns: int = SHEET_COLUMNS,
+                   scale: float = THUMB_SCALE, grid_size: int = 40,
+                   games_per_chunk: int = 8) -> tuple[int, int]:
+    os.makedirs(out_dir, exist_ok=True)
+    with GameRecordReader(path) as reader:
+        offsets = [offset for offset, *_ in reader.scan()][:games]
+    options = {"frames": frames, "every": every, "columns": columns, "scale": scale,
+               "grid_size": grid_size}
+    tasks = [(path, out_dir, offsets[i:i + games_per_chunk], i, options)
+             for i in range(0, len(offsets), games_per_chunk)]
+    if workers > 1:
+        with _pool_context().Pool(workers) as pool:
+            images = sum(pool.imap_unordered(_render_task, tasks))
+    else:
+        images = sum(_render_task(t) for t in tasks)
+    return len(offsets), images
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Render game records to PNG images")
+    parser.add_argument("records", help="game record file (.sgr)")
+    parser.add_argument("out_dir")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--games", type=int, help="render only the first N games")
+    parser.add_argument("--frames", action="store_true", help="one PNG per ply instead of a contact sheet")
+    parser.add_argument("--every", type=int, default=1, help="render every N-th ply")
+    parser.add_argument("--columns", type=int, default=SHEET_COLUMNS)
+    parser.add_argument("--scale", type=float, default=THUMB_SCALE, help="thumbnail scale of contact sheets")
+    parser.add_argument("--grid-size", type=int, default=40, help="pixels per board cell")
+    parser.add_argument("--games-per-chunk", type=int, default=8)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    games, images = render_archive(args.records, args.out_dir, args.workers, args.games,
+                                   args.frames, args.every, args.columns, args.scale,
+                                   args.grid_size, args.games_per_chunk)
+    elapsed = time.perf_counter() - start
+    print(f"{games} games, {images} images in {elapsed:.1f}s ({games / elapsed:.1f} games/s)")
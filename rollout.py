@@ -0,0 +1,250 @@
+# rollout.py - Rollout Policies and Static Evaluation for Four Kingdoms Military Chess
+
+# This module provides the playout loop used by MCTS and two rollout policies:
+# - random_policy: uniform random legal moves (the baseline)
+# - HeuristicRolloutPolicy: cheap rules driven by precomputed per-cell tables; RAIL_ACCESS is
+#   built at import time, the HQ distance tables (distances.py) on their first use
+#
+# Per-cell tables (indexed by board_encoding cell id):
+# - distances.hq_distances(engineer): moves from the cell to every HQ cell on an empty board
+#   (a whole straight railway is one move; Engineers use the whole rail network), 255 if
+#   unreachable. HQ indices below are positions in distances.HQ_CELLS.
+# - RAIL_ACCESS[cell_id]: 1 if the cell lies on a railway, else 0
+#
+# HeuristicRolloutPolicy also carries an early-termination depth: MCTS stops its playouts
+# after `depth` plies and scores them with static_evaluate, which combines material balance
+# with how close each alliance is to the enemy Flags.
+
+import random
+import time
+
+from board_encoding import CELLS, CELL_ID
+from distances import HQ_CELLS, UNREACHABLE, hq_distances
+from movegen import (
+    legal_moves, resolve_eliminations, winning_alliance, next_side, skip_stuck_side,
+    RAIL_NEIGHBORS,
+)
+
+NUM_HQ = len(HQ_CELLS)
+RAIL_ACCESS = bytes(1 if RAIL_NEIGHBORS.get(cell) else 0 for cell in CELLS)
+
+# Rough material values used by the capture rule and the static evaluation
+PIECE_VALUES = {
+    "Flag": 0.0,
+    "Mine": 2.5,
+    "Bomb": 4.0,
+    "Engineer": 2.0,
+    "PlatoonLeader": 1.0,
+    "CompanyLeader": 1.5,
+    "BattalionLeader": 2.5,
+    "RegimentLeader": 3.5,
+    "Brigadier": 4.5,
+    "DivisionCommander": 6.0,
+    "CorpsCommander": 8.0,
+    "General": 10.0,
+}
+
+
+# Default rollout policy: pick a legal move uniformly at random.
+def random_policy(board, side, moves, rng):
+    return rng.choice(moves)
+
+
+# HQ indices of Flags that belong to an alliance other than `alliance`.
+def enemy_flag_hqs(board, alliance) -> list[int]:
+    grid = board.grid
+    found = []
+    for i, (x, y) in enumerate(HQ_CELLS):
+        p = grid[y][x]
+        if p is not None and p.name == "Flag" and board.alliance_map.get(p.owner) != alliance:
+            found.append(i)
+    return found
+
+
+class HeuristicRolloutPolicy:
+    # capture_prob: chance of playing the best winning attack when one exists
+    # advance_prob: chance of playing a move that gets closer to an enemy Flag
+    # rail_bonus: extra preference for advancing moves that land on a railway
+    # depth: plies after which a playout is stopped and scored by `evaluate`
+    def __init__(self, capture_prob: float = 0.9, advance_prob: float = 0.6,
+                 rail_bonus: float = 0.5, depth: int = 40):
+        self.capture_prob = capture_prob
+        self.advance_prob = advance_prob
+        self.rail_bonus = rail_bonus
+        self.depth = depth
+
+    def evaluate(self, board, alliance) -> float:
+        return static_evaluate(board, alliance)
+
+    def __call__(self, board, side, moves, rng):
+        grid = board.grid
+        alliance = board.alliance_map.get(side)
+
+        # 1) Captures: a Flag capture always, otherwise the most valuable winning attack
+        best, best_gain = None, 0.0
+        for m in moves:
+            target = grid[m[3]][m[2]]
+            if target is None:
+                continue
+            if target.name == "Flag":
+                return m
+            attacker = grid[m[1]][m[0]]
+            if attacker.name == "Bomb" or target.name == "Bomb":
+                gain = PIECE_VALUES[target.name] - PIECE_VALUES[attacker.name]
+            elif attacker.rank > target.rank:
+                gain = PIECE_VALUES[target.name]
+            else:
+                continue
+            if gain > best_gain:
+                best, best_gain = m, gain
+        if best is not None and rng.random() < self.capture_prob:
+            return best
+
+        # 2) Advance towards the nearest enemy Flag, preferring railway cells
+        if rng.random() < self.advance_prob:
+            flags = enemy_flag_hqs(board, alliance)
+            if flags:
+                tables = (hq_distances(False), hq_distances(True))
+                advancing, best_score = [], 0.0
+                for m in moves:
+                    table = tables[grid[m[1]][m[0]].name == "Engineer"]
+                    src = CELL_ID[(m[0], m[1])] * NUM_HQ
+                    dst = CELL_ID[(m[2], m[3])]
+                    gain = (min(table[src + i] for i in flags)
+                            - min(table[dst * NUM_HQ + i] for i in flags))
+                    if gain <= 0:
+                        continue
+                    score = gain + self.rail_bonus * RAIL_ACCESS[dst]
+                    if score > best_score:
+                        advancing, best_score = [m], score
+                    elif score == best_score:
+                        advancing.append(m)
+                if advancing:
+                    return rng.choice(advancing)
+
+        # 3) Otherwise play at random
+        return rng.choice(moves)
+
+
+# Static evaluation of `board` for `alliance` in [0, 1]:
+# mostly the alliance's share of material, plus a term for being closer to the enemy
+# Flags (with the nearest mobile piece) than the enemy is to ours.
+def static_evaluate(board, alliance) -> float:
+    grid = board.grid
+    amap = board.alliance_map
+    own_material = enemy_material = 0.0
+    own_pieces, enemy_pieces = [], []
+    for cid, (x, y) in enumerate(CELLS):
+        p = grid[y][x]
+        if p is None:
+            continue
+        mobile = p.name not in ("Mine", "Flag")
+        if amap.get(p.owner) == alliance:
+            own_material += PIECE_VALUES[p.name]
+            if mobile:
+                own_pieces.append((cid, p.name == "Engineer"))
+        else:
+            enemy_material += PIECE_VALUES[p.name]
+            if mobile:
+                enemy_pieces.append((cid, p.name == "Engineer"))
+    total = own_material + enemy_material
+    material = own_material / total if total else 0.5
+
+    tables = (hq_distances(False), hq_distances(True))
+
+    def nearest(pieces, flags):
+        if not pieces or not flags:
+            return UNREACHABLE
+        return min(tables[engineer][cid * NUM_HQ + f] for f in flags for cid, engineer in pieces)
+
+    own_reach = nearest(own_pieces, enemy_flag_hqs(board, alliance))
+    own_flags = [i for i, (x, y) in enumerate(HQ_CELLS)
+                 if grid[y][x] is not None and grid[y][x].name == "Flag"
+                 and amap.get(grid[y][x].owner) == alliance]
+    enemy_reach = nearest(enemy_pieces, own_flags)
+    threat = 0.5 + 0.5 * (enemy_reach - own_reach) / max(own_reach, enemy_reach, 1)
+    return 0.8 * material + 0.2 * threat
+
+
+# Play a game to the end (or `depth` plies) and return the result for `alliance`:
+# 1 for a win, 0 for a loss, evaluator(board, alliance) (or 0.5) if unfinished.
+def playout(board, side, sides, turn_order, alliance, policy, depth, evaluator, rng) -> float:
+    plies = 0
+    while side is not None and plies < depth:
+        moves = legal_moves(board, side)
+        if not moves:
+            side, sides = skip_stuck_side(board, turn_order, sides, side)
+            continue
+        board.apply_move(*policy(board, side, moves, rng))
+        plies += 1
+        sides = resolve_eliminations(board, sides)
+        if winning_alliance(board, sides) is not None:
+            side = None
+        else:
+            side = next_side(turn_order, side, sides)
+    winner = winning_alliance(board, sides) if sides else None
+    if winner is not None:
+        return 1.0 if winner == alliance else 0.0
+    if not sides:
+        return 0.5
+    return evaluator(board, alliance) if evaluator else 0.5
+
+
+# Compare rollout throughput on random Red-Green deployments: uniform random play and the
+# heuristic policy to `depth` plies, and the heuristic policy cut off at its own depth with
+# a static evaluation. Returns one result dict per configuration.
+def benchmark_rollouts(rollouts: int = 50, depth: int = 300, cutoff: int = 40,
+                       seed: int = 0) -> list[dict]:
+    from game import Game
+    from board_encoding import encode_board, decode_board
+
+    rng = random.Random(seed)
+    starts = []
+    for _ in range(rollouts):
+        random.seed(rng.getrandbits(32))
+        game = Game()
+        game.generate_random_setup_red_green()
+        starts.append(encode_board(game.board))
+    alliance_map = {"Red": 1, "Green": 2}
+    turn_order = ("Red", "Green")
+    heuristic = HeuristicRolloutPolicy(depth=cutoff)
+
+    results = []
+    for name, policy, max_depth, evaluator in (
+        ("uniform", random_policy, depth, None),
+        ("heuristic", heuristic, depth, None),
+        ("heuristic+cutoff", heuristic, heuristic.depth, heuristic.evaluate),
+    ):
+        play_rng = random.Random(seed)
+        finished = 0
+        start = time.perf_counter()
+        for code in starts:
+            board = decode_board(code, alliance_map)
+            value = playout(board, "Red", ["Red", "Green"], turn_order, 1, policy,
+                            max_depth, evaluator, play_rng)
+            finished += value in (0.0, 1.0)
+        elapsed = time.perf_counter() - start
+        results.append({
+            "policy": name,
+            "rollouts": rollouts,
+            "depth": max_depth,
+            "seconds": elapsed,
+            "rollouts_per_sec": rollouts / elapsed,
+            "finished": finished / rollouts,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rollout policy benchmark")
+    parser.add_argument("--rollouts", type=int, default=50)
+    parser.add_argument("--depth", type=int, default=300)
+    parser.add_argument("--cutoff", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'policy':>17} {'depth':>6} {'rollouts/s':>11} {'finished':>9}")
+    for r in benchmark_rollouts(args.rollouts, args.depth, args.cutoff, args.seed):
+        print(f"{r['policy']:>17} {r['depth']:>6} {r['rollouts_per_sec']:>11.1f} {r['finished']:>9.0%}")
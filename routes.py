@@ -4,6 +4,12 @@
 # It is responsible for setting up, storing, and querying the connectivity between
 # grid cells, including special movement rules for railways.
 
+# The topology never changes, so importing this module does not rebuild it: `connections` is
+# loaded from the frozen edge list in routes_table.py. The builder below (build_edges) is the
+# source of truth for that table; after changing it, regenerate and verify the table with
+#     python routes.py --freeze
+#     python routes.py --check
+
 # Enum for connection types between cells
 from enum import Enum
 from constants import special_paths, camp_positions, center_blocks
@@ -17,9 +23,9 @@ class LineType(Enum):
 connections = {}
 
 # Add a bidirectional connection between two adjacent cells with the specified line type.
-def add_connection(x1, y1, x2, y2, line_type):
-    connections.setdefault((x1, y1), []).append(((x2, y2), line_type))
-    connections.setdefault((x2, y2), []).append(((x1, y1), line_type))
+def add_connection(x1, y1, x2, y2, line_type, table=connections):
+    table.setdefault((x1, y1), []).append(((x2, y2), line_type))
+    table.setdefault((x2, y2), []).append(((x1, y1), line_type))
 
 # Get all neighbors connected to cell (x, y).
 def get_connections(x, y):
@@ -47,56 +53,61 @@ def is_displayable(row, col):
         return False
     return True
 
-def setup_rail_connections():
+# Railway edges, appended to `edges` as (x1, y1, x2, y2, LineType.RAIL).
+def setup_rail_connections(edges):
     # Vertical rails
     for y in range(1, 15):
-        add_connection(6, y, 6, y+1, LineType.RAIL)    # 6,1 → 6,15
-        add_connection(10, y, 10, y+1, LineType.RAIL)  # 10,1 → 10,15
+        edges.append((6, y, 6, y+1, LineType.RAIL))    # 6,1 → 6,15
+        edges.append((10, y, 10, y+1, LineType.RAIL))  # 10,1 → 10,15
     for y in range(6, 10):
-        add_connection(15, y, 15, y+1, LineType.RAIL)  # 15,6 → 15,10
+        edges.append((15, y, 15, y+1, LineType.RAIL))  # 15,6 → 15,10
 
     # Horizontal rails
     for x in range(1, 15):
-        add_connection(x, 6, x+1, 6, LineType.RAIL)    # 1,6 → 15,6
-        add_connection(x, 10, x+1, 10, LineType.RAIL)  # 1,10 → 15,10
+        edges.append((x, 6, x+1, 6, LineType.RAIL))    # 1,6 → 15,6
+        edges.append((x, 10, x+1, 10, LineType.RAIL))  # 1,10 → 15,10
 
     # Short horizontal ends (top/bottom)
     for x in range(6, 10):
-        add_connection(x, 1, x+1, 1, LineType.RAIL)     # 6,1 → 10,1
-        add_connection(x, 15, x+1, 15, LineType.RAIL)   # 6,15 → 10,15
+        edges.append((x, 1, x+1, 1, LineType.RAIL))     # 6,1 → 10,1
+        edges.append((x, 15, x+1, 15, LineType.RAIL))   # 6,15 → 10,15
     for y in range(6, 10):
-        add_connection(1, y, 1, y+1, LineType.RAIL)     # 1,6 → 1,10
+        edges.append((1, y, 1, y+1, LineType.RAIL))     # 1,6 → 1,10
 
     # Diagonal connections (4 corners of central rails)
-    add_connection(5, 6, 6, 5, LineType.RAIL)
-    add_connection(5, 10, 6, 11, LineType.RAIL)
-    add_connection(10, 5, 11, 6, LineType.RAIL)
-    add_connection(10, 11, 11, 10, LineType.RAIL)
+    edges.append((5, 6, 6, 5, LineType.RAIL))
+    edges.append((5, 10, 6, 11, LineType.RAIL))
+    edges.append((10, 5, 11, 6, LineType.RAIL))
+    edges.append((10, 11, 11, 10, LineType.RAIL))
 
     # Middle horizontal lines
     # 6,5 → 10,5
     for x in range(6, 10):
-        add_connection(x, 5, x+1, 5, LineType.RAIL)
+        edges.append((x, 5, x+1, 5, LineType.RAIL))
     # 5,6 → 5,10
     for y in range(6, 10):
-        add_connection(5, y, 5, y+1, LineType.RAIL)
+        edges.append((5, y, 5, y+1, LineType.RAIL))
     # 6,9 → 10,9
     for x in range(6, 10):
-        add_connection(x, 11, x+1, 11, LineType.RAIL)
+        edges.append((x, 11, x+1, 11, LineType.RAIL))
     # 11,6 → 11,10
     for y in range(6, 10):
-        add_connection(11, y, 11, y+1, LineType.RAIL)
+        edges.append((11, y, 11, y+1, LineType.RAIL))
 
     ## Cross shape in center
     for y in range(5, 11):
-        add_connection(8, y, 8, y+1, LineType.RAIL)
+        edges.append((8, y, 8, y+1, LineType.RAIL))
 
     for x in range(5, 11):
-        add_connection(x, 8, x+1, 8, LineType.RAIL)
+        edges.append((x, 8, x+1, 8, LineType.RAIL))
 
-def setup_connections(rows=17, cols=17):
+# Build the edge list of the board in the order the connections are added (the neighbor
+# lists in `connections` keep that order).
+def build_edges(rows=17, cols=17):
+    edges = []
     # Automatically initialize all road and rail connections on the board.
-    #Roads are created between all adjacent displayable cells except those already connected by rail.
+    # Roads are created between all adjacent displayable cells; the rails are added afterwards,
+    # so adjacent rail cells are connected by both.
     for y in range(rows):
         for x in range(cols):
             if not is_displayable(y, x):
@@ -105,18 +116,77 @@ def setup_connections(rows=17, cols=17):
                 nx, ny = x + dx, y + dy
                 if not (0 <= nx < cols and 0 <= ny < rows and is_displayable(ny, nx)):
                     continue
-                if is_connected_by(x, y, nx, ny, LineType.RAIL):
-                    continue
-                add_connection(x, y, nx, ny, LineType.ROAD)
-
-    setup_rail_connections()
-
-setup_connections()
-
-# Add diagonal road connections between each camp cell and its four diagonals
-for x, y in camp_positions:
-    for dx, dy in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
-        nx, ny = x + dx, y + dy
-        if 0 <= nx < 17 and 0 <= ny < 17:
-            add_connection(x, y, nx, ny, LineType.ROAD)
-
+                edges.append((x, y, nx, ny, LineType.ROAD))
+
+    setup_rail_connections(edges)
+
+    # Add diagonal road connections between each camp cell and its four diagonals
+    for x, y in camp_positions:
+        for dx, dy in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < 17 and 0 <= ny < 17:
+                edges.append((x, y, nx, ny, LineType.ROAD))
+    return edges
+
+
+# A fresh connections table built from `edges`.
+def build_connections(edges=None):
+    table = {}
+    for x1, y1, x2, y2, line_type in edges if edges is not None else build_edges():
+        add_connection(x1, y1, x2, y2, line_type, table)
+    return table
+
+
+# Load `connections` from the frozen table shipped with the package.
+def _load_frozen():
+    from routes_table import EDGES
+    types = {t.value: t for t in LineType}
+    for i in range(0, len(EDGES), 5):
+        x1, y1, x2, y2, line_type = EDGES[i:i + 5]
+        add_connection(x1, y1, x2, y2, types[line_type])
+
+
+# Source of routes_table.py for the current builder.
+def freeze_table(edges=None) -> str:
+    lines = [
+        "# routes_table.py - Frozen Board Topology for Four Kingdoms Military Chess",
+        "",
+        "# Generated by `python routes.py --freeze` from routes.build_edges(); do not edit by hand.",
+        "# Five bytes per edge, x1 y1 x2 y2 line_type (1 = road, 2 = rail, the LineType values),",
+        "# in the order the builder adds them. One bytes constant unmarshals much faster than a",
+        "# tuple of tuples.",
+        "",
+        "EDGES = (",
+    ]
+    for x1, y1, x2, y2, line_type in edges if edges is not None else build_edges():
+        data = "".join(f"\\x{v:02x}" for v in (x1, y1, x2, y2, line_type.value))
+        lines.append(f'    b"{data}"  # ({x1}, {y1}) - ({x2}, {y2})')
+    lines.append(")")
+    return "\n".join(lines) + "\n"
+
+
+_load_frozen()
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import sys
+
+    parser = argparse.ArgumentParser(description="Build, freeze or check the board topology table")
+    parser.add_argument("--freeze", action="store_true", help="rewrite routes_table.py from the builder")
+    parser.add_argument("--check", action="store_true",
+                        help="verify that routes_table.py matches the builder (exit status 1 if not)")
+    args = parser.parse_args()
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "routes_table.py")
+    if args.freeze:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(freeze_table())
+        print(f"wrote {path}")
+    if args.check or not args.freeze:
+        built = build_connections()
+        if built != connections:
+            print("routes_table.py does not match the builder; run python routes.py --freeze")
+            sys.exit(1)
+        print(f"routes_table.py matches the builder ({sum(map(len, built.values())) // 2} edges)")
@@ -0,0 +1,401 @@
+# routes_table.py - Frozen Board Topology for Four Kingdoms Military Chess
+
+# Generated by `python routes.py --freeze` from routes.build_edges(); do not edit by hand.
+# Five bytes per edge, x1 y1 x2 y2 line_type (1 = road, 2 = rail, the LineType values),
+# in the order the builder adds them. One bytes constant unmarshals much faster than a
+# tuple of tuples.
+
+EDGES = (
+    b"\x06\x00\x07\x00\x01"  # (6, 0) - (7, 0)
+    b"\x06\x00\x06\x01\x01"  # (6, 0) - (6, 1)
+    b"\x07\x00\x08\x00\x01"  # (7, 0) - (8, 0)
+    b"\x07\x00\x07\x01\x01"  # (7, 0) - (7, 1)
+    b"\x08\x00\x09\x00\x01"  # (8, 0) - (9, 0)
+    b"\x08\x00\x08\x01\x01"  # (8, 0) - (8, 1)
+    b"\x09\x00\x0a\x00\x01"  # (9, 0) - (10, 0)
+    b"\x09\x00\x09\x01\x01"  # (9, 0) - (9, 1)
+    b"\x0a\x00\x0a\x01\x01"  # (10, 0) - (10, 1)
+    b"\x06\x01\x07\x01\x01"  # (6, 1) - (7, 1)
+    b"\x06\x01\x06\x02\x01"  # (6, 1) - (6, 2)
+    b"\x07\x01\x08\x01\x01"  # (7, 1) - (8, 1)
+    b"\x07\x01\x07\x02\x01"  # (7, 1) - (7, 2)
+    b"\x08\x01\x09\x01\x01"  # (8, 1) - (9, 1)
+    b"\x08\x01\x08\x02\x01"  # (8, 1) - (8, 2)
+    b"\x09\x01\x0a\x01\x01"  # (9, 1) - (10, 1)
+    b"\x09\x01\x09\x02\x01"  # (9, 1) - (9, 2)
+    b"\x0a\x01\x0a\x02\x01"  # (10, 1) - (10, 2)
+    b"\x06\x02\x07\x02\x01"  # (6, 2) - (7, 2)
+    b"\x06\x02\x06\x03\x01"  # (6, 2) - (6, 3)
+    b"\x07\x02\x08\x02\x01"  # (7, 2) - (8, 2)
+    b"\x07\x02\x07\x03\x01"  # (7, 2) - (7, 3)
+    b"\x08\x02\x09\x02\x01"  # (8, 2) - (9, 2)
+    b"\x08\x02\x08\x03\x01"  # (8, 2) - (8, 3)
+    b"\x09\x02\x0a\x02\x01"  # (9, 2) - (10, 2)
+    b"\x09\x02\x09\x03\x01"  # (9, 2) - (9, 3)
+    b"\x0a\x02\x0a\x03\x01"  # (10, 2) - (10, 3)
+    b"\x06\x03\x07\x03\x01"  # (6, 3) - (7, 3)
+    b"\x06\x03\x06\x04\x01"  # (6, 3) - (6, 4)
+    b"\x07\x03\x08\x03\x01"  # (7, 3) - (8, 3)
+    b"\x07\x03\x07\x04\x01"  # (7, 3) - (7, 4)
+    b"\x08\x03\x09\x03\x01"  # (8, 3) - (9, 3)
+    b"\x08\x03\x08\x04\x01"  # (8, 3) - (8, 4)
+    b"\x09\x03\x0a\x03\x01"  # (9, 3) - (10, 3)
+    b"\x09\x03\x09\x04\x01"  # (9, 3) - (9, 4)
+    b"\x0a\x03\x0a\x04\x01"  # (10, 3) - (10, 4)
+    b"\x06\x04\x07\x04\x01"  # (6, 4) - (7, 4)
+    b"\x06\x04\x06\x05\x01"  # (6, 4) - (6, 5)
+    b"\x07\x04\x08\x04\x01"  # (7, 4) - (8, 4)
+    b"\x07\x04\x07\x05\x01"  # (7, 4) - (7, 5)
+    b"\x08\x04\x09\x04\x01"  # (8, 4) - (9, 4)
+    b"\x08\x04\x08\x05\x01"  # (8, 4) - (8, 5)
+    b"\x09\x04\x0a\x04\x01"  # (9, 4) - (10, 4)
+    b"\x09\x04\x09\x05\x01"  # (9, 4) - (9, 5)
+    b"\x0a\x04\x0a\x05\x01"  # (10, 4) - (10, 5)
+    b"\x06\x05\x07\x05\x01"  # (6, 5) - (7, 5)
+    b"\x06\x05\x06\x06\x01"  # (6, 5) - (6, 6)
+    b"\x07\x05\x08\x05\x01"  # (7, 5) - (8, 5)
+    b"\x08\x05\x09\x05\x01"  # (8, 5) - (9, 5)
+    b"\x08\x05\x08\x06\x01"  # (8, 5) - (8, 6)
+    b"\x09\x05\x0a\x05\x01"  # (9, 5) - (10, 5)
+    b"\x0a\x05\x0a\x06\x01"  # (10, 5) - (10, 6)
+    b"\x00\x06\x01\x06\x01"  # (0, 6) - (1, 6)
+    b"\x00\x06\x00\x07\x01"  # (0, 6) - (0, 7)
+    b"\x01\x06\x02\x06\x01"  # (1, 6) - (2, 6)
+    b"\x01\x06\x01\x07\x01"  # (1, 6) - (1, 7)
+    b"\x02\x06\x03\x06\x01"  # (2, 6) - (3, 6)
+    b"\x02\x06\x02\x07\x01"  # (2, 6) - (2, 7)
+    b"\x03\x06\x04\x06\x01"  # (3, 6) - (4, 6)
+    b"\x03\x06\x03\x07\x01"  # (3, 6) - (3, 7)
+    b"\x04\x06\x05\x06\x01"  # (4, 6) - (5, 6)
+    b"\x04\x06\x04\x07\x01"  # (4, 6) - (4, 7)
+    b"\x05\x06\x06\x06\x01"  # (5, 6) - (6, 6)
+    b"\x05\x06\x05\x07\x01"  # (5, 6) - (5, 7)
+    b"\x0a\x06\x0b\x06\x01"  # (10, 6) - (11, 6)
+    b"\x0b\x06\x0c\x06\x01"  # (11, 6) - (12, 6)
+    b"\x0b\x06\x0b\x07\x01"  # (11, 6) - (11, 7)
+    b"\x0c\x06\x0d\x06\x01"  # (12, 6) - (13, 6)
+    b"\x0c\x06\x0c\x07\x01"  # (12, 6) - (12, 7)
+    b"\x0d\x06\x0e\x06\x01"  # (13, 6) - (14, 6)
+    b"\x0d\x06\x0d\x07\x01"  # (13, 6) - (13, 7)
+    b"\x0e\x06\x0f\x06\x01"  # (14, 6) - (15, 6)
+    b"\x0e\x06\x0e\x07\x01"  # (14, 6) - (14, 7)
+    b"\x0f\x06\x10\x06\x01"  # (15, 6) - (16, 6)
+    b"\x0f\x06\x0f\x07\x01"  # (15, 6) - (15, 7)
+    b"\x10\x06\x10\x07\x01"  # (16, 6) - (16, 7)
+    b"\x00\x07\x01\x07\x01"  # (0, 7) - (1, 7)
+    b"\x00\x07\x00\x08\x01"  # (0, 7) - (0, 8)
+    b"\x01\x07\x02\x07\x01"  # (1, 7) - (2, 7)
+    b"\x01\x07\x01\x08\x01"  # (1, 7) - (1, 8)
+    b"\x02\x07\x03\x07\x01"  # (2, 7) - (3, 7)
+    b"\x02\x07\x02\x08\x01"  # (2, 7) - (2, 8)
+    b"\x03\x07\x04\x07\x01"  # (3, 7) - (4, 7)
+    b"\x03\x07\x03\x08\x01"  # (3, 7) - (3, 8)
+    b"\x04\x07\x05\x07\x01"  # (4, 7) - (5, 7)
+    b"\x04\x07\x04\x08\x01"  # (4, 7) - (4, 8)
+    b"\x05\x07\x05\x08\x01"  # (5, 7) - (5, 8)
+    b"\x0b\x07\x0c\x07\x01"  # (11, 7) - (12, 7)
+    b"\x0b\x07\x0b\x08\x01"  # (11, 7) - (11, 8)
+    b"\x0c\x07\x0d\x07\x01"  # (12, 7) - (13, 7)
+    b"\x0c\x07\x0c\x08\x01"  # (12, 7) - (12, 8)
+    b"\x0d\x07\x0e\x07\x01"  # (13, 7) - (14, 7)
+    b"\x0d\x07\x0d\x08\x01"  # (13, 7) - (13, 8)
+    b"\x0e\x07\x0f\x07\x01"  # (14, 7) - (15, 7)
+    b"\x0e\x07\x0e\x08\x01"  # (14, 7) - (14, 8)
+    b"\x0f\x07\x10\x07\x01"  # (15, 7) - (16, 7)
+    b"\x0f\x07\x0f\x08\x01"  # (15, 7) - (15, 8)
+    b"\x10\x07\x10\x08\x01"  # (16, 7) - (16, 8)
+    b"\x00\x08\x01\x08\x01"  # (0, 8) - (1, 8)
+    b"\x00\x08\x00\x09\x01"  # (0, 8) - (0, 9)
+    b"\x01\x08\x02\x08\x01"  # (1, 8) - (2, 8)
+    b"\x01\x08\x01\x09\x01"  # (1, 8) - (1, 9)
+    b"\x02\x08\x03\x08\x01"  # (2, 8) - (3, 8)
+    b"\x02\x08\x02\x09\x01"  # (2, 8) - (2, 9)
+    b"\x03\x08\x04\x08\x01"  # (3, 8) - (4, 8)
+    b"\x03\x08\x03\x09\x01"  # (3, 8) - (3, 9)
+    b"\x04\x08\x05\x08\x01"  # (4, 8) - (5, 8)
+    b"\x04\x08\x04\x09\x01"  # (4, 8) - (4, 9)
+    b"\x05\x08\x06\x08\x01"  # (5, 8) - (6, 8)
+    b"\x05\x08\x05\x09\x01"  # (5, 8) - (5, 9)
+    b"\x0a\x08\x0b\x08\x01"  # (10, 8) - (11, 8)
+    b"\x0b\x08\x0c\x08\x01"  # (11, 8) - (12, 8)
+    b"\x0b\x08\x0b\x09\x01"  # (11, 8) - (11, 9)
+    b"\x0c\x08\x0d\x08\x01"  # (12, 8) - (13, 8)
+    b"\x0c\x08\x0c\x09\x01"  # (12, 8) - (12, 9)
+    b"\x0d\x08\x0e\x08\x01"  # (13, 8) - (14, 8)
+    b"\x0d\x08\x0d\x09\x01"  # (13, 8) - (13, 9)
+    b"\x0e\x08\x0f\x08\x01"  # (14, 8) - (15, 8)
+    b"\x0e\x08\x0e\x09\x01"  # (14, 8) - (14, 9)
+    b"\x0f\x08\x10\x08\x01"  # (15, 8) - (16, 8)
+    b"\x0f\x08\x0f\x09\x01"  # (15, 8) - (15, 9)
+    b"\x10\x08\x10\x09\x01"  # (16, 8) - (16, 9)
+    b"\x00\x09\x01\x09\x01"  # (0, 9) - (1, 9)
+    b"\x00\x09\x00\x0a\x01"  # (0, 9) - (0, 10)
+    b"\x01\x09\x02\x09\x01"  # (1, 9) - (2, 9)
+    b"\x01\x09\x01\x0a\x01"  # (1, 9) - (1, 10)
+    b"\x02\x09\x03\x09\x01"  # (2, 9) - (3, 9)
+    b"\x02\x09\x02\x0a\x01"  # (2, 9) - (2, 10)
+    b"\x03\x09\x04\x09\x01"  # (3, 9) - (4, 9)
+    b"\x03\x09\x03\x0a\x01"  # (3, 9) - (3, 10)
+    b"\x04\x09\x05\x09\x01"  # (4, 9) - (5, 9)
+    b"\x04\x09\x04\x0a\x01"  # (4, 9) - (4, 10)
+    b"\x05\x09\x05\x0a\x01"  # (5, 9) - (5, 10)
+    b"\x0b\x09\x0c\x09\x01"  # (11, 9) - (12, 9)
+    b"\x0b\x09\x0b\x0a\x01"  # (11, 9) - (11, 10)
+    b"\x0c\x09\x0d\x09\x01"  # (12, 9) - (13, 9)
+    b"\x0c\x09\x0c\x0a\x01"  # (12, 9) - (12, 10)
+    b"\x0d\x09\x0e\x09\x01"  # (13, 9) - (14, 9)
+    b"\x0d\x09\x0d\x0a\x01"  # (13, 9) - (13, 10)
+    b"\x0e\x09\x0f\x09\x01"  # (14, 9) - (15, 9)
+    b"\x0e\x09\x0e\x0a\x01"  # (14, 9) - (14, 10)
+    b"\x0f\x09\x10\x09\x01"  # (15, 9) - (16, 9)
+    b"\x0f\x09\x0f\x0a\x01"  # (15, 9) - (15, 10)
+    b"\x10\x09\x10\x0a\x01"  # (16, 9) - (16, 10)
+    b"\x00\x0a\x01\x0a\x01"  # (0, 10) - (1, 10)
+    b"\x01\x0a\x02\x0a\x01"  # (1, 10) - (2, 10)
+    b"\x02\x0a\x03\x0a\x01"  # (2, 10) - (3, 10)
+    b"\x03\x0a\x04\x0a\x01"  # (3, 10) - (4, 10)
+    b"\x04\x0a\x05\x0a\x01"  # (4, 10) - (5, 10)
+    b"\x05\x0a\x06\x0a\x01"  # (5, 10) - (6, 10)
+    b"\x06\x0a\x06\x0b\x01"  # (6, 10) - (6, 11)
+    b"\x08\x0a\x08\x0b\x01"  # (8, 10) - (8, 11)
+    b"\x0a\x0a\x0b\x0a\x01"  # (10, 10) - (11, 10)
+    b"\x0a\x0a\x0a\x0b\x01"  # (10, 10) - (10, 11)
+    b"\x0b\x0a\x0c\x0a\x01"  # (11, 10) - (12, 10)
+    b"\x0c\x0a\x0d\x0a\x01"  # (12, 10) - (13, 10)
+    b"\x0d\x0a\x0e\x0a\x01"  # (13, 10) - (14, 10)
+    b"\x0e\x0a\x0f\x0a\x01"  # (14, 10) - (15, 10)
+    b"\x0f\x0a\x10\x0a\x01"  # (15, 10) - (16, 10)
+    b"\x06\x0b\x07\x0b\x01"  # (6, 11) - (7, 11)
+    b"\x06\x0b\x06\x0c\x01"  # (6, 11) - (6, 12)
+    b"\x07\x0b\x08\x0b\x01"  # (7, 11) - (8, 11)
+    b"\x07\x0b\x07\x0c\x01"  # (7, 11) - (7, 12)
+    b"\x08\x0b\x09\x0b\x01"  # (8, 11) - (9, 11)
+    b"\x08\x0b\x08\x0c\x01"  # (8, 11) - (8, 12)
+    b"\x09\x0b\x0a\x0b\x01"  # (9, 11) - (10, 11)
+    b"\x09\x0b\x09\x0c\x01"  # (9, 11) - (9, 12)
+    b"\x0a\x0b\x0a\x0c\x01"  # (10, 11) - (10, 12)
+    b"\x06\x0c\x07\x0c\x01"  # (6, 12) - (7, 12)
+    b"\x06\x0c\x06\x0d\x01"  # (6, 12) - (6, 13)
+    b"\x07\x0c\x08\x0c\x01"  # (7, 12) - (8, 12)
+    b"\x07\x0c\x07\x0d\x01"  # (7, 12) - (7, 13)
+    b"\x08\x0c\x09\x0c\x01"  # (8, 12) - (9, 12)
+    b"\x08\x0c\x08\x0d\x01"  # (8, 12) - (8, 13)
+    b"\x09\x0c\x0a\x0c\x01"  # (9, 12) - (10, 12)
+    b"\x09\x0c\x09\x0d\x01"  # (9, 12) - (9, 13)
+    b"\x0a\x0c\x0a\x0d\x01"  # (10, 12) - (10, 13)
+    b"\x06\x0d\x07\x0d\x01"  # (6, 13) - (7, 13)
+    b"\x06\x0d\x06\x0e\x01"  # (6, 13) - (6, 14)
+    b"\x07\x0d\x08\x0d\x01"  # (7, 13) - (8, 13)
+    b"\x07\x0d\x07\x0e\x01"  # (7, 13) - (7, 14)
+    b"\x08\x0d\x09\x0d\x01"  # (8, 13) - (9, 13)
+    b"\x08\x0d\x08\x0e\x01"  # (8, 13) - (8, 14)
+    b"\x09\x0d\x0a\x0d\x01"  # (9, 13) - (10, 13)
+    b"\x09\x0d\x09\x0e\x01"  # (9, 13) - (9, 14)
+    b"\x0a\x0d\x0a\x0e\x01"  # (10, 13) - (10, 14)
+    b"\x06\x0e\x07\x0e\x01"  # (6, 14) - (7, 14)
+    b"\x06\x0e\x06\x0f\x01"  # (6, 14) - (6, 15)
+    b"\x07\x0e\x08\x0e\x01"  # (7, 14) - (8, 14)
+    b"\x07\x0e\x07\x0f\x01"  # (7, 14) - (7, 15)
+    b"\x08\x0e\x09\x0e\x01"  # (8, 14) - (9, 14)
+    b"\x08\x0e\x08\x0f\x01"  # (8, 14) - (8, 15)
+    b"\x09\x0e\x0a\x0e\x01"  # (9, 14) - (10, 14)
+    b"\x09\x0e\x09\x0f\x01"  # (9, 14) - (9, 15)
+    b"\x0a\x0e\x0a\x0f\x01"  # (10, 14) - (10, 15)
+    b"\x06\x0f\x07\x0f\x01"  # (6, 15) - (7, 15)
+    b"\x06\x0f\x06\x10\x01"  # (6, 15) - (6, 16)
+    b"\x07\x0f\x08\x0f\x01"  # (7, 15) - (8, 15)
+    b"\x07\x0f\x07\x10\x01"  # (7, 15) - (7, 16)
+    b"\x08\x0f\x09\x0f\x01"  # (8, 15) - (9, 15)
+    b"\x08\x0f\x08\x10\x01"  # (8, 15) - (8, 16)
+    b"\x09\x0f\x0a\x0f\x01"  # (9, 15) - (10, 15)
+    b"\x09\x0f\x09\x10\x01"  # (9, 15) - (9, 16)
+    b"\x0a\x0f\x0a\x10\x01"  # (10, 15) - (10, 16)
+    b"\x06\x10\x07\x10\x01"  # (6, 16) - (7, 16)
+    b"\x07\x10\x08\x10\x01"  # (7, 16) - (8, 16)
+    b"\x08\x10\x09\x10\x01"  # (8, 16) - (9, 16)
+    b"\x09\x10\x0a\x10\x01"  # (9, 16) - (10, 16)
+    b"\x06\x01\x06\x02\x02"  # (6, 1) - (6, 2)
+    b"\x0a\x01\x0a\x02\x02"  # (10, 1) - (10, 2)
+    b"\x06\x02\x06\x03\x02"  # (6, 2) - (6, 3)
+    b"\x0a\x02\x0a\x03\x02"  # (10, 2) - (10, 3)
+    b"\x06\x03\x06\x04\x02"  # (6, 3) - (6, 4)
+    b"\x0a\x03\x0a\x04\x02"  # (10, 3) - (10, 4)
+    b"\x06\x04\x06\x05\x02"  # (6, 4) - (6, 5)
+    b"\x0a\x04\x0a\x05\x02"  # (10, 4) - (10, 5)
+    b"\x06\x05\x06\x06\x02"  # (6, 5) - (6, 6)
+    b"\x0a\x05\x0a\x06\x02"  # (10, 5) - (10, 6)
+    b"\x06\x06\x06\x07\x02"  # (6, 6) - (6, 7)
+    b"\x0a\x06\x0a\x07\x02"  # (10, 6) - (10, 7)
+    b"\x06\x07\x06\x08\x02"  # (6, 7) - (6, 8)
+    b"\x0a\x07\x0a\x08\x02"  # (10, 7) - (10, 8)
+    b"\x06\x08\x06\x09\x02"  # (6, 8) - (6, 9)
+    b"\x0a\x08\x0a\x09\x02"  # (10, 8) - (10, 9)
+    b"\x06\x09\x06\x0a\x02"  # (6, 9) - (6, 10)
+    b"\x0a\x09\x0a\x0a\x02"  # (10, 9) - (10, 10)
+    b"\x06\x0a\x06\x0b\x02"  # (6, 10) - (6, 11)
+    b"\x0a\x0a\x0a\x0b\x02"  # (10, 10) - (10, 11)
+    b"\x06\x0b\x06\x0c\x02"  # (6, 11) - (6, 12)
+    b"\x0a\x0b\x0a\x0c\x02"  # (10, 11) - (10, 12)
+    b"\x06\x0c\x06\x0d\x02"  # (6, 12) - (6, 13)
+    b"\x0a\x0c\x0a\x0d\x02"  # (10, 12) - (10, 13)
+    b"\x06\x0d\x06\x0e\x02"  # (6, 13) - (6, 14)
+    b"\x0a\x0d\x0a\x0e\x02"  # (10, 13) - (10, 14)
+    b"\x06\x0e\x06\x0f\x02"  # (6, 14) - (6, 15)
+    b"\x0a\x0e\x0a\x0f\x02"  # (10, 14) - (10, 15)
+    b"\x0f\x06\x0f\x07\x02"  # (15, 6) - (15, 7)
+    b"\x0f\x07\x0f\x08\x02"  # (15, 7) - (15, 8)
+    b"\x0f\x08\x0f\x09\x02"  # (15, 8) - (15, 9)
+    b"\x0f\x09\x0f\x0a\x02"  # (15, 9) - (15, 10)
+    b"\x01\x06\x02\x06\x02"  # (1, 6) - (2, 6)
+    b"\x01\x0a\x02\x0a\x02"  # (1, 10) - (2, 10)
+    b"\x02\x06\x03\x06\x02"  # (2, 6) - (3, 6)
+    b"\x02\x0a\x03\x0a\x02"  # (2, 10) - (3, 10)
+    b"\x03\x06\x04\x06\x02"  # (3, 6) - (4, 6)
+    b"\x03\x0a\x04\x0a\x02"  # (3, 10) - (4, 10)
+    b"\x04\x06\x05\x06\x02"  # (4, 6) - (5, 6)
+    b"\x04\x0a\x05\x0a\x02"  # (4, 10) - (5, 10)
+    b"\x05\x06\x06\x06\x02"  # (5, 6) - (6, 6)
+    b"\x05\x0a\x06\x0a\x02"  # (5, 10) - (6, 10)
+    b"\x06\x06\x07\x06\x02"  # (6, 6) - (7, 6)
+    b"\x06\x0a\x07\x0a\x02"  # (6, 10) - (7, 10)
+    b"\x07\x06\x08\x06\x02"  # (7, 6) - (8, 6)
+    b"\x07\x0a\x08\x0a\x02"  # (7, 10) - (8, 10)
+    b"\x08\x06\x09\x06\x02"  # (8, 6) - (9, 6)
+    b"\x08\x0a\x09\x0a\x02"  # (8, 10) - (9, 10)
+    b"\x09\x06\x0a\x06\x02"  # (9, 6) - (10, 6)
+    b"\x09\x0a\x0a\x0a\x02"  # (9, 10) - (10, 10)
+    b"\x0a\x06\x0b\x06\x02"  # (10, 6) - (11, 6)
+    b"\x0a\x0a\x0b\x0a\x02"  # (10, 10) - (11, 10)
+    b"\x0b\x06\x0c\x06\x02"  # (11, 6) - (12, 6)
+    b"\x0b\x0a\x0c\x0a\x02"  # (11, 10) - (12, 10)
+    b"\x0c\x06\x0d\x06\x02"  # (12, 6) - (13, 6)
+    b"\x0c\x0a\x0d\x0a\x02"  # (12, 10) - (13, 10)
+    b"\x0d\x06\x0e\x06\x02"  # (13, 6) - (14, 6)
+    b"\x0d\x0a\x0e\x0a\x02"  # (13, 10) - (14, 10)
+    b"\x0e\x06\x0f\x06\x02"  # (14, 6) - (15, 6)
+    b"\x0e\x0a\x0f\x0a\x02"  # (14, 10) - (15, 10)
+    b"\x06\x01\x07\x01\x02"  # (6, 1) - (7, 1)
+    b"\x06\x0f\x07\x0f\x02"  # (6, 15) - (7, 15)
+    b"\x07\x01\x08\x01\x02"  # (7, 1) - (8, 1)
+    b"\x07\x0f\x08\x0f\x02"  # (7, 15) - (8, 15)
+    b"\x08\x01\x09\x01\x02"  # (8, 1) - (9, 1)
+    b"\x08\x0f\x09\x0f\x02"  # (8, 15) - (9, 15)
+    b"\x09\x01\x0a\x01\x02"  # (9, 1) - (10, 1)
+    b"\x09\x0f\x0a\x0f\x02"  # (9, 15) - (10, 15)
+    b"\x01\x06\x01\x07\x02"  # (1, 6) - (1, 7)
+    b"\x01\x07\x01\x08\x02"  # (1, 7) - (1, 8)
+    b"\x01\x08\x01\x09\x02"  # (1, 8) - (1, 9)
+    b"\x01\x09\x01\x0a\x02"  # (1, 9) - (1, 10)
+    b"\x05\x06\x06\x05\x02"  # (5, 6) - (6, 5)
+    b"\x05\x0a\x06\x0b\x02"  # (5, 10) - (6, 11)
+    b"\x0a\x05\x0b\x06\x02"  # (10, 5) - (11, 6)
+    b"\x0a\x0b\x0b\x0a\x02"  # (10, 11) - (11, 10)
+    b"\x06\x05\x07\x05\x02"  # (6, 5) - (7, 5)
+    b"\x07\x05\x08\x05\x02"  # (7, 5) - (8, 5)
+    b"\x08\x05\x09\x05\x02"  # (8, 5) - (9, 5)
+    b"\x09\x05\x0a\x05\x02"  # (9, 5) - (10, 5)
+    b"\x05\x06\x05\x07\x02"  # (5, 6) - (5, 7)
+    b"\x05\x07\x05\x08\x02"  # (5, 7) - (5, 8)
+    b"\x05\x08\x05\x09\x02"  # (5, 8) - (5, 9)
+    b"\x05\x09\x05\x0a\x02"  # (5, 9) - (5, 10)
+    b"\x06\x0b\x07\x0b\x02"  # (6, 11) - (7, 11)
+    b"\x07\x0b\x08\x0b\x02"  # (7, 11) - (8, 11)
+    b"\x08\x0b\x09\x0b\x02"  # (8, 11) - (9, 11)
+    b"\x09\x0b\x0a\x0b\x02"  # (9, 11) - (10, 11)
+    b"\x0b\x06\x0b\x07\x02"  # (11, 6) - (11, 7)
+    b"\x0b\x07\x0b\x08\x02"  # (11, 7) - (11, 8)
+    b"\x0b\x08\x0b\x09\x02"  # (11, 8) - (11, 9)
+    b"\x0b\x09\x0b\x0a\x02"  # (11, 9) - (11, 10)
+    b"\x08\x05\x08\x06\x02"  # (8, 5) - (8, 6)
+    b"\x08\x06\x08\x07\x02"  # (8, 6) - (8, 7)
+    b"\x08\x07\x08\x08\x02"  # (8, 7) - (8, 8)
+    b"\x08\x08\x08\x09\x02"  # (8, 8) - (8, 9)
+    b"\x08\x09\x08\x0a\x02"  # (8, 9) - (8, 10)
+    b"\x08\x0a\x08\x0b\x02"  # (8, 10) - (8, 11)
+    b"\x05\x08\x06\x08\x02"  # (5, 8) - (6, 8)
+    b"\x06\x08\x07\x08\x02"  # (6, 8) - (7, 8)
+    b"\x07\x08\x08\x08\x02"  # (7, 8) - (8, 8)
+    b"\x08\x08\x09\x08\x02"  # (8, 8) - (9, 8)
+    b"\x09\x08\x0a\x08\x02"  # (9, 8) - (10, 8)
+    b"\x0a\x08\x0b\x08\x02"  # (10, 8) - (11, 8)
+    b"\x02\x07\x01\x06\x01"  # (2, 7) - (1, 6)
+    b"\x02\x07\x01\x08\x01"  # (2, 7) - (1, 8)
+    b"\x02\x07\x03\x06\x01"  # (2, 7) - (3, 6)
+    b"\x02\x07\x03\x08\x01"  # (2, 7) - (3, 8)
+    b"\x04\x07\x03\x06\x01"  # (4, 7) - (3, 6)
+    b"\x04\x07\x03\x08\x01"  # (4, 7) - (3, 8)
+    b"\x04\x07\x05\x06\x01"  # (4, 7) - (5, 6)
+    b"\x04\x07\x05\x08\x01"  # (4, 7) - (5, 8)
+    b"\x0e\x07\x0d\x06\x01"  # (14, 7) - (13, 6)
+    b"\x0e\x07\x0d\x08\x01"  # (14, 7) - (13, 8)
+    b"\x0e\x07\x0f\x06\x01"  # (14, 7) - (15, 6)
+    b"\x0e\x07\x0f\x08\x01"  # (14, 7) - (15, 8)
+    b"\x0c\x07\x0b\x06\x01"  # (12, 7) - (11, 6)
+    b"\x0c\x07\x0b\x08\x01"  # (12, 7) - (11, 8)
+    b"\x0c\x07\x0d\x06\x01"  # (12, 7) - (13, 6)
+    b"\x0c\x07\x0d\x08\x01"  # (12, 7) - (13, 8)
+    b"\x02\x09\x01\x08\x01"  # (2, 9) - (1, 8)
+    b"\x02\x09\x01\x0a\x01"  # (2, 9) - (1, 10)
+    b"\x02\x09\x03\x08\x01"  # (2, 9) - (3, 8)
+    b"\x02\x09\x03\x0a\x01"  # (2, 9) - (3, 10)
+    b"\x04\x09\x03\x08\x01"  # (4, 9) - (3, 8)
+    b"\x04\x09\x03\x0a\x01"  # (4, 9) - (3, 10)
+    b"\x04\x09\x05\x08\x01"  # (4, 9) - (5, 8)
+    b"\x04\x09\x05\x0a\x01"  # (4, 9) - (5, 10)
+    b"\x0e\x09\x0d\x08\x01"  # (14, 9) - (13, 8)
+    b"\x0e\x09\x0d\x0a\x01"  # (14, 9) - (13, 10)
+    b"\x0e\x09\x0f\x08\x01"  # (14, 9) - (15, 8)
+    b"\x0e\x09\x0f\x0a\x01"  # (14, 9) - (15, 10)
+    b"\x0c\x09\x0b\x08\x01"  # (12, 9) - (11, 8)
+    b"\x0c\x09\x0b\x0a\x01"  # (12, 9) - (11, 10)
+    b"\x0c\x09\x0d\x08\x01"  # (12, 9) - (13, 8)
+    b"\x0c\x09\x0d\x0a\x01"  # (12, 9) - (13, 10)
+    b"\x03\x08\x02\x07\x01"  # (3, 8) - (2, 7)
+    b"\x03\x08\x02\x09\x01"  # (3, 8) - (2, 9)
+    b"\x03\x08\x04\x07\x01"  # (3, 8) - (4, 7)
+    b"\x03\x08\x04\x09\x01"  # (3, 8) - (4, 9)
+    b"\x0d\x08\x0c\x07\x01"  # (13, 8) - (12, 7)
+    b"\x0d\x08\x0c\x09\x01"  # (13, 8) - (12, 9)
+    b"\x0d\x08\x0e\x07\x01"  # (13, 8) - (14, 7)
+    b"\x0d\x08\x0e\x09\x01"  # (13, 8) - (14, 9)
+    b"\x07\x02\x06\x01\x01"  # (7, 2) - (6, 1)
+    b"\x07\x02\x06\x03\x01"  # (7, 2) - (6, 3)
+    b"\x07\x02\x08\x01\x01"  # (7, 2) - (8, 1)
+    b"\x07\x02\x08\x03\x01"  # (7, 2) - (8, 3)
+    b"\x07\x04\x06\x03\x01"  # (7, 4) - (6, 3)
+    b"\x07\x04\x06\x05\x01"  # (7, 4) - (6, 5)
+    b"\x07\x04\x08\x03\x01"  # (7, 4) - (8, 3)
+    b"\x07\x04\x08\x05\x01"  # (7, 4) - (8, 5)
+    b"\x07\x0c\x06\x0b\x01"  # (7, 12) - (6, 11)
+    b"\x07\x0c\x06\x0d\x01"  # (7, 12) - (6, 13)
+    b"\x07\x0c\x08\x0b\x01"  # (7, 12) - (8, 11)
+    b"\x07\x0c\x08\x0d\x01"  # (7, 12) - (8, 13)
+    b"\x07\x0e\x06\x0d\x01"  # (7, 14) - (6, 13)
+    b"\x07\x0e\x06\x0f\x01"  # (7, 14) - (6, 15)
+    b"\x07\x0e\x08\x0d\x01"  # (7, 14) - (8, 13)
+    b"\x07\x0e\x08\x0f\x01"  # (7, 14) - (8, 15)
+    b"\x09\x02\x08\x01\x01"  # (9, 2) - (8, 1)
+    b"\x09\x02\x08\x03\x01"  # (9, 2) - (8, 3)
+    b"\x09\x02\x0a\x01\x01"  # (9, 2) - (10, 1)
+    b"\x09\x02\x0a\x03\x01"  # (9, 2) - (10, 3)
+    b"\x09\x04\x08\x03\x01"  # (9, 4) - (8, 3)
+    b"\x09\x04\x08\x05\x01"  # (9, 4) - (8, 5)
+    b"\x09\x04\x0a\x03\x01"  # (9, 4) - (10, 3)
+    b"\x09\x04\x0a\x05\x01"  # (9, 4) - (10, 5)
+    b"\x09\x0c\x08\x0b\x01"  # (9, 12) - (8, 11)
+    b"\x09\x0c\x08\x0d\x01"  # (9, 12) - (8, 13)
+    b"\x09\x0c\x0a\x0b\x01"  # (9, 12) - (10, 11)
+    b"\x09\x0c\x0a\x0d\x01"  # (9, 12) - (10, 13)
+    b"\x09\x0e\x08\x0d\x01"  # (9, 14) - (8, 13)
+    b"\x09\x0e\x08\x0f\x01"  # (9, 14) - (8, 15)
+    b"\x09\x0e\x0a\x0d\x01"  # (9, 14) - (10, 13)
+    b"\x09\x0e\x0a\x0f\x01"  # (9, 14) - (10, 15)
+    b"\x08\x03\x07\x02\x01"  # (8, 3) - (7, 2)
+    b"\x08\x03\x07\x04\x01"  # (8, 3) - (7, 4)
+    b"\x08\x03\x09\x02\x01"  # (8, 3) - (9, 2)
+    b"\x08\x03\x09\x04\x01"  # (8, 3) - (9, 4)
+    b"\x08\x0d\x07\x0c\x01"  # (8, 13) - (7, 12)
+    b"\x08\x0d\x07\x0e\x01"  # (8, 13) - (7, 14)
+    b"\x08\x0d\x09\x0c\x01"  # (8, 13) - (9, 12)
+    b"\x08\x0d\x09\x0e\x01"  # (8, 13) - (9, 14)
+)
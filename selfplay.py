@@ -0,0 +1,288 @@
+# selfplay.py - Self-Play Batch Runner for Four Kingdoms Military Chess
+
+# This module plays many agent-vs-agent games without the GUI, spread over a process pool.
+
+# - Every game starts from a fresh Game.generate_random_setup (four players) or
+#   generate_random_setup_red_green (two players), or from a deployment drawn from a book file:
+#   either one board_encoding hex string per line, or a binary setup book (setup_book.py)
+#   whose per-seat deployments are drawn weighted by their win rates.
+# - Two agents (see agents.py) are given as spec strings; agent A plays alliance 1 in even
+#   games and alliance 2 in odd games so neither keeps the first move.
+# - Each game gets its own seed derived from the run seed, so a game plays out the same no
+#   matter which worker picks it up, and no two workers share a random stream.
+# - Results are appended to a JSON-lines file as soon as each game finishes.
+# - Throughput is reported as games/hour, plies/sec and CPU utilization (CPU time spent in
+#   games divided by wall time times the number of workers).
+
+# Usage:
+#     python selfplay.py --games 1000 --workers 8 --agent-a heuristic --agent-b random
+
+import json
+import os
+import random
+import sys
+import time
+
+from agents import make_agent
+from board_encoding import REVEALED_BIT, encode_board, decode_board
+from chessboard import Outcome
+from constants import ALLIANCE
+from engine_protocol import observed_position
+from game_record import GameRecordWriter
+from mcts import _pool_context, TWO_PLAYER_ORDER
+from movegen import legal_moves, resolve_eliminations, winning_alliance, next_side, skip_stuck_side
+
+FOUR_PLAYER_ORDER = ("Red", "Yellow", "Green", "Blue")   # game_state.COLORS
+MODES = {
+    "2p": (TWO_PLAYER_ORDER, {"Red": 1, "Green": 2}),
+    "4p": (FOUR_PLAYER_ORDER, dict(ALLIANCE)),
+}
+
+
+# Read a setup book: a binary setup book (setup_book.SetupBook), or a text file of one
+# hex-encoded board per line, blank lines and # comments ignored.
+def load_book(path: str):
+    from setup_book import BOOK_HEADER, SetupBook
+    with open(path, "rb") as f:
+        binary = f.read(len(BOOK_HEADER)) == BOOK_HEADER
+    if binary:
+        return SetupBook(path)
+    with open(path, encoding="utf-8") as f:
+        return [bytes.fromhex(line.strip()) for line in f
+                if line.strip() and not line.startswith("#")]
+
+
+# Return the encoded starting board for a game, using the global `random` state
+# (Game's setup generators draw from it).
+def make_setup(mode: str, book=None) -> bytes:
+    if book:
+        if hasattr(book, "setup"):
+            return book.setup(mode, random)
+        return random.choice(book)
+    from game import Game
+    game = Game()
+    if mode == "2p":
+        game.generate_random_setup_red_green()
+    else:
+        game.generate_random_setup()
+    return encode_board(game.board)
+
+
+# Mark the piece that survived a fight as revealed.
+def reveal_survivor(board, move, outcome) -> None:
+    if outcome in (Outcome.WIN, Outcome.LOSE):
+        board.grid[move[3]][move[2]].revealed = True
+        board.touch()
+
+
+# Play one game between `agents` ({alliance: agent}) from the encoded board `code`.
+# Games that reach `max_plies` end without a winner. With `reveal_survivors` the survivor of
+# every fight is turned face up, as on the game server (for games that start face down).
+# With `observe` every agent gets only the mover's Observation as a board plus a BeliefSampler
+# over its unknown pieces (engine_protocol.observed_position), so the search engines
+# determinize; by default this is on whenever some piece starts face down.
+def play_game(code: bytes, mode: str, agents: dict, max_plies: int = 2000,
+              record_moves: bool = False, reveal_survivors: bool = False,
+              observe: bool | None = None) -> dict:
+    turn_order, alliance_map = MODES[mode]
+    if observe is None:
+        observe = any(c and not c & REVEALED_BIT for c in code)
+    board = decode_board(code, alliance_map)
+    sides = resolve_eliminations(board, list(turn_order))
+    side = turn_order[0] if winning_alliance(board, sides) is None else None
+    moves, outcomes = [], []
+    plies = 0
+    while side is not None and plies < max_plies:
+        if not legal_moves(board, side):
+            side, sides = skip_stuck_side(board, turn_order, sides, side)
+            continue
+        agent = agents[alliance_map[side]]
+        if observe:
+            view, sampler, _ = observed_position(mode, side, board.observe(side))
+            move = agent.select_move(view, side, turn_order, sampler)
+        else:
+            move = agent.select_move(board, side, turn_order)
+        outcome = board.apply_move(*move)
+        if reveal_survivors:
+            reveal_survivor(board, move, outcome)
+        plies += 1
+        if record_moves:
+            moves.append(move)
+            outcomes.append(outcome)
+        sides = resolve_eliminations(board, sides)
+        if winning_alliance(board, sides) is not None:
+            side = None
+        else:
+            side = next_side(turn_order, side, sides)
+    winner = winning_alliance(board, sides) if sides else None
+    result = {"winner": winner, "plies": plies,
+              "reason": "win" if winner is not None else "max_plies"}
+    if record_moves:
+        result["moves"] = moves
+        result["outcomes"] = outcomes
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Worker processes
+# ---------------------------------------------------------------------------
+
+# Per-process state, installed by _init_worker: (config dict, {"a": agent, "b": agent}, book)
+_worker_state = None
+
+
+def _init_worker(config: dict) -> None:
+    global _worker_state
+    book = load_book(config["book"]) if config["book"] else None
+    agents = {"a": make_agent(config["agent_a"]), "b": make_agent(config["agent_b"])}
+    _worker_state = (config, agents, book)
+
+
+# Play game number `index` with its own seed and return its result record.
+def _game_task(args) -> dict:
+    index, seed = args
+    config, agents, book = _worker_state
+    start, cpu_start = time.perf_counter(), time.process_time()
+
+    random.seed(seed)
+    code = make_setup(config["mode"], book)
+    for label, agent in agents.items():
+        agent.seed(f"{seed}/{label}")
+    seats = {1: agents["a"], 2: agents["b"]} if index % 2 == 0 else {1: agents["b"], 2: agents["a"]}
+    keep_moves = config["record_moves"] or config["record"]
+    result = play_game(code, config["mode"], seats, config["max_plies"], keep_moves,
+                       observe=config["observe"])
+
+    first = "a" if index % 2 == 0 else "b"
+    second = "b" if first == "a" else "a"
+    winner = result["winner"]
+    record = {
+        "game": index,
+        "seed": seed,
+        "mode": config["mode"],
+        "setup": code.hex(),
+        "alliance_1": config["agent_" + first],
+        "alliance_2": config["agent_" + second],
+        "winner": winner,
+        "winner_agent": None if winner is None else (first if winner == 1 else second),
+        "plies": result["plies"],
+        "reason": result["reason"],
+        "seconds": time.perf_counter() - start,
+        "cpu_seconds": time.process_time() - cpu_start,
+        "pid": os.getpid(),
+    }
+    if keep_moves:
+        record["moves"] = result["moves"]
+        record["outcomes"] = [int(o) for o in result["outcomes"]]
+    return record
+
+
+# ---------------------------------------------------------------------------
+# Batch runner
+# ---------------------------------------------------------------------------
+
+# Throughput summary over the records finished so far.
+def summarize(records: list[dict], elapsed: float, workers: int) -> dict:
+    games = len(records)
+    plies = sum(r["plies"] for r in records)
+    cpu = sum(r["cpu_seconds"] for r in records)
+    wins = {"a": 0, "b": 0, None: 0}
+    for r in records:
+        wins[r["winner_agent"]] += 1
+    return {
+        "games": games,
+        "plies": plies,
+        "seconds": elapsed,
+        "games_per_hour": games / elapsed * 3600 if elapsed else 0.0,
+        "plies_per_sec": plies / elapsed if elapsed else 0.0,
+        "cpu_utilization": cpu / (elapsed * workers) if elapsed else 0.0,
+        "wins_a": wins["a"],
+        "wins_b": wins["b"],
+        "draws": wins[None],
+    }
+
+
+def _format_summary(s: dict) -> str:
+    return (f"{s['games']} games  {s['games_per_hour']:.0f} games/h  "
+            f"{s['plies_per_sec']:.0f} plies/s  cpu {s['cpu_utilization']:.0%}  "
+            f"A {s['wins_a']} / B {s['wins_b']} / draw {s['draws']}")
+
+
+# Play `games` games on `workers` processes and append one JSON line per game to `output`.
+# If `record` is given, every game is also appended to that binary game record file
+# (game_record.py). With workers=1 the games run in this process. `observe` is passed to
+# play_game (None: agents only see their Observation when the setup starts face down).
+# Returns the final summary.
+def run_selfplay(games: int, output: str, workers: int = 1, agent_a: str = "random",
+                 agent_b: str = "random", mode: str = "2p", book: str | None = None,
+                 max_plies: int = 2000, seed: int = 0, record_moves: bool = False,
+                 report_every: int = 10, log=sys.stderr, record: str | None = None,
+                 observe: bool | None = None) -> dict:
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode: {mode}")
+    config = {"agent_a": agent_a, "agent_b": agent_b, "mode": mode, "book": book,
+              "max_plies": max_plies, "record_moves": record_moves, "record": record,
+              "observe": observe}
+    rng = random.Random(seed)
+    tasks = [(i, rng.getrandbits(63)) for i in range(games)]
+
+    records = []
+    start = time.perf_counter()
+    pool = None
+    if workers > 1:
+        pool = _pool_context().Pool(workers, _init_worker, (config,))
+        results = pool.imap_unordered(_game_task, tasks)
+    else:
+        _init_worker(config)
+        results = map(_game_task, tasks)
+    writer = GameRecordWriter(record) if record else None
+    try:
+        with open(output, "a", encoding="utf-8") as out:
+            for r in results:
+                if writer is not None:
+                    writer.write_game(bytes.fromhex(r["setup"]), mode, r["moves"], r["outcomes"],
+                                      r["winner"])
+                if not record_moves:
+                    r.pop("moves", None)
+                    r.pop("outcomes", None)
+                out.write(json.dumps(r) + "\n")
+                out.flush()
+                records.append(r)
+                if log and report_every and len(records) % report_every == 0:
+                    summary = summarize(records, time.perf_counter() - start, workers)
+                    print(_format_summary(summary), file=log, flush=True)
+    finally:
+        if writer is not None:
+            writer.close()
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return summarize(records, time.perf_counter() - start, workers)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    parser = argparse.ArgumentParser(description="Self-play batch runner")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--agent-a", default="random", help='agent spec, e.g. "mcts:iterations=200"')
+    parser.add_argument("--agent-b", default="random")
+    parser.add_argument("--mode", choices=sorted(MODES), default="2p")
+    parser.add_argument("--book", help="setup book file (setup_book.py, or hex-encoded boards one per line)")
+    parser.add_argument("--max-plies", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="selfplay.jsonl")
+    parser.add_argument("--record-moves", action="store_true", help="include moves in the JSON lines")
+    parser.add_argument("--record", help="also append every game to this binary game record file")
+    parser.add_argument("--report-every", type=int, default=10)
+    parser.add_argument("--observe", action=argparse.BooleanOptionalAction, default=None,
+                        help="agents only see their side's Observation plus a BeliefSampler "
+                             "(default: only when the setup starts face down)")
+    args = parser.parse_args()
+
+    summary = run_selfplay(args.games, args.output, args.workers, args.agent_a, args.agent_b,
+                           args.mode, args.book, args.max_plies, args.seed, args.record_moves,
+                           args.report_every, record=args.record, observe=args.observe)
+    print(_format_summary(summary))
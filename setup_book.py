@@ -0,0 +1,312 @@
+# setup_book.py - Deployment (Setup) Book for Four Kingdoms Military Chess
+
+# This module stores deployments of single seats (the 25 pieces one side places in its zone)
+# with the results they scored, and draws deployments from them weighted by those results,
+# so games can start from proven setups instead of Game.generate_random_setup.
+
+# A deployment is keyed by its seat-relative encoding: the 30 cells of a seat's zone in the
+# order row 0 (front row, next to the center) to row 5 (back row, with the headquarters),
+# each row from the seat's own left to right, one type code (board_encoding, 0 = empty) per
+# cell, packed two per byte, low nibble first (15 bytes). The same setup therefore has the
+# same key on every seat, and SEAT_CELLS maps it back onto any seat's board cells.
+
+# Book file layout (all integers little endian), read through a memory map:
+#   BOOK_HEADER                       8 bytes, magic and format version
+#   seat table                        per seat in SEATS order: first entry, entry count (u32)
+#   entries                           24 bytes each, sorted by (seat, key):
+#                                       seat (u8, index into SEATS), key (15 bytes),
+#                                       games (u32), wins (u32)
+#   alias table                       8 bytes per entry: threshold (u32), alias entry (u32)
+# The alias table (Walker's method, built per seat when the book is written) makes a
+# weighted draw O(1): pick an entry of the seat uniformly, keep it if a uniform u32 is below
+# its threshold, otherwise take its alias. The weight of an entry is its smoothed win rate
+# (wins + 1) / (games + 2) raised to `sharpness`; curated setups without games weigh 0.5.
+
+# The book also gives BeliefSampler an empirical prior over the opponents' setups: prior()
+# counts, per cell, how often each piece type was deployed there (weighted by games played).
+
+# Usage:
+#     python setup_book.py build book.sbk --archive selfplay.sgr --curated setups.txt
+#     python setup_book.py info book.sbk
+#     python setup_book.py draw book.sbk --mode 4p --count 3
+
+import mmap
+import os
+import struct
+
+from board_encoding import CELL_ID, OWNER_CODE, OWNER_SHIFT, PIECE_TYPES, REVEALED_BIT, TYPE_MASK
+
+BOOK_HEADER = b"SBOOK\x00\x01\x00"   # magic, format version 1
+SEATS = ("Red", "Yellow", "Green", "Blue")   # board_encoding.OWNERS order
+ROWS, COLS = 6, 5
+KEY_BYTES = ROWS * COLS // 2
+
+_SEAT_TABLE = struct.Struct("<" + "II" * len(SEATS))
+_ENTRY = struct.Struct(f"<B{KEY_BYTES}sII")
+_ALIAS = struct.Struct("<II")
+
+
+# Board cell (x, y) of row `row` (0 = front) and column `col` (0 = the seat's left) of a seat.
+def _seat_cell(seat: str, row: int, col: int) -> tuple[int, int]:
+    if seat == "Red":       # bottom, facing up
+        return 6 + col, 11 + row
+    if seat == "Green":     # top, facing down
+        return 10 - col, 5 - row
+    if seat == "Blue":      # left, facing right
+        return 5 - row, 6 + col
+    return 11 + row, 10 - col   # Yellow: right, facing left
+
+
+SEAT_CELLS = {seat: tuple(_seat_cell(seat, r, c) for r in range(ROWS) for c in range(COLS))
+              for seat in SEATS}
+_SEAT_IDS = {seat: tuple(CELL_ID[cell] for cell in cells) for seat, cells in SEAT_CELLS.items()}
+
+
+# Key of `seat`'s deployment on the encoded board `code` (board_encoding).
+def deployment_key(code: bytes, seat: str) -> bytes:
+    types = [code[cid] & TYPE_MASK for cid in _SEAT_IDS[seat]]
+    return bytes(types[i] | types[i + 1] << 4 for i in range(0, len(types), 2))
+
+
+# Piece types of a key in seat-relative cell order (None for empty cells).
+def key_types(key: bytes) -> list:
+    types = []
+    for b in key:
+        for t in (b & 0x0F, b >> 4):
+            types.append(PIECE_TYPES[t - 1] if t else None)
+    return types
+
+
+# Write the deployment `key` onto `seat`'s zone of the encoded board `code` (a bytearray).
+def place_deployment(code: bytearray, seat: str, key: bytes) -> None:
+    owner_bits = OWNER_CODE[seat] << OWNER_SHIFT | REVEALED_BIT
+    for i, cid in enumerate(_SEAT_IDS[seat]):
+        t = key[i >> 1] >> (4 * (i & 1)) & 0x0F
+        code[cid] = t | owner_bits if t else 0
+
+
+# Draw weight of an entry with `games` played and `wins` won.
+def entry_weight(games: int, wins: int, sharpness: float = 1.0) -> float:
+    return ((wins + 1) / (games + 2)) ** sharpness
+
+
+# Walker alias table for `weights`: (thresholds as u32, aliases as offsets into weights).
+def _alias_table(weights: list[float]) -> tuple[list[int], list[int]]:
+    n = len(weights)
+    total = sum(weights)
+    scaled = [w * n / total for w in weights] if total > 0 else [1.0] * n
+    alias = list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    thresholds = [min(0xFFFFFFFF, int(p * 0x100000000)) for p in scaled]
+    for i in large + small:     # rounding leftovers always keep themselves
+        thresholds[i] = 0xFFFFFFFF
+    return thresholds, alias
+
+
+class SetupBookBuilder:
+    def __init__(self):
+        self.stats = {}     # (seat, key) -> [games, wins]
+
+    def add(self, seat: str, key: bytes, games: int = 0, wins: int = 0) -> None:
+        entry = self.stats.setdefault((seat, bytes(key)), [0, 0])
+        entry[0] += games
+        entry[1] += wins
+
+    # A curated board: every seat with pieces on `code` becomes an entry without games.
+    def add_board(self, code: bytes) -> None:
+        for seat in SEATS:
+            key = deployment_key(code, seat)
+            if any(key):
+                self.add(seat, key)
+
+    # The starting board of a finished game: one game for every seat, a win for the seats of
+    # the `winner` alliance (0 = undecided).
+    def add_game(self, code: bytes, mode: str, winner: int) -> None:
+        from selfplay import MODES
+        turn_order, alliance_map = MODES[mode]
+        for seat in turn_order:
+            self.add(seat, deployment_key(code, seat), 1, int(winner and alliance_map[seat] == winner))
+
+    # Every complete game of a game record archive (game_record.py) that starts from a
+    # deployment.
+    def add_archive(self, path: str) -> int:
+        from game_record import GameRecordReader
+        count = 0
+        with GameRecordReader(path) as reader:
+            for offset, mode, winner, _ in reader.scan():
+                setup = reader.deployment(offset)
+                if setup is not None:   # games started from a mid-game position are skipped
+                    self.add_game(setup, mode, winner)
+                    count += 1
+        return count
+
+    # Write the book to `path` and return the number of entries.
+    def write(self, path: str, sharpness: float = 1.0) -> int:
+        entries = sorted(self.stats.items(), key=lambda item: (SEATS.index(item[0][0]), item[0][1]))
+        ranges = []
+        aliases = []
+        start = 0
+        for seat in SEATS:
+            rows = [stat for (s, _), stat in entries if s == seat]
+            thresholds, alias = _alias_table([entry_weight(g, w, sharpness) for g, w in rows])
+            aliases.extend(zip(thresholds, (start + a for a in alias)))
+            ranges += [start, len(rows)]
+            start += len(rows)
+        with open(path, "wb") as f:
+            f.write(BOOK_HEADER)
+            f.write(_SEAT_TABLE.pack(*ranges))
+            for (seat, key), (games, wins) in entries:
+                f.write(_ENTRY.pack(SEATS.index(seat), key, games, wins))
+            for threshold, alias in aliases:
+                f.write(_ALIAS.pack(threshold, alias))
+        return len(entries)
+
+
+class SetupBook:
+    # Memory-maps the book at `path`; nothing is read until it is used.
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if self.data[:len(BOOK_HEADER)] != BOOK_HEADER:
+            raise ValueError(f"{path} is not a setup book")
+        ranges = _SEAT_TABLE.unpack_from(self.data, len(BOOK_HEADER))
+        self.ranges = {seat: (ranges[2 * i], ranges[2 * i + 1]) for i, seat in enumerate(SEATS)}
+        self.size = sum(count for _, count in self.ranges.values())
+        self._entries = len(BOOK_HEADER) + _SEAT_TABLE.size
+        self._aliases = self._entries + self.size * _ENTRY.size
+
+    def __len__(self) -> int:
+        return self.size
+
+    # (seat, key, games, wins) of entry `index`.
+    def entry(self, index: int) -> tuple[str, bytes, int, int]:
+        seat, key, games, wins = _ENTRY.unpack_from(self.data, self._entries + index * _ENTRY.size)
+        return SEATS[seat], key, games, wins
+
+    def entries(self, seat: str | None = None):
+        seats = SEATS if seat is None else (seat,)
+        for s in seats:
+            start, count = self.ranges[s]
+            for i in range(start, start + count):
+                yield self.entry(i)
+
+    # (games, wins) of `seat`'s deployment `key`, or None if the book does not have it.
+    def lookup(self, seat: str, key: bytes) -> tuple[int, int] | None:
+        lo, count = self.ranges[seat]
+        hi = lo + count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            _, k, games, wins = self.entry(mid)
+            if k == key:
+                return games, wins
+            if k < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    # A deployment key for `seat`, drawn by weight in O(1); None if the seat has no entries.
+    def draw(self, seat: str, rng) -> bytes | None:
+        start, count = self.ranges[seat]
+        if not count:
+            return None
+        i = start + int(rng.random() * count)
+        threshold, alias = _ALIAS.unpack_from(self.data, self._aliases + i * _ALIAS.size)
+        if rng.getrandbits(32) >= threshold:
+            i = alias
+        return self.entry(i)[1]
+
+    # An encoded starting board for `mode` with every seat drawn from the book. Seats the book
+    # has no deployment for keep a Game.generate_random_setup deployment.
+    def setup(self, mode: str, rng) -> bytes:
+        from selfplay import MODES, make_setup
+        code = bytearray(make_setup(mode))
+        for seat in MODES[mode][0]:
+            key = self.draw(seat, rng)
+            if key is not None:
+                place_deployment(code, seat, key)
+        return bytes(code)
+
+    # Empirical deployment counts of `seats` for BeliefSampler's `prior` argument:
+    # {(x, y): {piece type: games deployed there}} (setups without games count once).
+    def prior(self, seats) -> dict:
+        counts = {}
+        for seat in seats:
+            cells = SEAT_CELLS[seat]
+            for _, key, games, _ in self.entries(seat):
+                for cell, ptype in zip(cells, key_types(key)):
+                    if ptype is not None:
+                        row = counts.setdefault(cell, {})
+                        row[ptype] = row.get(ptype, 0) + max(games, 1)
+        return counts
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    import random
+    import time
+
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    parser = argparse.ArgumentParser(description="Build and inspect setup books")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build a book from game archives and curated boards")
+    build.add_argument("book")
+    build.add_argument("--archive", action="append", default=[], help="game record file (.sgr)")
+    build.add_argument("--curated", action="append", default=[],
+                       help="curated boards, hex-encoded one per line (the selfplay --book format)")
+    build.add_argument("--sharpness", type=float, default=1.0, help="exponent on the win rate weights")
+    info = commands.add_parser("info", help="print the entries per seat and the best setups")
+    info.add_argument("book")
+    info.add_argument("--top", type=int, default=3)
+    draw = commands.add_parser("draw", help="draw starting boards")
+    draw.add_argument("book")
+    draw.add_argument("--mode", default="2p")
+    draw.add_argument("--count", type=int, default=1)
+    draw.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        from selfplay import load_book
+        builder = SetupBookBuilder()
+        for path in args.archive:
+            print(f"{path}: {builder.add_archive(path)} games")
+        for path in args.curated:
+            boards = load_book(path)
+            for code in boards:
+                builder.add_board(code)
+            print(f"{path}: {len(boards)} curated boards")
+        print(f"{builder.write(args.book, args.sharpness)} entries written to {args.book}")
+    elif args.command == "info":
+        with SetupBook(args.book) as book:
+            for seat in SEATS:
+                rows = sorted(book.entries(seat), key=lambda e: -entry_weight(e[2], e[3]))
+                print(f"{seat}: {len(rows)} setups, {sum(e[2] for e in rows)} games")
+                for _, key, games, wins in rows[:args.top]:
+                    print(f"  {key.hex()}  {wins}/{games} won")
+    else:
+        rng = random.Random(args.seed)
+        with SetupBook(args.book) as book:
+            start = time.perf_counter()
+            boards = [book.setup(args.mode, rng) for _ in range(args.count)]
+            elapsed = time.perf_counter() - start
+        for code in boards:
+            print(code.hex())
+        print(f"# {args.count} boards in {elapsed * 1000:.1f} ms")
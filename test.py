@@ -3,6 +3,10 @@ import sys
 from game import Game
 from game_state import game_state
 from two_player_mode import two_player_mode
+from belief_sampler import BeliefSampler
+from belief_overlay import BeliefOverlay, HEATMAP_TYPES
+from board_encoding import PIECE_TYPES
+from constants import MAX_COUNTS
 
 
 # ----------------------- visual constants ---------------------------
@@ -69,9 +73,13 @@ def main() -> None:
         {"label": "红绿随机",  "rect": pygame.Rect(300, 20, 60, 30)},  # 新增按钮
         {"label": "开始",     "rect": pygame.Rect(370, 20, 60, 30)},
         {"label": "红绿开始",    "rect": pygame.Rect(440, 20, 60, 30)},
+        {"label": "概率",     "rect": pygame.Rect(510, 20, 60, 30)},
     ]
     game = Game()  # core logic instance
     state_manager = game_state
+    # 红方对隐藏敌子的信念热力图（按“概率”切换棋子类型），信念变化时才重画
+    beliefs = BeliefOverlay(GRID_SIZE, PADDING_CELLS)
+    heat_index = 1
 
     running = True
     while running:
@@ -126,7 +134,6 @@ def main() -> None:
 
                     elif button["label"] == "红绿开始":
                         state_manager = two_player_mode
-                        game.belief_sampler.initialize(game.board)
                         game.board.set_alliance_map({
                             "Red":   1,
                             "Green": 2,
@@ -138,6 +145,11 @@ def main() -> None:
                                 p = game.get_piece(c, r)
                                 if p:
                                     p.revealed = False
+                        game.belief_sampler = BeliefSampler(game.board, None, list(PIECE_TYPES),
+                                                            MAX_COUNTS, 'Red')
+
+                    elif button["label"] == "概率":
+                        heat_index = (heat_index + 1) % len(HEATMAP_TYPES)
 
 
                     break
@@ -154,26 +166,20 @@ def main() -> None:
                         print("不是你的回合！")
                         continue
                 if not _is_obstacle_cell(row, col):
+                    source = game.selected
+                    if source is not None:
+                        attacker = game.get_piece(source[1], source[0])
+                        defender = game.get_piece(col, row)
                     moved = game.on_left_click(row, col)
                     if moved and state_manager.is_playing:
-                        mover = state_manager.current_player()
-                        hidden = game.board.get_all_hidden_positions(my_side=mover)
-
-                        print(f"\n>>> {mover} 走完后的隐藏敌方棋子：")
-                        for x, y in hidden:
-                            p = game.get_piece(x, y)
-                            print(f"  位置 {(x, y)} {p.uid} owner={p.owner} revealed={p.revealed}")
-
-                        print(f"\n>>> {mover} 隐藏位置上的合法棋子类型分布（legal distribution）：")
+                        # 信念分布不再逐格打印，直接显示在棋盘的热力图上
                         bs = game.belief_sampler
-                        for pos in hidden:
-                            dist = bs.beliefs[pos]
-                            sorted_dist = sorted(dist.items(), key=lambda kv: kv[1], reverse=True)
-                            probs_str = ", ".join(f"{ptype}: {prob:.2f}" for ptype, prob in sorted_dist)
-                            print(f"  位置 {pos} -> {probs_str}")
-
-                            
-                            state_manager.next_turn()
+                        if bs is not None:
+                            if attacker.owner != bs.my_side:
+                                bs.update((source[1], source[0]), (col, row))
+                            elif defender is not None:
+                                bs.update((source[1], source[0]), (col, row), attacker, defender)
+                        state_manager.next_turn()
             elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 3:
                 x, y = event.pos
                 col = x // GRID_SIZE - PADDING_CELLS
@@ -256,6 +262,9 @@ def main() -> None:
             )
             pygame.draw.rect(screen, BLUE, rect, 3)
 
+        if HEATMAP_TYPES[heat_index] and game.belief_sampler is not None:
+            screen.blit(beliefs.layer(game.belief_sampler, HEATMAP_TYPES[heat_index]), (0, 0))
+
         game.draw_overlay(screen) #draw small
         if state_manager.is_playing:
             state_manager.check_elimination(game)
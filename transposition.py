@@ -0,0 +1,194 @@
+# transposition.py - Position Hashing and Transposition Table for Four Kingdoms Military Chess
+
+# This module provides 64-bit Zobrist hashing of a ChessBoard plus the side to move, and a
+# fixed-size transposition table shared by the search engines (mcts.py and alphabeta.py).
+
+# Hashing:
+# - Every (cell id, piece code) pair of board_encoding gets a random 64-bit key; the hash of a
+#   board is the XOR of the keys of its occupied cells, XOR the key of the side to move.
+# - The revealed bit is ignored: two boards that differ only in what has been revealed play
+#   the same way in a full-information search.
+# - move_hash_delta lets make/unmake update the hash incrementally.
+
+# Table:
+# - Memory is fixed at construction (memory_mb). Entries live in parallel typed arrays, grouped
+#   into buckets of `bucket_size` slots; the bucket index comes from the low bits of the key.
+# - policy="depth" keeps the deepest entries (a new entry only evicts a shallower one);
+#   policy="always" always stores, evicting a slot chosen from the key.
+# - hits / misses / collisions / stores / overwrites counters are kept for tuning.
+
+import random
+from array import array
+
+from board_encoding import CELL_ID, CELLS, NUM_CELLS, OWNERS, piece_code, REVEALED_BIT
+
+# Bound types stored with alpha-beta values
+EXACT = 0
+LOWER = 1   # value is a lower bound (fail high)
+UPPER = 2   # value is an upper bound (fail low)
+
+NO_MOVE = -1
+
+_rng = random.Random(0x5151_6F_4A)
+_CODE_MASK = 0x7F & ~REVEALED_BIT
+# ZOBRIST[cell_id][code] with the revealed bit masked out; code 0 (empty) hashes to 0
+ZOBRIST = [[0] + [_rng.getrandbits(64) for _ in range(_CODE_MASK)] for _ in range(NUM_CELLS)]
+SIDE_KEYS = {owner: _rng.getrandbits(64) for owner in OWNERS}
+
+
+# Hash of a board encoding (bytes from board_encoding.encode_board) and the side to move.
+def hash_code(code: bytes, side: str) -> int:
+    h = SIDE_KEYS[side]
+    for cid, c in enumerate(code):
+        if c:
+            h ^= ZOBRIST[cid][c & _CODE_MASK]
+    return h
+
+
+# Hash of a ChessBoard and the side to move.
+def hash_board(board, side: str) -> int:
+    grid = board.grid
+    h = SIDE_KEYS[side]
+    for cid, (x, y) in enumerate(CELLS):
+        p = grid[y][x]
+        if p is not None:
+            h ^= ZOBRIST[cid][piece_code(p) & _CODE_MASK]
+    return h
+
+
+# Key of the piece code `code` standing on cell id `cid` (XOR it in or out of a hash).
+def piece_key(cid: int, code: int) -> int:
+    return ZOBRIST[cid][code & _CODE_MASK]
+
+
+# XOR delta for a move from cell id `a` to cell id `b`, given the piece codes on both cells
+# before and after the move, and the side to move before and after.
+def move_hash_delta(a: int, b: int, a_before: int, b_before: int, a_after: int, b_after: int,
+                    side_before: str, side_after: str) -> int:
+    za, zb = ZOBRIST[a], ZOBRIST[b]
+    return (za[a_before & _CODE_MASK] ^ za[a_after & _CODE_MASK]
+            ^ zb[b_before & _CODE_MASK] ^ zb[b_after & _CODE_MASK]
+            ^ SIDE_KEYS[side_before] ^ SIDE_KEYS[side_after])
+
+
+# Pack a move (x1, y1, x2, y2) into a single int (from cell id * 256 + to cell id).
+def pack_move(move) -> int:
+    if move is None:
+        return NO_MOVE
+    return CELL_ID[(move[0], move[1])] << 8 | CELL_ID[(move[2], move[3])]
+
+
+# Inverse of pack_move.
+def unpack_move(packed: int):
+    if packed < 0:
+        return None
+    x1, y1 = CELLS[packed >> 8]
+    x2, y2 = CELLS[packed & 0xFF]
+    return (x1, y1, x2, y2)
+
+
+class TranspositionTable:
+    # Bytes per slot: key (8) + value (8) + move (4) + depth (1) + flag (1)
+    ENTRY_BYTES = 22
+
+    def __init__(self, memory_mb: float = 16, bucket_size: int = 4, policy: str = "depth"):
+        self.memory_mb = memory_mb
+        if policy not in ("depth", "always"):
+            raise ValueError(f"Unknown replacement policy: {policy}")
+        self.policy = policy
+        self.bucket_size = bucket_size
+        slots = max(bucket_size, int(memory_mb * 1024 * 1024) // self.ENTRY_BYTES)
+        # Round the bucket count down to a power of two so the index is a bit mask
+        buckets = 1 << ((slots // bucket_size).bit_length() - 1)
+        self.mask = buckets - 1
+        self.size = buckets * bucket_size
+        self.keys = array("Q", bytes(8 * self.size))
+        self.values = array("d", bytes(8 * self.size))
+        self.moves = array("i", [NO_MOVE]) * self.size
+        self.depths = array("b", bytes(self.size))
+        self.flags = array("B", bytes(self.size))
+        self.used = array("B", bytes(self.size))
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0   # lookups whose bucket was full of other positions
+        self.stores = 0
+        self.overwrites = 0   # stores that evicted a different position
+
+    # Remove all entries (the memory stays allocated).
+    def clear(self) -> None:
+        self.used = array("B", bytes(self.size))
+        self.reset_stats()
+
+    # Constructor arguments, used to build an identical empty table in a worker process.
+    def config(self) -> dict:
+        return {"memory_mb": self.memory_mb, "bucket_size": self.bucket_size, "policy": self.policy}
+
+    # Return (value, depth, flag, move) for `key`, or None on a miss.
+    def probe(self, key: int):
+        start = (key & self.mask) * self.bucket_size
+        keys, used = self.keys, self.used
+        full = True
+        for i in range(start, start + self.bucket_size):
+            if not used[i]:
+                full = False
+            elif keys[i] == key:
+                self.hits += 1
+                return self.values[i], self.depths[i], self.flags[i], unpack_move(self.moves[i])
+        self.misses += 1
+        if full:
+            self.collisions += 1
+        return None
+
+    # Store an entry. Depth is clamped to the signed byte range.
+    def store(self, key: int, value: float, depth: int = 0, flag: int = EXACT, move=None) -> bool:
+        depth = max(-128, min(127, depth))
+        start = (key & self.mask) * self.bucket_size
+        keys, used, depths = self.keys, self.used, self.depths
+        slot = -1
+        for i in range(start, start + self.bucket_size):
+            if used[i] and keys[i] == key:
+                if self.policy == "depth" and depth < depths[i]:
+                    return False
+                slot = i
+                break
+            if slot < 0 and not used[i]:
+                slot = i
+        if slot < 0:
+            if self.policy == "depth":
+                slot = min(range(start, start + self.bucket_size), key=depths.__getitem__)
+                if depth < depths[slot]:
+                    return False
+            else:
+                slot = start + (key >> 32) % self.bucket_size
+            self.overwrites += 1
+        keys[slot] = key
+        self.values[slot] = value
+        depths[slot] = depth
+        self.flags[slot] = flag
+        self.moves[slot] = pack_move(move)
+        used[slot] = 1
+        self.stores += 1
+        return True
+
+    # Fraction of slots in use (sampled over the first 1000 buckets for large tables).
+    def fill_rate(self) -> float:
+        n = min(self.size, 1000 * self.bucket_size)
+        return sum(self.used[:n]) / n
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": self.size,
+            "bytes": self.size * self.ENTRY_BYTES,
+            "policy": self.policy,
+            "hits": self.hits,
+            "misses": self.misses,
+            "collisions": self.collisions,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "fill_rate": self.fill_rate(),
+        }
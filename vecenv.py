@@ -0,0 +1,388 @@
+# vecenv.py - Vectorized Multi-Game Environment for Four Kingdoms Military Chess
+
+# This module runs B independent games side by side for learning agents. The games live in
+# one stacked array of compact boards (board_encoding, shape (B, NUM_CELLS), uint8) and every
+# step works on the whole batch with NumPy instead of walking ChessBoard / Piece objects.
+
+# Rules are those of ChessBoard.move_piece / apply_move and the movegen game-flow helpers:
+# - Legal moves are exactly movegen.legal_moves (checked move for move against it), computed
+#   from precomputed index tables: adjacent road/rail and special-path moves, straight rail
+#   runs that stop at the first piece, and an Engineer rail flood fill done as a batched
+#   frontier expansion over the rail adjacency matrix.
+# - Combat: Bombs trade with anything; otherwise the higher rank wins and equal ranks trade
+#   (so Mines, rank 41, are only removed by Bombs, as in Piece.can_defeat).
+# - After a move, sides without a Flag or without a movable piece are removed, a side with
+#   no legal move on its turn is removed, and the game ends when one alliance is left.
+
+# Actions are integers from_cell_id * NUM_CELLS + to_cell_id; `masks` (B, NUM_ACTIONS) marks
+# the legal ones for the side to move. Finished games are reset automatically.
+
+import random
+import time
+
+import numpy as np
+
+from board_encoding import (
+    CELLS, CELL_ID, NUM_CELLS, OWNER_CODE, OWNER_SHIFT, TYPE_CODE, TYPE_MASK,
+)
+from chessboard import Outcome
+from constants import PIECE_RANKS
+from movegen import (
+    ROAD_NEIGHBORS, RAIL_NEIGHBORS, RAIL_RAYS, SPECIAL_PATH_OF, _NEIGHBORS4, _EDGE_INWARD,
+    CAMP_CELLS, HQ_CELLS,
+)
+from selfplay import MODES, make_setup
+
+NUM_ACTIONS = NUM_CELLS * NUM_CELLS
+
+# ---------------------------------------------------------------------------
+# Index tables
+# ---------------------------------------------------------------------------
+
+# Rail nodes that are not playable cells (the rails crossing the center) get ids after the
+# playable cells; they are never occupied. SENTINEL is an extra always-empty column used
+# for padding.
+_extra = sorted({c for cell, ns in RAIL_NEIGHBORS.items() for c in (cell, *ns)} - set(CELLS))
+NODE_ID = dict(CELL_ID)
+NODE_ID.update({c: NUM_CELLS + i for i, c in enumerate(_extra)})
+SENTINEL = len(NODE_ID)
+NUM_COLUMNS = SENTINEL + 1
+
+RANK = np.zeros(16, dtype=np.int8)
+for _name, _code in TYPE_CODE.items():
+    RANK[_code] = PIECE_RANKS[_name]
+FLAG, MINE, BOMB, ENGINEER = (TYPE_CODE[n] for n in ("Flag", "Mine", "Bomb", "Engineer"))
+
+IS_CAMP = np.array([c in CAMP_CELLS for c in CELLS])
+IS_HQ = np.array([c in HQ_CELLS for c in CELLS])
+
+# Moves that need no path check: road and rail neighbors, special L-paths
+_static = set()
+for _a, _cell in enumerate(CELLS):
+    for _n in (*ROAD_NEIGHBORS.get(_cell, ()), *RAIL_NEIGHBORS.get(_cell, ()),
+               *SPECIAL_PATH_OF.get(_cell, ())):
+        if _n in CELL_ID and _n != _cell:
+            _static.add((_a, CELL_ID[_n]))
+STATIC_SRC, STATIC_DST = (np.array(v, dtype=np.intp) for v in zip(*sorted(_static)))
+
+# Straight rail runs: (source, destination, cells in between padded with SENTINEL)
+_rays = []
+for _a, _cell in enumerate(CELLS):
+    for _ray in RAIL_RAYS.get(_cell, ()):
+        for _k, _n in enumerate(_ray):
+            if _n in CELL_ID:
+                _between = [CELL_ID[c] for c in _ray[:_k] if c in CELL_ID]
+                _rays.append((_a, CELL_ID[_n], _between))
+_width = max(len(b) for _, _, b in _rays)
+RAY_SRC = np.array([a for a, _, _ in _rays], dtype=np.intp)
+RAY_DST = np.array([t for _, t, _ in _rays], dtype=np.intp)
+RAY_BETWEEN = np.array([b + [SENTINEL] * (_width - len(b)) for _, _, b in _rays], dtype=np.intp)
+
+# Rail adjacency over all rail nodes, for the Engineer flood fill
+RAIL_ADJ = np.zeros((NUM_COLUMNS, NUM_COLUMNS), dtype=np.float32)
+for _cell, _ns in RAIL_NEIGHBORS.items():
+    for _n in _ns:
+        RAIL_ADJ[NODE_ID[_cell], NODE_ID[_n]] = 1.0
+ON_RAIL = RAIL_ADJ[:NUM_CELLS].any(axis=1)
+
+# Mobility rule (movegen.is_movable): four grid neighbors and inward neighbors of edge cells.
+# Non-playable neighbors count as empty, so they map to SENTINEL; missing ones are masked off.
+def _padded(table, width):
+    index = np.full((NUM_CELLS, width), SENTINEL, dtype=np.intp)
+    valid = np.zeros((NUM_CELLS, width), dtype=bool)
+    for i, cell in enumerate(CELLS):
+        for j, n in enumerate(table[cell]):
+            index[i, j] = CELL_ID.get(n, SENTINEL)
+            valid[i, j] = True
+    return index, valid
+
+
+NB4, NB4_VALID = _padded(_NEIGHBORS4, 4)
+INWARD, INWARD_VALID = _padded(_EDGE_INWARD, 2)
+
+# The same tables split by neighbor slot: (index, valid) per NB4 column and, per INWARD
+# column, (cells that have that neighbor, their neighbor index)
+NB4_SLOTS = [(NB4[:, j], NB4_VALID[:, j]) for j in range(NB4.shape[1])]
+INWARD_SLOTS = [(np.flatnonzero(INWARD_VALID[:, j]), INWARD[INWARD_VALID[:, j], j])
+                for j in range(INWARD.shape[1])]
+INWARD_SLOTS = [(cells, index) for cells, index in INWARD_SLOTS if len(cells)]
+
+
+# ---------------------------------------------------------------------------
+# Batched rules
+# ---------------------------------------------------------------------------
+
+# Boards padded with the always-empty rail and sentinel columns.
+def _extend(boards: np.ndarray) -> np.ndarray:
+    ext = np.zeros((boards.shape[0], NUM_COLUMNS), dtype=np.uint8)
+    ext[:, :NUM_CELLS] = boards
+    return ext
+
+
+# movable[b, cell] for every piece on the boards, whatever its owner (movegen.is_movable), in
+# one pass: neighbor slot by slot, the neighbors of all cells are gathered through the
+# NB4 / INWARD index arrays and compared with each cell's own owner bits (a 2-D compare per
+# slot is much cheaper than reducing a (B, cells, 4) array). Serves elimination checks, move
+# generation and feature extraction; encoded boards (board_encoding) can be stacked with
+# np.frombuffer(b"".join(codes), np.uint8).reshape(-1, NUM_CELLS).
+def movable_mask(boards: np.ndarray) -> np.ndarray:
+    ext = _extend(boards)
+    types = boards & TYPE_MASK
+    owner = boards & 0x30
+    movable = np.zeros(boards.shape, dtype=bool)
+    for index, valid in NB4_SLOTS:
+        around = ext[:, index]
+        movable |= ((around == 0) | ((around & 0x30) != owner)) & valid
+    for cells, index in INWARD_SLOTS:
+        inward = ext[:, index]
+        movable[:, cells] &= ~(((inward & 0x30) == owner[:, cells]) & ((inward & TYPE_MASK) == MINE))
+    return movable & (types != 0) & (types != FLAG) & (types != MINE)
+
+
+# movable[b, cell] for the pieces of owner code `owners[b]` (movegen.is_movable).
+def movable_pieces(boards: np.ndarray, owners: np.ndarray) -> np.ndarray:
+    own = (boards != 0) & ((boards & 0x30) == (owners[:, None] << OWNER_SHIFT))
+    return movable_mask(boards) & own
+
+
+# Legal move mask (B, NUM_ACTIONS) for side `owners[b]` under `alliance_of` (owner code ->
+# alliance number, array of 4).
+def legal_mask(boards: np.ndarray, owners: np.ndarray, alliance_of: np.ndarray) -> np.ndarray:
+    n = boards.shape[0]
+    source = movable_pieces(boards, owners) & ~IS_HQ
+    occupied = boards != 0
+    target_alliance = alliance_of[(boards >> OWNER_SHIFT) & 0x03]
+    enemy = occupied & (target_alliance != alliance_of[owners][:, None]) & ~IS_CAMP
+    target = ~occupied | enemy
+
+    mask = np.zeros((n, NUM_ACTIONS), dtype=bool)
+    ok = source[:, STATIC_SRC] & target[:, STATIC_DST]
+    mask[:, STATIC_SRC * NUM_CELLS + STATIC_DST] = ok
+
+    ext = _extend(boards)
+    clear = (ext[:, RAY_BETWEEN] == 0).all(axis=2)
+    ok = source[:, RAY_SRC] & target[:, RAY_DST] & clear
+    rows, cols = np.nonzero(ok)
+    mask[rows, RAY_SRC[cols] * NUM_CELLS + RAY_DST[cols]] = True
+
+    # Engineers on a railway: flood fill along rails through empty cells, one row per
+    # Engineer. Rows drop out of the expansion as soon as their fill stops growing.
+    env, src = np.nonzero(source & ((boards & TYPE_MASK) == ENGINEER) & ON_RAIL)
+    if len(env):
+        empty = ext[env] == 0
+        visited = np.zeros((len(env), NUM_COLUMNS), dtype=bool)
+        visited[np.arange(len(env)), src] = True
+        reached = np.zeros_like(visited)
+        active = np.arange(len(env))
+        while len(active):
+            step = (visited[active].astype(np.float32) @ RAIL_ADJ) > 0
+            reached[active] = step
+            grown = visited[active] | (step & empty[active])
+            changed = (grown != visited[active]).any(axis=1)
+            visited[active] = grown
+            active = active[changed]
+        reached = reached[:, :NUM_CELLS] & target[env]
+        reached[np.arange(len(env)), src] = False
+        rows, dst = np.nonzero(reached)
+        mask[env[rows], src[rows] * NUM_CELLS + dst] = True
+    return mask
+
+
+# Apply one move per board in place; returns the Outcome code of each move.
+def apply_moves(boards: np.ndarray, src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    rows = np.arange(boards.shape[0])
+    piece = boards[rows, src]
+    target = boards[rows, dst]
+    pt, tt = piece & TYPE_MASK, target & TYPE_MASK
+    empty = target == 0
+    bomb = ~empty & ((pt == BOMB) | (tt == BOMB))
+    rp, rt = RANK[pt], RANK[tt]
+    win = ~empty & ~bomb & (rp > rt)
+    trade = ~empty & (bomb | (rp == rt))
+
+    boards[rows, dst] = np.where(empty | win, piece, np.where(trade, 0, target))
+    boards[rows, src] = 0
+    outcome = np.full(len(rows), Outcome.LOSE, dtype=np.int8)
+    outcome[empty] = Outcome.MOVE
+    outcome[win] = Outcome.WIN
+    outcome[trade] = Outcome.TRADE
+    return outcome
+
+
+class VectorEnv:
+    # num_envs: number of games B
+    # mode: "2p" (Red vs Green) or "4p", as in selfplay.MODES
+    # setups: optional list of encoded boards to draw starting positions from; by default
+    #         each game starts from a fresh random deployment
+    # max_plies: games that reach this length end as draws
+    def __init__(self, num_envs: int, mode: str = "2p", setups=None, max_plies: int = 2000,
+                 seed=None):
+        self.num_envs = num_envs
+        self.mode = mode
+        self.turn_order, alliance_map = MODES[mode]
+        self.setups = list(setups) if setups else None
+        self.max_plies = max_plies
+        self.rng = random.Random(seed)
+
+        self.order = np.array([OWNER_CODE[s] for s in self.turn_order], dtype=np.int64)
+        self.alliance_of = np.zeros(4, dtype=np.int8)
+        for owner, alliance in alliance_map.items():
+            self.alliance_of[OWNER_CODE[owner]] = alliance
+
+        self.boards = np.zeros((num_envs, NUM_CELLS), dtype=np.uint8)
+        self.side = np.zeros(num_envs, dtype=np.int64)        # owner code to move
+        self.in_game = np.zeros((num_envs, 4), dtype=bool)    # sides still playing
+        self.plies = np.zeros(num_envs, dtype=np.int64)
+        self.masks = np.zeros((num_envs, NUM_ACTIONS), dtype=bool)
+
+    # Start every game afresh. Returns (boards, side to move, legal move masks).
+    def reset(self):
+        self._reset(np.arange(self.num_envs))
+        return self.boards.copy(), self.side.copy(), self.masks.copy()
+
+    # Play one action per game. Returns (boards, rewards, dones, info):
+    # - rewards[b]: +1 / -1 if the game ended with the mover's alliance winning / losing
+    # - dones[b]: the game ended this step (its row already holds the next game)
+    # - info: "side" and "mask" for the next step, "winner" (alliance, 0 for none) and
+    #   "plies" of finished games, and the combat "outcome" of every move
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        rows = np.arange(self.num_envs)
+        if not self.masks[rows, actions].all():
+            bad = rows[~self.masks[rows, actions]]
+            raise ValueError(f"Illegal action in games {bad.tolist()}")
+        movers = self.alliance_of[self.side]
+        outcome = apply_moves(self.boards, actions // NUM_CELLS, actions % NUM_CELLS)
+        self.plies += 1
+
+        self._eliminate(rows)
+        winner = self._winners()
+        live = rows[winner == 0]
+        self.side[live] = self._next_side(live)
+        self._advance(live, winner)
+
+        truncated = (winner == 0) & (self.plies >= self.max_plies)
+        dones = (winner != 0) | truncated
+        rewards = np.where(winner == 0, 0.0, np.where(winner == movers, 1.0, -1.0))
+        info = {"winner": winner, "plies": np.where(dones, self.plies, 0), "outcome": outcome}
+        finished = rows[dones]
+        if len(finished):
+            self._reset(finished)
+        info["side"] = self.side.copy()
+        info["mask"] = self.masks.copy()
+        return self.boards.copy(), rewards.astype(np.float32), dones, info
+
+    # -- batch game flow ---------------------------------------------------
+
+    def _reset(self, rows: np.ndarray) -> None:
+        for b in rows:
+            if self.setups:
+                self.boards[b] = np.frombuffer(self.rng.choice(self.setups), dtype=np.uint8)
+            else:
+                random.seed(self.rng.getrandbits(64))
+                self.boards[b] = np.frombuffer(make_setup(self.mode), dtype=np.uint8)
+        self.plies[rows] = 0
+        self.in_game[rows] = False
+        self.in_game[np.ix_(rows, self.order)] = True
+        self.side[rows] = self.order[0]
+        self._eliminate(rows)
+        self._advance(rows, self._winners())
+
+    # Remove the pieces of sides in `rows` that have lost their Flag or every movable piece.
+    # Mobility of all owners comes from one movable_mask pass, redone only after a removal.
+    def _eliminate(self, rows: np.ndarray) -> None:
+        boards = self.boards[rows]
+        owners_on = (boards >> OWNER_SHIFT) & 0x03
+        movable = movable_mask(boards)
+        for owner in self.order:
+            playing = self.in_game[rows, owner]
+            if not playing.any():
+                continue
+            pieces = (boards != 0) & (owners_on == owner)
+            has_flag = ((boards & 0x3F) == (FLAG | owner << OWNER_SHIFT)).any(axis=1)
+            mobile = (movable & pieces).any(axis=1)
+            out = playing & ~(has_flag & mobile)
+            if out.any():
+                boards[out[:, None] & pieces] = 0
+                self.in_game[rows[out], owner] = False
+                movable = movable_mask(boards)
+        self.boards[rows] = boards
+
+    # Winning alliance per game (0 while more than one alliance is playing).
+    def _winners(self) -> np.ndarray:
+        alliances = np.where(self.in_game, self.alliance_of[None, :], 0)
+        top, low = alliances.max(axis=1), np.where(self.in_game, alliances, 127).min(axis=1)
+        single = self.in_game.any(axis=1) & (top == low)
+        return np.where(single, top, 0).astype(np.int8)
+
+    # Next side in turn order after self.side[rows], skipping sides no longer playing.
+    def _next_side(self, rows: np.ndarray) -> np.ndarray:
+        pos = np.argmax(self.order[None, :] == self.side[rows, None], axis=1)
+        nxt = self.side[rows].copy()
+        found = np.zeros(len(rows), dtype=bool)
+        for step in range(1, len(self.order) + 1):
+            cand = self.order[(pos + step) % len(self.order)]
+            take = ~found & self.in_game[rows, cand]
+            nxt[take] = cand[take]
+            found |= take
+        return nxt
+
+    # Compute legal masks for the side to move in `rows`; a side with no legal move is
+    # removed and the turn passes on (movegen.skip_stuck_side) until someone can move or
+    # the game is over.
+    def _advance(self, rows: np.ndarray, winner: np.ndarray) -> None:
+        self.masks[rows] = False
+        pending = rows[winner[rows] == 0]
+        while len(pending):
+            mask = legal_mask(self.boards[pending], self.side[pending], self.alliance_of)
+            self.masks[pending] = mask
+            stuck = pending[~mask.any(axis=1)]
+            if not len(stuck):
+                break
+            for b in stuck:
+                owner = self.side[b]
+                board = self.boards[b]
+                board[(board != 0) & (((board >> OWNER_SHIFT) & 0x03) == owner)] = 0
+                self.in_game[b, owner] = False
+            winner[stuck] = self._winners()[stuck]
+            still = stuck[winner[stuck] == 0]
+            self.side[still] = self._next_side(still)
+            pending = still
+
+
+# Measure environment steps per second (games x plies) for a batch of `num_envs` games
+# playing uniformly random legal moves.
+def benchmark(num_envs: int = 64, steps: int = 200, mode: str = "2p", seed: int = 0) -> dict:
+    env = VectorEnv(num_envs, mode, seed=seed)
+    _, _, masks = env.reset()
+    rng = np.random.default_rng(seed)
+    finished = 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        # One uniformly random legal action per game, drawn from the flat list of legal ones
+        flat = np.flatnonzero(masks)
+        rows, actions = flat // NUM_ACTIONS, flat % NUM_ACTIONS
+        counts = np.bincount(rows, minlength=num_envs)
+        pick = np.cumsum(counts) - counts + (rng.random(num_envs) * counts).astype(np.int64)
+        _, _, dones, info = env.step(actions[pick])
+        masks = info["mask"]
+        finished += int(dones.sum())
+    elapsed = time.perf_counter() - start
+    return {"num_envs": num_envs, "steps": steps, "seconds": elapsed,
+            "env_steps_per_sec": num_envs * steps / elapsed, "games_finished": finished}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Vectorized environment throughput")
+    parser.add_argument("--envs", type=int, nargs="+", default=[1, 16, 64, 256])
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--mode", choices=sorted(MODES), default="2p")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'envs':>5} {'steps/s':>10} {'finished':>9}")
+    for n in args.envs:
+        r = benchmark(n, args.steps, args.mode, args.seed)
+        print(f"{r['num_envs']:>5} {r['env_steps_per_sec']:>10.0f} {r['games_finished']:>9}")